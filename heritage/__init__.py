@@ -12,9 +12,15 @@ __created_on__ = "Fri Jan  1 11:18:04 2021"
 ###############################################################################
 
 from .heritage import HeritagePlatform, HeritageOutput  # noqa
+from .aio import AsyncHeritagePlatform  # noqa
+from .cache import CompressedMemoryCache, MemoryCache, SQLiteCache  # noqa
+from .concurrency import AdaptiveTimeout  # noqa
+from .mirrors import MirrorPool  # noqa
+from .retry import RetryPolicy  # noqa
 from .constants import HERITAGE_LANG, HERITAGE_COLOURS  # noqa
 from .models import (  # noqa
     AnalysisCandidate,
+    BatchResult,
     ConjugationCell,
     ConjugationTable,
     DeclensionTable,
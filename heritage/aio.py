@@ -0,0 +1,772 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asynchronous Interface to The Sanskrit Heritage Site
+
+Awaitable counterpart of :class:`heritage.heritage.HeritagePlatform` for use
+from asyncio applications. Requests to the web mirror are made using
+`aiohttp`, which is an optional dependency,
+
+    pip install heritage[async]
+
+Scripts of a local installation (shell method) are run as asyncio
+subprocesses and do not require `aiohttp`.
+
+Option building, caching and HTML extraction are shared with the
+synchronous interface, so both produce identical results. The blocking parts
+of these (the persistent cache, charset detection and HTML parsing) run in
+threads, so that they do not block the event loop.
+"""
+
+###############################################################################
+
+import time
+import asyncio
+import logging
+import functools
+import subprocess
+from typing import Iterable, List
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from .concurrency import OVERLOAD_STATUS_CODES, AsyncSingleFlight
+from .heritage import DEFAULT_SHELL_TIMEOUT, HeritageOutput, HeritagePlatform
+from .models import BatchResult
+from .retry import Deadline
+from .shell import ShellUnavailable
+from .utils import (
+    QUERY_CANONICALIZER,
+    build_query_string,
+    conditional_headers,
+    response_validators,
+)
+
+###############################################################################
+
+DEFAULT_CONCURRENCY = 16
+
+###############################################################################
+
+
+class AsyncHeritagePlatform(HeritagePlatform):
+    """
+    The Sanskrit Heritage Platform (asyncio)
+
+    Access various utilities from The Sanskrit Heritage Platform without
+    blocking the event loop. Every action method is a coroutine, e.g.,
+
+        async with AsyncHeritagePlatform() as platform:
+            analyses = await asyncio.gather(
+                *(platform.get_analysis(text) for text in texts)
+            )
+    """
+
+    def __init__(
+        self,
+        base_url: str = None,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        method: str = "web",
+        **kwargs,
+    ):
+        """
+        Initialize Asynchronous Heritage Class
+
+        Parameters
+        ----------
+        base_url : str, optional
+            URL for the Heritage Platform Mirror.
+            If None, the official INRIA website will be used.
+            The default is None.
+        max_concurrency : int, optional
+            Maximum number of requests in flight at any time.
+            The default is DEFAULT_CONCURRENCY.
+        method : str, optional
+            Method used to obtain results, 'web' or 'shell'.
+            The shell method requires the `base_dir` keyword, and runs at
+            most `shell_workers` scripts at once.
+            The default is 'web'.
+        **kwargs :
+            Additional configuration keywords.
+            Refer to HeritagePlatform.__init__()
+            The ``probe`` keyword is not supported, use
+            ``await platform.probe_backends()`` instead.
+        """
+        if kwargs.pop("probe", False):
+            raise TypeError(
+                "Use `await platform.probe_backends()` to probe the methods "
+                "of AsyncHeritagePlatform."
+            )
+        super().__init__(base_url=base_url, method=method, **kwargs)
+        if aiohttp is None:
+            if "web" in {self.method, *self.routes.values()}:
+                raise ImportError(
+                    "AsyncHeritagePlatform requires 'aiohttp' for the web. "
+                    "Install it using `pip install heritage[async]`."
+                )
+            self.shell_fallback = False
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrency = max_concurrency
+        self.in_flight = AsyncSingleFlight()
+        self._client = None
+        self._semaphore = None
+        self._refresh_tasks = set()
+
+    ###########################################################################
+    # Utilities (Actions)
+
+    async def get_analysis(
+        self,
+        input_text: str,
+        sentence: bool = True,
+        unsandhied: bool = False,
+        meta: bool = False,
+        structured: bool = True,
+    ):
+        """Awaitable version of HeritagePlatform.get_analysis()"""
+        options = self._analysis_options(input_text, sentence, unsandhied)
+        result = await self.get_result("reader", options)
+        if result is None:
+            return None
+
+        return await self._run_blocking(
+            self._extract,
+            result,
+            "analysis",
+            meta=meta,
+            structured=structured,
+            fast=self.fast_reader,
+        )
+
+    async def get_parse(
+        self,
+        input_text: str,
+        solution_id: int = None,
+        sentence: bool = True,
+        unsandhied: bool = False,
+    ):
+        """Awaitable version of HeritagePlatform.get_parse()"""
+        solutions = await self.get_analysis(
+            input_text,
+            sentence=sentence,
+            unsandhied=unsandhied,
+            meta=True,
+            structured=True,
+        )
+
+        if solution_id is None:
+            if not solutions:
+                return None
+            solution_id = next(iter(solutions))
+
+        solution = solutions[solution_id]
+        options = self._parse_options(solution)
+        result = await self.get_result("parser", options)
+        if result is None:
+            return None
+        return await self._run_blocking(self._attach_roles, solution, result)
+
+    async def sandhi(self, word_1: str, word_2: str, mode: str = "internal"):
+        """Awaitable version of HeritagePlatform.sandhi()"""
+        options = self._sandhi_options(word_1, word_2, mode)
+        result = await self.get_result("sandhi", options)
+        if result is None:
+            return None
+        return await self._run_blocking(self._extract, result, "sandhi")
+
+    async def search_inflected_form(self, word: str, category: str):
+        """Awaitable version of HeritagePlatform.search_inflected_form()"""
+        options = self._inflected_form_options(word, category)
+        result = await self.get_result("lemma", options)
+        if result is None:
+            return None
+        return await self._run_blocking(
+            HeritageOutput, result, parser=self.html_parser
+        )
+
+    async def get_declensions(
+        self,
+        word: str,
+        gender: str,
+        headers: bool = True,
+        lexicon: str = None,
+        structured: bool = True,
+    ):
+        """Awaitable version of HeritagePlatform.get_declensions()"""
+        options = self._declension_options(word, gender)
+        result = await self.get_result("declension", options)
+        if result is None:
+            return None
+        return await self._run_blocking(
+            self._extract,
+            result,
+            "declensions",
+            headers=headers,
+            structured=structured,
+        )
+
+    async def get_conjugations(
+        self,
+        word: str,
+        gana: str,
+        lexicon: str = None,
+        headers: bool = True,
+        structured: bool = True,
+    ):
+        """Awaitable version of HeritagePlatform.get_conjugations()"""
+        options = self._conjugation_options(word, gana)
+        result = await self.get_result("conjugation", options)
+        if result is None:
+            return None
+        return await self._run_blocking(
+            self._extract,
+            result,
+            "conjugations",
+            headers=headers,
+            structured=structured,
+        )
+
+    async def search_lexicon(
+        self, word: str, lexicon: str = None, structured: bool = True
+    ):
+        """Awaitable version of HeritagePlatform.search_lexicon()"""
+        options = self._search_options(word)
+        result = await self.get_result("search", options)
+        if result is None:
+            return None
+        return await self._run_blocking(
+            self._extract, result, "search_results", structured=structured
+        )
+
+    async def get_lexicon_entry(self, file_name: str, word_id: str):
+        """Awaitable version of HeritagePlatform.get_lexicon_entry()"""
+        method = self.get_method("dictionary")
+        scope = self.cache_scope(method)
+        entry_key = f"{file_name}#{word_id}"
+        if self.cache is not None:
+            entry = await self._run_blocking(
+                self.cache.get, scope, "dictionary_entry", entry_key
+            )
+            if entry is not None:
+                return entry
+
+        content = None
+        if method == "shell":
+            content = await self._run_blocking(
+                self._read_dictionary_page, file_name
+            )
+            if content is None and self.shell_fallback:
+                method = "web"
+        if method == "web":
+            url = self.get_url("dictionary")
+            query_url = f"{url}{file_name}"
+            content = await self._fetch_cached(
+                "dictionary",
+                file_name,
+                functools.partial(
+                    self._query_with_backoff,
+                    query_url,
+                    self.request_attempts,
+                    self.request_timeout,
+                ),
+                method="web",
+            )
+        if content is None:
+            return None
+
+        entry = await self._run_blocking(
+            self._extract, content, "lexicon_entry", word_id
+        )
+        if entry is not None and self.cache is not None:
+            await self._run_blocking(
+                self.cache.set, scope, "dictionary_entry", entry_key, entry
+            )
+        return entry
+
+    async def probe_backends(self, actions: Iterable[str] = None) -> dict:
+        """Awaitable version of HeritagePlatform.probe_backends()"""
+        canaries = self._canary_options()
+        if actions is None:
+            actions = list(canaries)
+
+        report = {}
+        for action in actions:
+            options = canaries[action]
+            timings = {}
+            if self._shell_available(action):
+                started = time.monotonic()
+                result = await self.get_result_from_shell(
+                    self.get_path(action), options
+                )
+                if result is not None:
+                    timings["shell"] = time.monotonic() - started
+            started = time.monotonic()
+            result = await self.get_result_from_web(
+                self.get_url(action), options
+            )
+            if result is not None:
+                timings["web"] = time.monotonic() - started
+            report[action] = self._route_fastest(action, timings)
+        return report
+
+    ###########################################################################
+    # Batch Execution
+
+    async def batch(
+        self, method: str, inputs: Iterable, workers: int = None, **kwargs
+    ) -> List[BatchResult]:
+        """
+        Awaitable version of HeritagePlatform.batch()
+
+        Inputs are processed concurrently on the event loop, bounded by
+        `self.max_concurrency` (web) or `self.shell.workers` (shell).
+        The `workers` argument is ignored.
+        """
+        func = getattr(self, method)
+        inputs = list(inputs)
+        unique = list(dict.fromkeys(self._batch_key(item) for item in inputs))
+
+        async def run(item):
+            args = item if isinstance(item, tuple) else (item,)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as exc:
+                self.logger.error(
+                    "Batch item %r failed in '%s': %r", item, method, exc
+                )
+                return BatchResult(input=item, error=exc)
+            return BatchResult(input=item, result=result)
+
+        completed = await asyncio.gather(*(run(item) for item in unique))
+        return self._batch_results(inputs, dict(zip(unique, completed)))
+
+    ###########################################################################
+    # Fetch Result through Web
+
+    async def get_result_from_web(
+        self,
+        url: str,
+        options: dict,
+        attempts: int = None,
+        timeout: int = None,
+        deadline: float = None,
+        validators: dict = None,
+        meta: dict = None,
+        observe=None,
+    ):
+        """Awaitable version of HeritagePlatform.get_result_from_web()"""
+        attempts = attempts or self.request_attempts
+        timeout = timeout or self.request_timeout
+        query_string = build_query_string(options)
+        query_url = f"{url}?{query_string}"
+        return await self._query_with_backoff(
+            query_url,
+            attempts,
+            timeout,
+            deadline=deadline,
+            validators=validators,
+            meta=meta,
+            observe=observe,
+        )
+
+    async def _query_with_backoff(
+        self,
+        query_url: str,
+        attempts: int,
+        timeout: int,
+        deadline: float = None,
+        validators: dict = None,
+        meta: dict = None,
+        observe=None,
+    ):
+        """
+        Fetch a URL with non-blocking exponential backoff
+
+        At most `self.max_concurrency` requests are in flight at any time,
+        and every request waits for the shared limiter of the host.
+        The backoff sleeps do not hold a concurrency slot.
+        Retries follow `self.retry_policy`, and the whole call ends once the
+        `deadline` in seconds is reached.
+        With several mirrors, every attempt is routed to the best mirror
+        (hedged requests are not supported).
+        Conditional requests are sent for `validators`, and attempts are
+        reported to `observe`, as in HeritagePlatform._query_with_backoff().
+
+        Returns decoded response text on success, otherwise ``None``.
+        """
+        policy = self._retry_policy(attempts)
+        if deadline is None:
+            deadline = policy.deadline
+        clock = Deadline(deadline)
+        headers = conditional_headers(validators)
+        client = self._client_session()
+        limiter = self._limiter()
+        last_error = None
+        status = None
+
+        for attempt in range(policy.attempts):
+            if clock.expired():
+                self.logger.warning(
+                    "Deadline of %ss exceeded for %s.", deadline, query_url
+                )
+                break
+            status = None
+            retry_after = None
+            mirror = None
+            started = None
+            url = query_url
+            reference = None
+            if self.mirrors is not None:
+                reference = self.mirrors.relative(url)
+            if reference is not None:
+                mirror = self.mirrors.select()
+                url = mirror.resolve(reference)
+            host_limiter = self.host_limiter(url)
+            try:
+                await asyncio.wait_for(limiter.acquire(), clock.remaining())
+            except asyncio.TimeoutError as exc:
+                last_error = exc
+                self.logger.warning(
+                    "Deadline of %ss exceeded for %s.", deadline, query_url
+                )
+                break
+            try:
+                try:
+                    remaining = clock.remaining()
+                    if not await host_limiter.acquire_async(remaining):
+                        raise asyncio.TimeoutError(
+                            f"Deadline exceeded waiting to send {url}"
+                        )
+                    attempt_timeout = clock.timeout(timeout)
+                    if attempt_timeout is not None and attempt_timeout <= 0:
+                        host_limiter.cancel()
+                        raise asyncio.TimeoutError(
+                            f"Deadline exceeded before sending {url}"
+                        )
+                    shortened = attempt_timeout != timeout
+                    client_timeout = aiohttp.ClientTimeout(
+                        total=attempt_timeout
+                    )
+                    started = time.monotonic()
+                    try:
+                        async with client.get(
+                            url, timeout=client_timeout, headers=headers
+                        ) as response:
+                            status = response.status
+                            if status == 200:
+                                content = await response.read()
+                                if meta is not None:
+                                    meta.update(
+                                        response_validators(response.headers)
+                                    )
+                                return await self._run_blocking(
+                                    self._decode_text,
+                                    content,
+                                    response.charset,
+                                    url,
+                                )
+                            if status == 304 and headers:
+                                if meta is not None:
+                                    meta["not_modified"] = True
+                                return None
+                            retry_after = policy.retry_after(response.headers)
+                    finally:
+                        latency = time.monotonic() - started
+                        host_limiter.release(
+                            status, latency, kind=self._encoding_key(url)[1]
+                        )
+                        if observe is not None and status in (200, 304):
+                            observe(latency)
+                        if mirror is not None:
+                            self.mirrors.record(
+                                mirror,
+                                status is not None
+                                and status not in OVERLOAD_STATUS_CODES,
+                                latency,
+                            )
+                finally:
+                    limiter.release()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                last_error = exc
+                if (
+                    observe is not None
+                    and isinstance(exc, asyncio.TimeoutError)
+                    and started is not None
+                    and not (shortened or clock.expired())
+                ):
+                    observe(timeout, timed_out=True)
+                self.logger.warning(
+                    "Attempt %s/%s failed for %s: %r",
+                    attempt + 1,
+                    policy.attempts,
+                    query_url,
+                    exc,
+                )
+            else:
+                self.logger.warning(
+                    "Status code %s on attempt %s/%s for %s",
+                    status,
+                    attempt + 1,
+                    policy.attempts,
+                    query_url,
+                )
+
+            delay = policy.next_delay(attempt, status, retry_after)
+            if delay is None:
+                break
+            if not clock.allows(delay):
+                self.logger.warning(
+                    "Deadline of %ss exceeded for %s.", deadline, query_url
+                )
+                break
+            await asyncio.sleep(delay)
+
+        if last_error is not None:
+            self.logger.error(
+                "Unable to fetch %s after %s attempts due to network errors.",
+                query_url,
+                attempt + 1,
+                exc_info=last_error,
+            )
+        elif status is not None:
+            self.logger.error(
+                "Unable to fetch %s after %s attempts. Last status: %s",
+                query_url,
+                attempt + 1,
+                status,
+            )
+        return None
+
+    # ----------------------------------------------------------------------- #
+
+    async def get_result_from_shell(
+        self,
+        path: str,
+        options: dict,
+        timeout: int = None,
+        observe=None,
+        raise_unavailable: bool = False,
+    ):
+        """Awaitable version of HeritagePlatform.get_result_from_shell()"""
+        timeout = timeout or self.shell_timeout
+        query_string = build_query_string(options)
+        environment = self._shell_query_environment(query_string)
+        return await self._run(
+            path,
+            environment,
+            timeout=timeout,
+            observe=observe,
+            raise_unavailable=raise_unavailable,
+        )
+
+    async def _run(
+        self,
+        path,
+        environment: dict,
+        timeout: int = DEFAULT_SHELL_TIMEOUT,
+        observe=None,
+        raise_unavailable: bool = False,
+    ):
+        """Awaitable version of HeritagePlatform._run()"""
+        try:
+            result, usage = await self.shell.run_with_usage_async(
+                path, environment, timeout=timeout
+            )
+            if observe is not None:
+                observe(usage.wall_time)
+            return result
+        except subprocess.TimeoutExpired:
+            self.logger.error("Timeout while executing '%s'.", path)
+            if observe is not None:
+                observe(timeout, timed_out=True)
+        except subprocess.CalledProcessError as exc:
+            self.logger.error(
+                "Subprocess error while executing '%s': %s", path, exc
+            )
+            if raise_unavailable and not self.shell.killed_by_limit(exc.usage):
+                raise ShellUnavailable(path) from exc
+        except OSError as exc:
+            self.logger.error("OS error while executing '%s': %s", path, exc)
+            if raise_unavailable:
+                raise ShellUnavailable(path) from exc
+        return None
+
+    # ----------------------------------------------------------------------- #
+
+    async def get_result(self, action: str, options: dict, *args, **kwargs):
+        """Awaitable version of HeritagePlatform.get_result()"""
+        method = self.get_method(action)
+        if method not in self.METHODS:
+            self.logger.error(f"Invalid method: '{method}'.")
+            return None
+
+        options = QUERY_CANONICALIZER.options(options)
+        query_string = build_query_string(options)
+        if method == "shell":
+            path = self.get_path(action)
+            shell_kwargs = self._timeout_kwargs("shell", action, args, kwargs)
+            try:
+                return await self._fetch_cached(
+                    action,
+                    query_string,
+                    self._timed(
+                        "shell",
+                        action,
+                        functools.partial(
+                            self.get_result_from_shell,
+                            path,
+                            options,
+                            *args,
+                            raise_unavailable=self.shell_fallback,
+                            **shell_kwargs,
+                        ),
+                    ),
+                    method="shell",
+                )
+            except ShellUnavailable:
+                self.logger.warning(
+                    "Local '%s' failed, falling back to the web.", action
+                )
+            # Call arguments are specific to the shell
+            args, kwargs = (), {}
+
+        url = self.get_url(action)
+        web_kwargs = self._timeout_kwargs("web", action, args, kwargs)
+        return await self._fetch_cached(
+            action,
+            query_string,
+            self._timed(
+                "web",
+                action,
+                functools.partial(
+                    self.get_result_from_web, url, options, *args, **web_kwargs
+                ),
+            ),
+            method="web",
+        )
+
+    async def _fetch_cached(
+        self, action: str, query_string: str, fetch, method: str = None
+    ):
+        """
+        Awaitable version of HeritagePlatform._fetch_cached()
+
+        Background refreshes run as tasks of the current event loop.
+        """
+        method = method or self.get_method(action)
+        scope = self.cache_scope(method)
+        found, result = await self._cached(
+            self._cache_lookup, scope, action, query_string
+        )
+        if found:
+            return result
+
+        stale = None
+        if method == "web":
+            stale = await self._cached(
+                self._stale_lookup, scope, action, query_string
+            )
+
+        async def fetch_and_store():
+            if method != "web":
+                result = await fetch()
+                await self._cached(
+                    self._cache_store, scope, action, query_string, result
+                )
+                return result
+
+            meta = {}
+            result = await fetch(
+                validators=self._validators_of(stale), meta=meta
+            )
+            return await self._cached(
+                self._store_web_result,
+                scope,
+                action,
+                query_string,
+                result,
+                meta,
+                stale,
+            )
+
+        key = (scope, action, query_string)
+        if self._serve_stale(stale):
+            self._refresh_in_background(key, fetch_and_store)
+            return stale.value
+        return await self.in_flight.do(key, fetch_and_store)
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Call a blocking function in a thread, without blocking the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._background_executor("blocking"),
+            functools.partial(func, *args, **kwargs),
+        )
+
+    async def _cached(self, func, *args):
+        """Call a cache function, in a thread if it uses SQLite"""
+        if self.persistent_cache is None:
+            return func(*args)
+        return await self._run_blocking(func, *args)
+
+    def _refresh_in_background(self, key: tuple, refresh):
+        """Run `refresh()` as a task of the event loop, unless running"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def run():
+            try:
+                await self.in_flight.do(key, refresh)
+            except Exception:
+                self.logger.exception("Background refresh failed: %s", key)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(run())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    ###########################################################################
+    # HTTP Session
+
+    def _client_session(self) -> "aiohttp.ClientSession":
+        """aiohttp session, created on first use inside the event loop"""
+        if self._client is None or self._client.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._client = aiohttp.ClientSession(connector=connector)
+        return self._client
+
+    def _limiter(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def close(self):
+        """
+        Wait for background refreshes, then release the HTTP connections
+        and the owned persistent cache
+        """
+        if self._refresh_tasks:
+            await asyncio.gather(*self._refresh_tasks)
+        client, self._client = self._client, None
+        if client is not None:
+            await client.close()
+        super().close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def __enter__(self):
+        raise TypeError("Use `async with` for AsyncHeritagePlatform.")
+
+    def __exit__(self, exc_type, exc_value, traceback):  # pragma: no cover
+        pass
+
+
+###############################################################################
@@ -0,0 +1,1013 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Response Caches
+
+Caches used underneath :meth:`heritage.heritage.HeritagePlatform.get_result`.
+
+Every cache is addressed by a ``(scope, action, query)`` triple,
+
+* ``scope`` identifies the backend (web mirror URL or local installation)
+* ``action`` is a key of :attr:`HeritagePlatform.ACTIONS`
+* ``query`` is the canonical ``QUERY_STRING`` sent to the backend
+"""
+
+###############################################################################
+
+import os
+import sys
+import gzip
+import json
+import zlib
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Iterable, Iterator
+from collections import OrderedDict, namedtuple
+from dataclasses import fields, is_dataclass
+
+###############################################################################
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CACHE_ENTRIES = 1024
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_FAILURE_TTL = 30
+SNAPSHOT_FORMAT = "heritage-cache"
+SNAPSHOT_VERSION = 1
+
+CacheInfo = namedtuple(
+    "CacheInfo",
+    ["hits", "misses", "maxsize", "currsize", "nbytes", "maxbytes"],
+)
+
+# Cached value along with its validators (e.g. ETag) and the number of
+# seconds since it expired (zero or negative while it is fresh)
+CacheEntry = namedtuple("CacheEntry", ["value", "expired_for", "meta"])
+
+###############################################################################
+
+
+class _Failed:
+    """Marker for a query whose backend call failed"""
+
+    def __repr__(self):
+        return "FAILED"
+
+    def __reduce__(self):
+        return "FAILED"
+
+
+FAILED = _Failed()
+
+###############################################################################
+
+
+def sizeof(value) -> int:
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if is_dataclass(value):
+        return sys.getsizeof(value) + sum(
+            sizeof(getattr(value, f.name)) for f in fields(value)
+        )
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+###############################################################################
+
+
+class MemoryCache:
+    """
+    Bounded in-memory LRU cache
+
+    Entries are evicted in least-recently-used order whenever either the
+    entry budget or the byte budget is exceeded, and expire after ``ttl``
+    seconds if a time-to-live is set. The cache is thread-safe and holds no
+    reference to the objects using it, so a single instance can be shared
+    by every :class:`heritage.heritage.HeritagePlatform` in the process.
+
+    Expired entries are kept for another ``stale_ttl`` seconds (or as given
+    to MemoryCache.set() for an entry), during which they are only available
+    through MemoryCache.lookup(), e.g. to be served while being revalidated.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_CACHE_ENTRIES,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        ttl: float = None,
+        stale_ttl: float = 0,
+    ):
+        """
+        Initialize Memory Cache
+
+        Parameters
+        ----------
+        max_entries : int, optional
+            Maximum number of entries.
+            If None, the number of entries is not limited.
+            The default is DEFAULT_CACHE_ENTRIES.
+        max_bytes : int, optional
+            Maximum total (approximate) size of the cached values in bytes.
+            If None, the size is not limited.
+            The default is DEFAULT_CACHE_BYTES.
+        ttl : float, optional
+            Time-to-live for entries in seconds.
+            If None, entries never expire.
+            The default is None.
+        stale_ttl : float, optional
+            Seconds for which expired entries are kept.
+            The default is 0.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    # ----------------------------------------------------------------------- #
+
+    def get(self, scope: str, action: str, query: str):
+        """
+        Get a cached value
+
+        Returns
+        -------
+        object
+            Cached value, or ``None`` when absent or expired.
+        """
+        key = (scope, action, query)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[2] is not None:
+                now = time.monotonic()
+                if entry[2] <= now:
+                    if entry[4] <= now:
+                        self._discard(key)
+                    entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return self._unpack(entry[0])
+
+    def lookup(
+        self, scope: str, action: str, query: str, stale_ttl: float = None
+    ):
+        """
+        Get a cached value, even if expired, along with its metadata
+
+        Parameters
+        ----------
+        stale_ttl : float, optional
+            Seconds for which an expired entry is still returned, within
+            those for which it is kept.
+            The default is ``self.stale_ttl``.
+
+        Returns
+        -------
+        CacheEntry
+            Entry, or ``None`` when absent (or expired for longer than
+            `stale_ttl`). Hits and misses are not counted.
+        """
+        if stale_ttl is None:
+            stale_ttl = self.stale_ttl
+        with self._lock:
+            entry = self._data.get((scope, action, query))
+            if entry is None:
+                return None
+            expired_for = 0.0
+            if entry[2] is not None:
+                now = time.monotonic()
+                expired_for = now - entry[2]
+                if expired_for > 0 and (
+                    expired_for >= stale_ttl or entry[4] <= now
+                ):
+                    return None
+            return CacheEntry(self._unpack(entry[0]), expired_for, entry[3])
+
+    def set(
+        self,
+        scope: str,
+        action: str,
+        query: str,
+        value,
+        ttl: float = None,
+        meta: dict = None,
+        stale_ttl: float = None,
+    ):
+        """
+        Store a value
+
+        Parameters
+        ----------
+        ttl : float, optional
+            Time-to-live of this entry in seconds, overriding ``self.ttl``.
+        meta : dict, optional
+            Metadata of the value, e.g. HTTP validators.
+        stale_ttl : float, optional
+            Seconds for which this entry is kept once expired, overriding
+            ``self.stale_ttl``.
+        """
+        key = (scope, action, query)
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        expires = kept = None
+        if ttl is not None:
+            expires = time.monotonic() + ttl
+            kept = expires + stale_ttl
+        packed, size = self._pack(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            LOGGER.debug("Value too large to cache (%s bytes).", size)
+            return
+        with self._lock:
+            self._discard(key)
+            stored, size = self._retain(packed, size)
+            self._data[key] = (stored, size, expires, meta, kept)
+            self._nbytes += size
+            self._evict()
+
+    def delete(self, scope: str, action: str, query: str):
+        """Remove a single value"""
+        with self._lock:
+            self._discard((scope, action, query))
+
+    def items(self) -> list:
+        """Unexpired entries as ``(scope, action, query, value)`` tuples"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                key + (self._unpack(entry[0]),)
+                for key, entry in self._data.items()
+                if entry[2] is None or entry[2] > now
+            ]
+
+    def _discard(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry[1]
+            self._release(entry[0])
+
+    def _evict(self):
+        while self._data and (
+            (
+                self.max_entries is not None
+                and len(self._data) > self.max_entries
+            )
+            or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+        ):
+            _, entry = self._data.popitem(last=False)
+            self._nbytes -= entry[1]
+            self._release(entry[0])
+
+    # Storage hooks, called with the lock held except for _pack()
+
+    def _pack(self, value):
+        """Prepare a value for storage, returning it with its size"""
+        return value, sizeof(value)
+
+    def _retain(self, packed, size: int):
+        """Take a prepared value into the cache, returning (stored, size)"""
+        return packed, size
+
+    def _release(self, stored):
+        """Forget a stored value (evicted, expired or replaced)"""
+
+    def _unpack(self, stored):
+        """Value represented by a stored value"""
+        return stored
+
+    # ----------------------------------------------------------------------- #
+
+    def cache_info(self) -> CacheInfo:
+        """Report cache statistics, similar to ``functools.lru_cache``"""
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                maxsize=self.max_entries,
+                currsize=len(self._data),
+                nbytes=self._nbytes,
+                maxbytes=self.max_bytes,
+            )
+
+    def cache_clear(self, scope: str = None):
+        """Remove all values, optionally only those of a single scope"""
+        with self._lock:
+            if scope is None:
+                for key in list(self._data):
+                    self._discard(key)
+                self._hits = 0
+                self._misses = 0
+                return
+            for key in [key for key in self._data if key[0] == scope]:
+                self._discard(key)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(max_entries={self.max_entries}, "
+            f"max_bytes={self.max_bytes}, ttl={self.ttl})"
+        )
+
+
+class _Digest(bytes):
+    """Content digest of a compressed value, as stored in an entry"""
+
+
+_Packed = namedtuple("_Packed", ["digest", "compressed", "raw"])
+
+
+class CompressedMemoryCache(MemoryCache):
+    """
+    Bounded in-memory LRU cache of compressed, deduplicated responses
+
+    Text values (HTML pages) are compressed with zlib and stored once per
+    distinct content, addressed by its SHA-1 digest, however many queries
+    lead to it. They are decompressed on every hit. The byte budget counts
+    the compressed contents once, plus a small overhead per entry, so the
+    same budget holds several times more pages than a
+    :class:`MemoryCache`. Other values are stored as they are.
+    """
+
+    ENTRY_OVERHEAD = 256
+
+    def __init__(
+        self,
+        max_entries: int = None,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        ttl: float = None,
+        level: int = 6,
+        stale_ttl: float = 0,
+    ):
+        """
+        Initialize Compressed Memory Cache
+
+        Parameters
+        ----------
+        max_entries : int, optional
+            Maximum number of entries.
+            If None, the number of entries is not limited.
+            The default is None.
+        max_bytes : int, optional
+            Maximum total size of the stored (compressed) values in bytes.
+            If None, the size is not limited.
+            The default is DEFAULT_CACHE_BYTES.
+        ttl : float, optional
+            Time-to-live for entries in seconds.
+            If None, entries never expire.
+            The default is None.
+        level : int, optional
+            zlib compression level (1-9).
+            The default is 6.
+        stale_ttl : float, optional
+            Seconds for which expired entries are kept.
+            The default is 0.
+        """
+        super().__init__(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+        )
+        self.level = level
+        # digest -> [compressed content, number of entries, raw size]
+        self._blobs = {}
+        self._raw_bytes = 0
+
+    def _pack(self, value):
+        if not isinstance(value, str):
+            return super()._pack(value)
+        raw = value.encode("utf-8")
+        digest = hashlib.sha1(raw).digest()
+        compressed = None
+        if digest not in self._blobs:
+            compressed = zlib.compress(raw, self.level)
+        size = self.ENTRY_OVERHEAD + len(compressed or b"")
+        return _Packed(digest, compressed, raw), size
+
+    def _retain(self, packed, size: int):
+        if not isinstance(packed, _Packed):
+            return super()._retain(packed, size)
+        blob = self._blobs.get(packed.digest)
+        if blob is None:
+            compressed = packed.compressed
+            if compressed is None:
+                compressed = zlib.compress(packed.raw, self.level)
+            blob = [compressed, 0, len(packed.raw)]
+            self._blobs[packed.digest] = blob
+            self._nbytes += len(compressed)
+            self._raw_bytes += len(packed.raw)
+        blob[1] += 1
+        return _Digest(packed.digest), self.ENTRY_OVERHEAD
+
+    def _release(self, stored):
+        if not isinstance(stored, _Digest):
+            return
+        blob = self._blobs[stored]
+        blob[1] -= 1
+        if not blob[1]:
+            del self._blobs[stored]
+            self._nbytes -= len(blob[0])
+            self._raw_bytes -= blob[2]
+
+    def _unpack(self, stored):
+        if not isinstance(stored, _Digest):
+            return stored
+        return zlib.decompress(self._blobs[stored][0]).decode("utf-8")
+
+    def compression_info(self) -> dict:
+        """Number of entries and distinct contents, raw and stored bytes"""
+        with self._lock:
+            stored = sum(len(blob[0]) for blob in self._blobs.values())
+            return {
+                "entries": len(self._data),
+                "contents": len(self._blobs),
+                "raw_bytes": self._raw_bytes,
+                "stored_bytes": stored,
+                "ratio": self._raw_bytes / stored if stored else None,
+            }
+
+
+###############################################################################
+
+
+class SQLiteCache:
+    """
+    Persistent response cache backed by SQLite
+
+    The database is opened in WAL mode with a busy timeout, so that several
+    threads and processes can share the same cache file.
+
+    Size limits are enforced approximately: eviction of the least recently
+    used entries runs every ``evict_interval`` writes, and on ``evict()``.
+
+    Reads do not write to the database. Access times and hit/miss counts of
+    get() are kept in memory and written in a single transaction every
+    ``flush_interval`` lookups, on ``flush()`` and ``close()``, and before
+    the statistics are read.
+
+    Expired entries are kept for another ``stale_ttl`` seconds, during
+    which they are only available through lookup(), and are then removed
+    by evict().
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        scope TEXT NOT NULL,
+        action TEXT NOT NULL,
+        query TEXT NOT NULL,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created REAL NOT NULL,
+        accessed REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        meta TEXT,
+        PRIMARY KEY (scope, action, query)
+    );
+    CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+    CREATE TABLE IF NOT EXISTS lookups (
+        action TEXT NOT NULL PRIMARY KEY,
+        hits INTEGER NOT NULL DEFAULT 0,
+        misses INTEGER NOT NULL DEFAULT 0
+    );
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = None,
+        max_entries: int = None,
+        max_bytes: int = None,
+        timeout: float = 30.0,
+        evict_interval: int = 64,
+        stale_ttl: float = 0,
+        flush_interval: int = 256,
+    ):
+        """
+        Initialize SQLite Cache
+
+        Parameters
+        ----------
+        path : str
+            Path to the SQLite database file.
+            It is created if it does not exist.
+        ttl : float, optional
+            Time-to-live for entries in seconds.
+            If None, entries never expire.
+            The default is None.
+        max_entries : int, optional
+            Maximum number of entries to keep.
+            The default is None (unbounded).
+        max_bytes : int, optional
+            Maximum total size of the stored values in bytes.
+            The default is None (unbounded).
+        timeout : float, optional
+            Seconds to wait for a lock held by another connection.
+            The default is 30.0.
+        evict_interval : int, optional
+            Number of writes between two size-based evictions.
+            The default is 64.
+        stale_ttl : float, optional
+            Seconds for which expired entries are kept.
+            The default is 0.
+        flush_interval : int, optional
+            Number of lookups between two writes of their statistics.
+            The default is 256.
+        """
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.evict_interval = max(1, evict_interval)
+        self.stale_ttl = stale_ttl
+        self.flush_interval = max(1, flush_interval)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._writes = 0
+        # Statistics of get() not written yet
+        self._accessed = {}
+        self._hits = {}
+        self._lookups = {}
+        self._pending = 0
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(self.SCHEMA)
+        columns = [
+            row[1]
+            for row in connection.execute("PRAGMA table_info(responses)")
+        ]
+        if "meta" not in columns:
+            # Caches created by earlier versions
+            connection.execute("ALTER TABLE responses ADD COLUMN meta TEXT")
+
+    # ----------------------------------------------------------------------- #
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the SQLite connection for the current thread"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _expired(self, created: float, now: float, stale_ttl: float = 0):
+        if self.ttl is None:
+            return False
+        return created + self.ttl + stale_ttl <= now
+
+    # ----------------------------------------------------------------------- #
+
+    def get(self, scope: str, action: str, query: str):
+        """
+        Get a cached response
+
+        Returns
+        -------
+        str
+            Cached response, or ``None`` when absent or expired.
+        """
+        connection = self._connection()
+        key = (scope, action, query)
+        row = connection.execute(
+            "SELECT value, created FROM responses "
+            "WHERE scope = ? AND action = ? AND query = ?",
+            key,
+        ).fetchone()
+        now = time.time()
+        if row is None or self._expired(row[1], now):
+            # Expired entries are removed by evict()
+            self._count(key, hit=False)
+            return None
+        self._count(key, hit=True, now=now)
+        return row[0]
+
+    def _count(self, key: tuple, hit: bool, now: float = None):
+        """Record a lookup by get(), and flush every `flush_interval`"""
+        with self._lock:
+            counts = self._lookups.setdefault(key[1], [0, 0])
+            counts[0 if hit else 1] += 1
+            if hit:
+                self._accessed[key] = now
+                self._hits[key] = self._hits.get(key, 0) + 1
+            self._pending += 1
+            flush = self._pending >= self.flush_interval
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """Write the access times and lookup counts recorded by get()"""
+        with self._lock:
+            if not self._pending:
+                return
+            accessed, self._accessed = self._accessed, {}
+            hits, self._hits = self._hits, {}
+            lookups, self._lookups = self._lookups, {}
+            self._pending = 0
+
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "UPDATE responses SET accessed = MAX(accessed, ?), "
+                "hits = hits + ? "
+                "WHERE scope = ? AND action = ? AND query = ?",
+                [(accessed[key], hits[key]) + key for key in accessed],
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO lookups (action) VALUES (?)",
+                [(action,) for action in lookups],
+            )
+            connection.executemany(
+                "UPDATE lookups SET hits = hits + ?, misses = misses + ? "
+                "WHERE action = ?",
+                [
+                    (action_hits, misses, action)
+                    for action, (action_hits, misses) in lookups.items()
+                ],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def lookup(
+        self, scope: str, action: str, query: str, stale_ttl: float = None
+    ):
+        """
+        Get a cached response, even if expired, along with its metadata
+
+        Parameters
+        ----------
+        stale_ttl : float, optional
+            Seconds for which an expired entry is still returned, within
+            those for which it is kept (``self.stale_ttl``).
+            The default is ``self.stale_ttl``.
+
+        Returns
+        -------
+        CacheEntry
+            Entry, or ``None`` when absent (or expired for longer than
+            `stale_ttl`).
+        """
+        if stale_ttl is None:
+            stale_ttl = self.stale_ttl
+        row = self._connection().execute(
+            "SELECT value, created, meta FROM responses "
+            "WHERE scope = ? AND action = ? AND query = ?",
+            (scope, action, query),
+        ).fetchone()
+        if row is None:
+            return None
+        value, created, meta = row
+        now = time.time()
+        if self._expired(created, now, stale_ttl):
+            return None
+        expired_for = 0.0
+        if self.ttl is not None:
+            expired_for = now - created - self.ttl
+        return CacheEntry(value, expired_for, json.loads(meta or "null"))
+
+    def set(
+        self,
+        scope: str,
+        action: str,
+        query: str,
+        value: str,
+        created: float = None,
+        meta: dict = None,
+    ):
+        """
+        Store a response
+
+        Parameters
+        ----------
+        created : float, optional
+            Creation time (UNIX timestamp) of the response, e.g. when
+            restoring a snapshot. The default is the current time.
+        meta : dict, optional
+            Metadata of the response, e.g. HTTP validators.
+        """
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        self._connection().execute(
+            "INSERT OR REPLACE INTO responses "
+            "(scope, action, query, value, size, created, accessed, hits, "
+            "meta) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
+            (
+                scope,
+                action,
+                query,
+                value,
+                size,
+                created or now,
+                now,
+                json.dumps(meta) if meta else None,
+            ),
+        )
+        with self._lock:
+            self._writes += 1
+            evict = self._writes % self.evict_interval == 0
+        if evict:
+            self.evict()
+
+    def delete(self, scope: str, action: str, query: str):
+        """Remove a single response"""
+        self._connection().execute(
+            "DELETE FROM responses "
+            "WHERE scope = ? AND action = ? AND query = ?",
+            (scope, action, query),
+        )
+
+    def clear(self, scope: str = None):
+        """Remove all responses, optionally only those of a single scope"""
+        if scope is None:
+            with self._lock:
+                self._accessed, self._hits, self._lookups = {}, {}, {}
+                self._pending = 0
+            self._connection().execute("DELETE FROM responses")
+            self._connection().execute("DELETE FROM lookups")
+        else:
+            self._connection().execute(
+                "DELETE FROM responses WHERE scope = ?", (scope,)
+            )
+
+    def items(self, action: str = None) -> Iterator[tuple]:
+        """
+        Unexpired entries as ``(scope, action, query, value, created)``
+
+        Parameters
+        ----------
+        action : str, optional
+            Only yield the entries of this action.
+        """
+        sql = "SELECT scope, action, query, value, created FROM responses"
+        parameters = ()
+        if action is not None:
+            sql += " WHERE action = ?"
+            parameters = (action,)
+        now = time.time()
+        for row in self._connection().execute(sql, parameters):
+            if not self._expired(row[4], now):
+                yield row
+
+    def prune(
+        self, older_than: float = None, action: str = None, scope: str = None
+    ) -> int:
+        """
+        Remove entries matching every given criterion
+
+        Parameters
+        ----------
+        older_than : float, optional
+            Only remove entries created more than `older_than` seconds ago.
+        action : str, optional
+            Only remove entries of this action.
+        scope : str, optional
+            Only remove entries of this scope.
+
+        Returns
+        -------
+        int
+            Number of removed entries
+        """
+        conditions, parameters = [], []
+        if older_than is not None:
+            conditions.append("created <= ?")
+            parameters.append(time.time() - older_than)
+        if action is not None:
+            conditions.append("action = ?")
+            parameters.append(action)
+        if scope is not None:
+            conditions.append("scope = ?")
+            parameters.append(scope)
+        sql = "DELETE FROM responses"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return self._connection().execute(sql, parameters).rowcount
+
+    # ----------------------------------------------------------------------- #
+
+    def evict(self) -> int:
+        """
+        Remove expired entries and enforce size limits
+
+        Returns
+        -------
+        int
+            Number of removed entries
+        """
+        # Least recently used entries are found by their access times
+        self.flush()
+        connection = self._connection()
+        removed = 0
+        if self.ttl is not None:
+            removed += connection.execute(
+                "DELETE FROM responses WHERE created <= ?",
+                (time.time() - self.ttl - self.stale_ttl,),
+            ).rowcount
+
+        if self.max_entries is not None:
+            (count,) = connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                removed += connection.execute(
+                    "DELETE FROM responses WHERE rowid IN ("
+                    "SELECT rowid FROM responses "
+                    "ORDER BY accessed ASC LIMIT ?)",
+                    (excess,),
+                ).rowcount
+
+        if self.max_bytes is not None:
+            (total,) = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            if total > self.max_bytes:
+                stale = []
+                rows = connection.execute(
+                    "SELECT rowid, size FROM responses ORDER BY accessed ASC"
+                )
+                for rowid, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((rowid,))
+                    total -= size
+                connection.executemany(
+                    "DELETE FROM responses WHERE rowid = ?", stale
+                )
+                removed += len(stale)
+
+        if removed:
+            LOGGER.debug("Evicted %s entries from '%s'.", removed, self.path)
+        return removed
+
+    def info(self) -> dict:
+        """Number of entries, total size and total hits of the cache"""
+        self.flush()
+        entries, size, hits = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) "
+            "FROM responses"
+        ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": hits}
+
+    def action_info(self) -> dict:
+        """
+        Number of entries, total size and lookups of every action
+
+        ``hits`` and ``misses`` count the lookups through get() since the
+        cache was created (or cleared), including those of entries that
+        have since been removed.
+        """
+        self.flush()
+        connection = self._connection()
+        actions = {}
+        for action, entries, size in connection.execute(
+            "SELECT action, COUNT(*), SUM(size) FROM responses GROUP BY action"
+        ):
+            actions[action] = {
+                "entries": entries,
+                "bytes": size,
+                "hits": 0,
+                "misses": 0,
+            }
+        for action, hits, misses in connection.execute(
+            "SELECT action, hits, misses FROM lookups"
+        ):
+            stats = actions.setdefault(
+                action, {"entries": 0, "bytes": 0, "hits": 0, "misses": 0}
+            )
+            stats["hits"] = hits
+            stats["misses"] = misses
+        return dict(sorted(actions.items()))
+
+    def close(self):
+        """Flush the statistics and close every connection of this cache"""
+        self.flush()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def __len__(self):
+        return self.info()["entries"]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(path="{self.path}")'
+
+
+###############################################################################
+
+
+def write_snapshot(path: str, entries: Iterable[tuple]) -> int:
+    """
+    Write cache entries to a portable snapshot file
+
+    A snapshot is a gzip-compressed JSON Lines file: a header line followed
+    by one object per entry.
+
+    Parameters
+    ----------
+    path : str
+        Path of the snapshot file
+    entries : Iterable[tuple]
+        ``(scope, action, query, value)`` or
+        ``(scope, action, query, value, created)`` tuples.
+        Only text values (responses) are written.
+
+    Returns
+    -------
+    int
+        Number of written entries
+    """
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        header = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION}
+        f.write(json.dumps(header) + "\n")
+        for entry in entries:
+            scope, action, query, value = entry[:4]
+            if not isinstance(value, str):
+                continue
+            record = {
+                "scope": scope,
+                "action": action,
+                "query": query,
+                "value": value,
+                "created": entry[4] if len(entry) > 4 else None,
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_snapshot(path: str) -> Iterator[tuple]:
+    """
+    Read the entries of a snapshot file written by write_snapshot()
+
+    Yields
+    ------
+    tuple
+        ``(scope, action, query, value, created)``, where `created` may be
+        ``None``
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"'{path}' is not a cache snapshot.")
+        if header.get("version", 0) > SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Unsupported snapshot version: {header.get('version')}"
+            )
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield (
+                record["scope"],
+                record["action"],
+                record["query"],
+                record["value"],
+                record.get("created"),
+            )
+
+
+###############################################################################
+
+# Process-wide caches shared by every HeritagePlatform by default
+RESPONSE_CACHE = MemoryCache()
+FAILURE_CACHE = MemoryCache(max_bytes=None, ttl=DEFAULT_FAILURE_TTL)
+
+###############################################################################
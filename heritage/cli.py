@@ -17,6 +17,19 @@ from . import Font, HeritagePlatform, Lexicon, Method, SandhiMode
 
 ###############################################################################
 
+# Action methods that may be used to warm the cache
+CACHE_WARM_METHODS = [
+    "get_analysis",
+    "get_parse",
+    "sandhi",
+    "search_inflected_form",
+    "get_declensions",
+    "get_conjugations",
+    "search_lexicon",
+]
+
+###############################################################################
+
 
 def dataclass_to_dict(obj: Any) -> Any:
     """Convert nested dataclasses into dictionaries."""
@@ -40,6 +53,8 @@ def build_platform(args: argparse.Namespace) -> HeritagePlatform:
         platform_kwargs["request_timeout"] = args.request_timeout
     if args.request_attempts is not None:
         platform_kwargs["request_attempts"] = args.request_attempts
+    if args.cache_path:
+        platform_kwargs["persistent_cache"] = args.cache_path
 
     platform = HeritagePlatform(method=args.method.value, **platform_kwargs)
 
@@ -94,6 +109,10 @@ def configure_parser() -> argparse.ArgumentParser:
         type=int,
         help="Number of HTTP retry attempts when using web mode.",
     )
+    parser.add_argument(
+        "--cache-path",
+        help="Path to a persistent (SQLite) response cache.",
+    )
 
     verbosity = parser.add_mutually_exclusive_group()
     verbosity.add_argument(
@@ -202,6 +221,54 @@ def configure_parser() -> argparse.ArgumentParser:
         "--json", action="store_true", help="Output JSON."
     )
 
+    # Cache --------------------------------------------------------------------
+    cache_parser = subparsers.add_parser(
+        "cache", help="Manage the persistent response cache (--cache-path)."
+    )
+    cache_subparsers = cache_parser.add_subparsers(
+        dest="cache_command", required=True
+    )
+    cache_info_parser = cache_subparsers.add_parser(
+        "info", help="Show the size and hits of the cache per action."
+    )
+    cache_info_parser.add_argument(
+        "--json", action="store_true", help="Output JSON."
+    )
+    prune_parser = cache_subparsers.add_parser(
+        "prune", help="Remove entries by age and/or action."
+    )
+    prune_parser.add_argument(
+        "--older-than",
+        type=float,
+        help="Only remove entries older than this many seconds.",
+    )
+    prune_parser.add_argument(
+        "--action",
+        choices=list(HeritagePlatform.ACTIONS),
+        help="Only remove entries of this action.",
+    )
+    warm_parser = cache_subparsers.add_parser(
+        "warm", help="Pre-warm the cache from a file of inputs."
+    )
+    warm_parser.add_argument(
+        "inputs",
+        help=(
+            "File with one call per line: a method name followed by its "
+            "arguments, separated by tabs (e.g. 'sandhi<TAB>rAma<TAB>iti')."
+        ),
+    )
+    warm_parser.add_argument(
+        "--workers", type=int, help="Number of concurrent calls."
+    )
+    export_parser = cache_subparsers.add_parser(
+        "export", help="Write the cache to a snapshot file."
+    )
+    export_parser.add_argument("snapshot", help="Snapshot file (.jsonl.gz).")
+    import_parser = cache_subparsers.add_parser(
+        "import", help="Load a snapshot file into the cache."
+    )
+    import_parser.add_argument("snapshot", help="Snapshot file (.jsonl.gz).")
+
     return parser
 
 
@@ -309,10 +376,83 @@ def cmd_search(args: argparse.Namespace, platform: HeritagePlatform) -> int:
     return 0
 
 
-def main() -> int:
+def read_warm_inputs(path: str) -> list:
+    """Read the calls of a cache warm-up file"""
+    calls = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            method, *arguments = line.split("\t")
+            if method not in CACHE_WARM_METHODS or not arguments:
+                raise ValueError(f"{path}:{line_number}: invalid call: {line}")
+            calls.append((method, *arguments))
+    return calls
+
+
+def cmd_cache(args: argparse.Namespace, platform: HeritagePlatform) -> int:
+    cache = platform.persistent_cache
+    if cache is None:
+        print("The cache command requires --cache-path.", file=sys.stderr)
+        return 2
+
+    if args.cache_command == "info":
+        actions = cache.action_info()
+        if args.json:
+            payload = {"path": cache.path, **cache.info(), "actions": actions}
+            print(json.dumps(payload, indent=2))
+            return 0
+        print(f"Cache: {cache.path}")
+        print("action\tentries\tbytes\thits\tmisses\thit rate")
+        for action, stats in actions.items():
+            lookups = stats["hits"] + stats["misses"]
+            rate = f"{stats['hits'] / lookups:.1%}" if lookups else "-"
+            print(
+                f"{action}\t{stats['entries']}\t{stats['bytes']}\t"
+                f"{stats['hits']}\t{stats['misses']}\t{rate}"
+            )
+        return 0
+
+    if args.cache_command == "prune":
+        removed = cache.prune(older_than=args.older_than, action=args.action)
+        print(f"Removed {removed} entries.")
+        return 0
+
+    if args.cache_command == "warm":
+        try:
+            calls = read_warm_inputs(args.inputs)
+        except (OSError, ValueError) as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        report = platform.warm_cache(calls, workers=args.workers)
+        failed = 0
+        for method, (succeeded, method_failed) in report.items():
+            print(f"{method}: {succeeded} cached, {method_failed} failed")
+            failed += method_failed
+        return 1 if failed else 0
+
+    if args.cache_command == "export":
+        count = platform.export_cache(args.snapshot)
+        print(f"Exported {count} entries to '{args.snapshot}'.")
+        return 0
+
+    if args.cache_command == "import":
+        try:
+            count = platform.import_cache(args.snapshot)
+        except (OSError, ValueError) as exc:
+            print(exc, file=sys.stderr)
+            return 1
+        print(f"Imported {count} entries from '{args.snapshot}'.")
+        return 0
+
+    return 1
+
+
+def main(argv: list = None) -> int:
     """Entry point for the CLI."""
     parser = configure_parser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     level = logging.INFO
     if getattr(args, "quiet", False):
@@ -335,13 +475,17 @@ def main() -> int:
         "conjugation": cmd_conjugation,
         "sandhi": cmd_sandhi,
         "search": cmd_search,
+        "cache": cmd_cache,
     }
 
     handler = command_map.get(args.command)
     if handler is None:
         parser.print_help()
         return 1
-    return handler(args, platform)
+    try:
+        return handler(args, platform)
+    finally:
+        platform.close()
 
 
 ###############################################################################
@@ -0,0 +1,517 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Concurrency Helpers
+
+Primitives used to coordinate concurrent requests to the Heritage Platform.
+"""
+
+###############################################################################
+
+import time
+import asyncio
+import functools
+import logging
+import threading
+from collections import deque
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_INITIAL_CONCURRENCY = 4
+DEFAULT_MAX_CONCURRENCY = 32
+OVERLOAD_STATUS_CODES = {429, 500, 502, 503, 504}
+
+###############################################################################
+
+
+class _Call:
+    """A call in flight, awaited by the duplicate callers"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key
+
+    The first caller for a key executes the function, while concurrent
+    callers with the same key wait for its outcome (result or exception)
+    instead of executing the function again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, func):
+        """
+        Execute `func()` once for all concurrent callers with the same `key`
+
+        Returns
+        -------
+        object
+            Value returned by `func()`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def info(self) -> dict:
+        """Number of executed calls and of calls served by a shared call"""
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared}
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce concurrent coroutines with the same key
+
+    Awaitable counterpart of :class:`SingleFlight`.
+    The shared call runs as a task of its own, which every caller awaits
+    shielded, so that cancelling a caller (even the first one) cancels
+    neither the call nor the other callers.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, func):
+        """Await `func()` once for all concurrent callers with the same key"""
+        task = self._calls.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._done, key))
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when nobody is waiting anymore
+            task.exception()
+
+    def info(self) -> dict:
+        """Number of executed calls and of calls served by a shared call"""
+        return {"calls": self.calls, "shared": self.shared}
+
+
+###############################################################################
+
+
+class LatencyWindow:
+    """Rolling window of recent latencies (in seconds)"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, q: float):
+        """
+        Percentile of the recent latencies
+
+        Parameters
+        ----------
+        q : float
+            Percentile in the range [0, 100]
+
+        Returns
+        -------
+        float
+            Latency, or ``None`` if no latency has been recorded
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = int(round(q / 100 * (len(samples) - 1)))
+        return samples[min(len(samples) - 1, index)]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class AdaptiveTimeout:
+    """
+    Timeouts derived from the observed latencies
+
+    Latencies of single attempts are tracked per key (e.g. per method and
+    action) in rolling windows. Once `min_samples` latencies are known, the
+    timeout for a key is `multiplier` times their `percentile`, clamped to
+    [`floor`, `ceiling`].
+
+    An attempt that timed out only tells that its latency exceeds the
+    timeout (a censored sample). The timeout is recorded as its latency,
+    and the timeout of the key is raised to `growth` times the timeout (up
+    to `ceiling`) until `window` more latencies have been recorded, so that
+    calls slower than the learned percentile eventually succeed and are
+    learned too.
+    """
+
+    def __init__(
+        self,
+        multiplier: float = 3.0,
+        percentile: float = 99,
+        floor: float = 0.5,
+        ceiling: float = 120.0,
+        min_samples: int = 20,
+        window: int = 200,
+        growth: float = 2.0,
+    ):
+        self.multiplier = multiplier
+        self.percentile = percentile
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.window = window
+        self.growth = growth
+        self._windows = {}
+        # key -> [raised timeout, remaining samples]
+        self._raised = {}
+        self._lock = threading.Lock()
+
+    def _window(self, key) -> LatencyWindow:
+        """Window of a key, creating it if required (caller holds the lock)"""
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = LatencyWindow(self.window)
+        return window
+
+    def record(self, key, latency: float):
+        """Record the latency of a successful attempt"""
+        with self._lock:
+            window = self._window(key)
+            raised = self._raised.get(key)
+            if raised is not None:
+                raised[1] -= 1
+                if raised[1] <= 0:
+                    del self._raised[key]
+        window.add(latency)
+
+    def record_timeout(self, key, timeout: float):
+        """Record an attempt that timed out after `timeout` seconds"""
+        raised = min(self.ceiling, self.growth * timeout)
+        with self._lock:
+            window = self._window(key)
+            current = self._raised.get(key)
+            if current is None or current[0] < raised:
+                self._raised[key] = [raised, self.window]
+        window.add(timeout)
+
+    def observer(self, key):
+        """
+        Callable recording the attempts of a key
+
+        Returns
+        -------
+        callable
+            ``observe(latency, timed_out=False)``, where `latency` is the
+            timeout of the attempt if it timed out.
+        """
+
+        def observe(latency: float, timed_out: bool = False):
+            if timed_out:
+                self.record_timeout(key, latency)
+            else:
+                self.record(key, latency)
+
+        return observe
+
+    def timeout(self, key, default: float) -> float:
+        """Timeout for the next call, or `default` without enough samples"""
+        window = self._windows.get(key)
+        if window is None or len(window) < self.min_samples:
+            timeout = default
+        else:
+            timeout = self.multiplier * window.percentile(self.percentile)
+            timeout = min(self.ceiling, max(self.floor, timeout))
+        raised = self._raised.get(key)
+        if raised is not None and timeout is not None:
+            timeout = max(timeout, raised[0])
+        return timeout
+
+    def info(self) -> dict:
+        """Number of samples, percentile and timeout of every key"""
+        with self._lock:
+            windows = dict(self._windows)
+        return {
+            key: {
+                "samples": len(window),
+                "percentile": window.percentile(self.percentile),
+                "timeout": self.timeout(key, None),
+            }
+            for key, window in windows.items()
+        }
+
+
+class HostLimiter:
+    """
+    Adaptive rate and concurrency limiter for a single host
+
+    * A token bucket caps the request rate at `rate` requests per second
+      (with bursts of up to `burst` requests), if a rate is given.
+    * The number of concurrent requests is limited using AIMD (additive
+      increase, multiplicative decrease): the limit grows by one for every
+      `limit` successful requests, and is multiplied by `decrease_factor`
+      when the host signals overload, i.e., answers with one of
+      OVERLOAD_STATUS_CODES, fails to answer, or answers `latency_factor`
+      times slower than its median latency for the same kind of request
+      (e.g. the same script), since scripts differ widely in latency.
+    """
+
+    def __init__(
+        self,
+        rate: float = None,
+        burst: int = 1,
+        initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 4.0,
+        cooldown: float = 1.0,
+    ):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+
+        self.limit = float(min(initial_concurrency, max_concurrency))
+        self.in_flight = 0
+        self.latencies = LatencyWindow()
+        # Latencies per kind of request, the baselines for overload
+        self._baselines = {}
+
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._decreased = float("-inf")
+        self._condition = threading.Condition()
+
+    # ----------------------------------------------------------------------- #
+
+    def _try_acquire(self):
+        """
+        Try to take a slot (caller must hold the lock)
+
+        Returns
+        -------
+        float
+            0 if a slot was taken, otherwise seconds to wait for a token,
+            or ``None`` to wait for a running request to finish.
+        """
+        if self.in_flight >= int(self.limit):
+            return None
+        if self.rate:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._refilled) * self.rate
+            )
+            self._refilled = now
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        self.in_flight += 1
+        return 0
+
+    def acquire(self, timeout: float = None) -> bool:
+        """
+        Block until a request may be sent
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum time to wait in seconds. The default is no limit.
+
+        Returns
+        -------
+        bool
+            True if a slot was taken, False if `timeout` expired first.
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                delay = self._try_acquire()
+                if delay == 0:
+                    return True
+                if expires is not None:
+                    remaining = expires - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    delay = min(remaining, delay or remaining)
+                self._condition.wait(delay)
+
+    async def acquire_async(
+        self, timeout: float = None, poll_interval: float = 0.01
+    ) -> bool:
+        """
+        Wait until a request may be sent, without blocking the loop
+
+        Refer to HostLimiter.acquire() for `timeout` and the return value.
+        """
+        expires = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                delay = self._try_acquire()
+            if delay == 0:
+                return True
+            if delay is None:
+                delay = poll_interval
+            if expires is not None:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    return False
+                delay = min(delay, remaining)
+            await asyncio.sleep(delay)
+
+    def cancel(self):
+        """Return a slot without sending a request"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def release(
+        self, status: int = None, latency: float = None, kind: str = None
+    ):
+        """
+        Return a slot and adapt the concurrency limit
+
+        Parameters
+        ----------
+        status : int, optional
+            HTTP status code of the response, or None if the request failed.
+        latency : float, optional
+            Time taken by the request in seconds.
+        kind : str, optional
+            Kind of request (e.g. the path of the script), whose latencies
+            are the baseline for `latency`.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            overloaded = status is None or status in OVERLOAD_STATUS_CODES
+            if not overloaded and latency is not None:
+                baseline = self._baselines.get(kind)
+                if baseline is None:
+                    baseline = self._baselines[kind] = LatencyWindow()
+                median = baseline.percentile(50)
+                if len(baseline) >= 20 and median:
+                    overloaded = latency > self.latency_factor * median
+                baseline.add(latency)
+                self.latencies.add(latency)
+
+            if overloaded:
+                now = time.monotonic()
+                if now - self._decreased >= self.cooldown:
+                    self._decreased = now
+                    self.limit = max(
+                        self.min_concurrency,
+                        self.limit * self.decrease_factor,
+                    )
+                    LOGGER.debug(
+                        "Overload signal (status=%s), concurrency limit: %.2f",
+                        status,
+                        self.limit,
+                    )
+            else:
+                self.limit = min(
+                    self.max_concurrency, self.limit + 1 / self.limit
+                )
+            self._condition.notify_all()
+
+    def configure(self, rate: float = None, max_concurrency: int = None):
+        """Update the rate and the upper concurrency bound"""
+        with self._condition:
+            if rate is not None:
+                self.rate = rate
+            if max_concurrency is not None:
+                self.max_concurrency = max_concurrency
+                self.limit = min(self.limit, max_concurrency)
+            self._condition.notify_all()
+
+    def info(self) -> dict:
+        """Current limits and load"""
+        with self._condition:
+            return {
+                "rate": self.rate,
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "p50": self.latencies.percentile(50),
+            }
+
+
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def host_limiter(
+    host: str, rate: float = None, max_concurrency: int = None
+) -> HostLimiter:
+    """
+    Get the process-wide limiter of a host, creating it if required
+
+    Parameters
+    ----------
+    host : str
+        Network location, e.g. 'sanskrit.inria.fr'
+    rate : float, optional
+        Maximum requests per second to the host.
+    max_concurrency : int, optional
+        Upper bound for the adaptive concurrency limit.
+    """
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(host)
+        if limiter is None:
+            limiter = _LIMITERS[host] = HostLimiter(
+                rate=rate,
+                max_concurrency=max_concurrency or DEFAULT_MAX_CONCURRENCY,
+            )
+            return limiter
+    if rate is not None or max_concurrency is not None:
+        limiter.configure(rate=rate, max_concurrency=max_concurrency)
+    return limiter
+
+
+###############################################################################
+
+# Process-wide coalescing of identical backend queries
+IN_FLIGHT = SingleFlight()
+
+###############################################################################
@@ -30,20 +30,59 @@ Using Local Installation
 import os
 import re
 import time
-import random
+import hashlib
 import logging
 import functools
+import threading
 import subprocess
 import urllib.parse
+import dataclasses
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from html import unescape
+from typing import Dict, Iterable, List, Optional
 
 import requests
 import bs4
 
+try:
+    import lxml  # noqa: F401
+except ImportError:  # pragma: no cover
+    lxml = None
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+from .cache import (
+    DEFAULT_FAILURE_TTL,
+    FAILED,
+    FAILURE_CACHE,
+    RESPONSE_CACHE,
+    SQLiteCache,
+    read_snapshot,
+    write_snapshot,
+)
+from .concurrency import (
+    IN_FLIGHT,
+    OVERLOAD_STATUS_CODES,
+    AdaptiveTimeout,
+    HostLimiter,
+    host_limiter,
+)
 from .constants import HERITAGE_COLOURS
+from .memory import ExtractionStats, measure
+from .mirrors import Mirror, MirrorPool
+from .retry import Deadline, RetryPolicy
+from .shell import (
+    ResourceLimits,
+    ShellExecutor,
+    ShellUnavailable,
+    cgi_environment,
+    is_executable,
+)
 from .models import (
     AnalysisCandidate,
+    BatchResult,
     ConjugationCell,
     ConjugationTable,
     DeclensionTable,
@@ -53,7 +92,21 @@ from .models import (
     WordAnalysis,
     WordRole,
 )
-from .utils import build_query_string, devanagari_to_velthuis
+from .reader import (
+    AnalysisTable,
+    SolutionBlock,
+    UnexpectedStructure,
+    scan_solutions,
+)
+from .utils import (
+    QUERY_CANONICALIZER,
+    build_query_string,
+    conditional_headers,
+    decode_strict,
+    devanagari_to_velthuis,
+    response_validators,
+    sniff_charset,
+)
 
 
 ###############################################################################
@@ -61,42 +114,18 @@ from .utils import build_query_string, devanagari_to_velthuis
 ###############################################################################
 
 DEFAULT_REQUEST_TIMEOUT = 10
+DEFAULT_SHELL_TIMEOUT = 30
 DEFAULT_REQUEST_ATTEMPTS = 3
+DEFAULT_POOL_SIZE = 10
+# Tree builder of BeautifulSoup, lxml is considerably faster when available
+HTML_PARSERS = ["lxml", "html.parser", "html5lib"]
+DEFAULT_HTML_PARSER = "html.parser" if lxml is None else "lxml"
 _LATIN_FALLBACK_ENCODINGS = {"iso-8859-1", "latin1", "latin-1"}
-
-###############################################################################
-# TODO: Do we need to use python-frozendict (PyPI)?
-
-
-class frozendict(dict):
-    def __hash__(self):
-        return hash(frozenset(self.items()))
-
-
-def freezeargs(func):
-    """
-    Transform mutable dictionnary arguments into immutable frozen ones
-
-    Useful to be compatible with @cache. Should be added on top of @cache
-    """
-
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        args = tuple(
-            [frozendict(arg) if isinstance(arg, dict) else arg for arg in args]
-        )
-        kwargs = {
-            k: frozendict(v) if isinstance(v, dict) else v
-            for k, v in kwargs.items()
-        }
-        return func(*args, **kwargs)
-
-    for method in ["cache_info", "cache_clear"]:
-        if callable(getattr(func, method, None)):
-            setattr(wrapper, method, getattr(func, method))
-
-    return wrapper
-
+TITLE_REGEX = re.compile(
+    r"<title(?:\s[^>]*)?>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL
+)
+# Responses that end a hedged request
+_FINAL_STATUS_CODES = {requests.codes.ok, requests.codes.not_modified}
 
 ###############################################################################
 
@@ -125,48 +154,187 @@ class HeritageOutput:
     """
 
     CLASSES = {"footer": ["enpied"]}
-
-    def __init__(self, html: str):
+    # Parsed information, computed on first access
+    LAZY_ATTRIBUTES = [
+        "soup",
+        "body",
+        "footer",
+        "meta",
+        "title",
+        "page_title",
+        "inner_title",
+        "blocks",
+    ]
+
+    def __init__(self, html: str, parser: str = None):
+        """
+        Parameters
+        ----------
+        html : str
+            Page generated by the Heritage Platform
+        parser : str, optional
+            Tree builder of BeautifulSoup, one of HTML_PARSERS.
+            The default is DEFAULT_HTML_PARSER.
+        """
         self.logger = logging.getLogger(__name__)
-        self.html = html
-        self.soup = bs4.BeautifulSoup(html, "html.parser")
-        self.process()
+        self.parser = parser or DEFAULT_HTML_PARSER
+        self.process(html)
 
     def process(self, html: str = None):
-        """Process the html and extract basic information"""
+        """
+        Set the html to be processed
+
+        Nothing is parsed until an attribute of LAZY_ATTRIBUTES is accessed
+        (usually by an extractor), and only what is required is computed.
+        """
         # Allow re-using of the class
         if html is not None:
             self.html = html
-            self.soup = bs4.BeautifulSoup(html, "html.parser")
+        for name in self.LAZY_ATTRIBUTES:
+            self.__dict__.pop(name, None)
 
-        self.body = self.soup.find("body")
-        if self.body is None:
+    def release(self):
+        """
+        Drop the html and everything parsed from it
+
+        The tree is decomposed, so that its memory is returned right away
+        instead of when the garbage collector finds its reference cycles.
+        Extracted results do not refer to the tree and remain valid.
+        """
+        soup = self.__dict__.get("soup")
+        if soup is not None:
+            soup.decompose()
+        self.html = None
+        for name in self.LAZY_ATTRIBUTES:
+            self.__dict__.pop(name, None)
+
+    @classmethod
+    def extract(
+        cls,
+        html: str,
+        extractor: str,
+        *args,
+        parser: str = None,
+        with_usage: bool = False,
+        trace_memory: bool = False,
+        **kwargs,
+    ):
+        """
+        Extract results from a page and release it immediately
+
+        Parameters
+        ----------
+        html : str
+            Page generated by the Heritage Platform
+        extractor : str
+            Name of the extractor, e.g. 'analysis' for extract_analysis()
+        *args, **kwargs :
+            Arguments of the extractor
+        parser : str, optional
+            Tree builder of BeautifulSoup, one of HTML_PARSERS.
+        with_usage : bool, optional
+            Also return the usage of this extraction.
+            The default is False.
+        trace_memory : bool, optional
+            Measure the peak memory of the extraction (with `with_usage`).
+            The default is False.
+
+        Returns
+        -------
+        object
+            Result of the extractor, or ``(result, usage)`` with
+            `with_usage`, usage being a :class:`heritage.memory.ExtractionRun`
+        """
+
+        def run():
+            output = cls(html, parser=parser)
+            try:
+                return getattr(output, f"extract_{extractor}")(*args, **kwargs)
+            finally:
+                output.release()
+
+        if not with_usage:
+            return run()
+        return measure(extractor, len(html), run, trace=trace_memory)
+
+    @functools.cached_property
+    def soup(self) -> bs4.BeautifulSoup:
+        return bs4.BeautifulSoup(self.html, self.parser)
+
+    @functools.cached_property
+    def body(self) -> Optional[bs4.element.Tag]:
+        body = self.soup.find("body")
+        if body is None:
             self.logger.error("No <body> tag found in HTML.")
-            self.footer = None
-            self.title = self.soup.find("title")
-            self.inner_title = None
-            self.blocks = []
-            return
+        return body
 
-        self.footer = self.body.find("div", class_=self.CLASSES["footer"])
+    @functools.cached_property
+    def footer(self) -> Optional[bs4.element.Tag]:
+        if self.body is None:
+            return None
+        return self.body.find("div", class_=self.CLASSES["footer"])
+
+    @functools.cached_property
+    def meta(self) -> dict:
+        """Meta information, i.e., content of the <meta> tags by name"""
+        meta = {}
+        for tag in self.soup.find_all("meta"):
+            if tag.get("name", ""):
+                meta[tag.get("name")] = tag.get("content", "")
+            if tag.get("property", ""):
+                meta[tag.get("property")] = tag.get("content", "")
+        return meta
+
+    @functools.cached_property
+    def title(self) -> Optional[bs4.element.Tag]:
+        return self.soup.find("title")
+
+    @functools.cached_property
+    def page_title(self) -> Optional[str]:
+        """
+        Text of the <title> tag, found without parsing the page
+
+        The raw html is scanned with TITLE_REGEX, so that the type of a page
+        can be checked before building its tree.
+        """
+        match = TITLE_REGEX.search(self.html)
+        if match is None:
+            return None
+        return unescape(match.group(1))
+
+    @functools.cached_property
+    def inner_title(self) -> Optional[bs4.element.Tag]:
+        if self.body is None:
+            return None
+        return self.body.find("h1", class_="title")
 
-        # Extract Meta Information
-        self.meta = {}
-        for meta in self.soup.find_all("meta"):
-            if meta.get("name", ""):
-                self.meta[meta.get("name")] = meta.get("content", "")
-            if meta.get("property", ""):
-                self.meta[meta.get("property")] = meta.get("content", "")
+    @functools.cached_property
+    def blocks(self) -> List[bs4.element.Tag]:
+        """Every element of the body"""
+        if self.body is None:
+            return []
+        return self.body.find_all()
 
-        # Extract Title
-        self.title = self.soup.find("title")
-        self.inner_title = self.body.find("h1", class_="title")
+    def _check_title(self, expected: str, exact: bool = True) -> bool:
+        """
+        Check the type of the page using its title (without parsing it)
 
-        # Find Relevant Body Children
-        self.blocks = self.body.find_all()
+        Parameters
+        ----------
+        expected : str
+            Expected title, or a part of it if `exact` is False.
+        """
+        title = self.page_title
+        if not title:
+            self.logger.error("Missing or empty <title> tag.")
+            return False
+        if (title != expected) if exact else (expected not in title):
+            self.logger.error("Invalid output page.")
+            return False
+        return True
 
     def extract_analysis(
-        self, meta: bool = False, structured: bool = False
+        self, meta: bool = False, structured: bool = False, fast: bool = False
     ):
         """
         Extract analysis from HTML
@@ -179,35 +347,37 @@ class HeritageOutput:
         structured : bool
             If True, return dataclass-based representations.
             The default is False (legacy dictionaries).
+        fast : bool
+            If True, extract the solutions from the raw HTML without building
+            a tree (refer to :func:`heritage.reader.scan_solutions`), unless
+            the page has an unexpected structure. The result is the same.
+            The default is False.
         """
-        if not self.title or not self.title.text:
-            self.logger.error("Missing or empty <title> tag.")
-            return None
-        if self.title.text != "Sanskrit Reader Companion":
-            self.logger.error("Invalid output page.")
+        if not self._check_title("Sanskrit Reader Companion"):
             return None
 
-        hr_blocks = self.html.split("<hr>")
-        if len(hr_blocks) < 2:
-            self.logger.error("No solutions found.")
-            return None
+        blocks = None
+        if fast:
+            try:
+                blocks = scan_solutions(self.html)
+            except UnexpectedStructure as exc:
+                self.logger.debug("Parsing the page as a tree: %s", exc)
+        if blocks is None:
+            if self.soup.find("hr") is None:
+                self.logger.error("No solutions found.")
+                return None
+            blocks = self._solution_blocks()
 
         solutions = {}
-        for block in hr_blocks[2:]:
-            if "Solution" not in block:
-                break
-
+        for block in blocks:
             solution = {}
-
-            soup = bs4.BeautifulSoup(block, "html.parser")
-            first_span = soup.find("span")
-            solution_id = int(first_span.text.split()[1])
+            solution_id = int(block.title.split()[1])
 
             solution["id"] = solution_id
             solution["words"] = []
 
             if meta:
-                parser_url = first_span.find("a")["href"]
+                parser_url = block.link
                 # TODO: Better parsing of options
                 parser_options = dict(
                     [
@@ -219,23 +389,17 @@ class HeritageOutput:
                 )
                 solution["parser_options"] = parser_options
 
-            tables = soup.find_all("table")
             current_text = None
-            for table in tables:
-                if table.find("table"):
-                    prev = table.previous_sibling
-                    current_text = (
-                        prev.get_text()
-                        if isinstance(prev, bs4.element.Tag)
-                        else str(prev).strip()
-                    )
+            for item in block.items:
+                if isinstance(item, str):
+                    current_text = item
                 else:
                     # Inner table contains analysis and it occurs after
                     # the original word
-                    analyses = self.parse_analysis(
-                        table, structured=structured
+                    analyses = self.parse_analysis_rows(
+                        item.rows, structured=structured
                     )
-                    css_classes = table.get("class", [])
+                    css_classes = item.classes
                     if meta:
                         word_classes = css_classes
                     categories = [
@@ -281,13 +445,76 @@ class HeritageOutput:
             return structured_solutions
         return solutions
 
+    def _solution_blocks(self):
+        """
+        Solution blocks of a Reader Companion page
+
+        Blocks are delimited by the ``<hr>`` elements of the parsed page
+        (in any case, with or without attributes, but not within comments),
+        and the blocks after the second one hold the solutions, up to the
+        first block without one. The document tree is traversed once.
+
+        Yields
+        ------
+        SolutionBlock
+            Solution, along with its words and analysis tables
+        """
+        boundaries = 0
+        first_span, tables = None, None
+        for element in self.soup.find_all(["hr", "span", "table"]):
+            if element.name == "hr":
+                if tables is not None:
+                    block = self._solution_block(first_span, tables)
+                    if block is None:
+                        return
+                    yield block
+                boundaries += 1
+                if boundaries >= 2:
+                    first_span, tables = None, []
+            elif tables is None:
+                continue
+            elif element.name == "table":
+                tables.append(element)
+            elif first_span is None:
+                first_span = element
+        if tables is not None:
+            block = self._solution_block(first_span, tables)
+            if block is not None:
+                yield block
+
+    def _solution_block(self, first_span, tables):
+        """
+        Solution block from its first ``<span>`` and its ``<table>`` tags
+
+        Returns ``None`` if the block does not hold a solution.
+        """
+        if first_span is None or "Solution" not in first_span.text:
+            return None
+
+        items = []
+        for table in tables:
+            if table.find("table"):
+                # Outer table follows the original word
+                prev = table.previous_sibling
+                items.append(
+                    prev.get_text()
+                    if isinstance(prev, bs4.element.Tag)
+                    else str(prev).strip()
+                )
+            else:
+                items.append(
+                    AnalysisTable(
+                        table.get("class", []), self._analysis_rows(table)
+                    )
+                )
+        link = first_span.find("a")
+        return SolutionBlock(
+            first_span.text, None if link is None else link["href"], items
+        )
+
     def extract_parse(self, structured: bool = False):
         """Extract parse from HTML"""
-        if not self.title or not self.title.text:
-            self.logger.error("Missing or empty <title> tag.")
-            return None
-        if self.title.text != "Sanskrit Reader Assistant":
-            self.logger.error("Invalid output page.")
+        if not self._check_title("Sanskrit Reader Assistant"):
             return None
 
         word_nodes = self.soup.find_all("table", class_="yellow_back")
@@ -316,11 +543,7 @@ class HeritageOutput:
         When ``structured`` is True, returns a :class:`DeclensionTable`
         instance; otherwise returns a nested list of header/body cells.
         """
-        if not self.title or not self.title.text:
-            self.logger.error("Missing or empty <title> tag.")
-            return None
-        if self.title.text != "Sanskrit Grammarian Declension Engine":
-            self.logger.error("Invalid output page.")
+        if not self._check_title("Sanskrit Grammarian Declension Engine"):
             return None
         table = self.soup.find("table", class_="inflexion")
         if table is None:
@@ -356,11 +579,7 @@ class HeritageOutput:
         :class:`ConjugationTable` objects; otherwise a nested dictionary
         keyed by table headings.
         """
-        if not self.title or not self.title.text:
-            self.logger.error("Missing or empty <title> tag.")
-            return None
-        if self.title.text != "Sanskrit Grammarian Conjugation Engine":
-            self.logger.error("Invalid output page.")
+        if not self._check_title("Sanskrit Grammarian Conjugation Engine"):
             return None
         tables = self.soup.find_all("table", class_="gris_cent")
         forms = {} if not structured else []
@@ -398,11 +617,9 @@ class HeritageOutput:
 
     def extract_sandhi(self):
         """Extract Sandhi from HTML"""
-        if not self.title or not self.title.text:
-            self.logger.error("Missing or empty <title> tag.")
+        if not self._check_title("Sanskrit Sandhi Engine"):
             return None
-        if self.title.text != "Sanskrit Sandhi Engine":
-            self.logger.error("Invalid output page.")
+        if self.body is None:
             return None
         pattern = r"\s*([^\s\|]*)\s*\|\s*([^\s=]*)\s*=\s*([^\s]*)\s*"
         for span in self.body.find_all("span"):
@@ -412,11 +629,9 @@ class HeritageOutput:
 
     def extract_lexicon_entry(self, word_id: str):
         """Extract entry from a lexicon"""
-        if not self.title or not self.title.text:
-            self.logger.error("Missing or empty <title> tag.")
-            return None
-        if "Monier-Williams Sanskrit-English" not in self.title.text:
-            self.logger.error("Invalid dictionary page.")
+        if not self._check_title(
+            "Monier-Williams Sanskrit-English", exact=False
+        ):
             return None
         marker = self.soup.find("a", attrs={"name": word_id})
         if marker is None:
@@ -487,26 +702,50 @@ class HeritageOutput:
         table : bs4.element.Tag
             Valid `table` element
 
+        Returns
+        -------
+        analysies : list
+        """
+        return HeritageOutput.parse_analysis_rows(
+            HeritageOutput._analysis_rows(table), structured=structured
+        )
+
+    @staticmethod
+    def _analysis_rows(table: bs4.element.Tag) -> list:
+        """Text and link (or None) of every row of an analysis table"""
+        rows = []
+        for row in table.find_all("tr"):
+            link = row.find("a")
+            href = None if link is None else link["href"]
+            rows.append((row.get_text(), href))
+        return rows
+
+    @staticmethod
+    def parse_analysis_rows(rows: list, structured: bool = False):
+        """
+        Parse the rows of the analysis table of a single word
+
+        Parameters
+        ----------
+        rows : list
+            ``(text, link)`` of every row, where `link` is the link to the
+            lexicon, if any.
+
         Returns
         -------
         analysies : list
         """
         # pattern = r'\[([^\]]*)\]\{([^\}]*)\}'
         pattern = r"\[(.*?)\]\{([^\}]*)\}"
-        rows = table.find_all("tr")
         analyses = []
         logger = logging.getLogger(__name__)
-        for row in rows:
-            if row is None:
-                continue
-
-            link = row.find("a")
+        for row_text, link in rows:
             if link is not None:
-                link_parts = link["href"].split("/")[-1].split("#")
+                link_parts = link.split("/")[-1].split("#")
                 file_name, word_id = link_parts[0], link_parts[1]
             else:
                 file_name, word_id = None, None
-            row_text = row.get_text().strip()
+            row_text = row_text.strip()
             match = re.match(pattern, row_text, flags=re.DOTALL)
             if match is None:
                 logger.debug("Unable to parse analysis row: %s", row_text)
@@ -534,7 +773,12 @@ class HeritageOutput:
         return analyses
 
     def __repr__(self):
-        return repr(self.soup)
+        if self.html is None:
+            return f"{self.__class__.__name__}(released)"
+        return (
+            f"{self.__class__.__name__}("
+            f"title={self.page_title!r}, size={len(self.html)})"
+        )
 
 
 ###############################################################################
@@ -585,6 +829,17 @@ class HeritagePlatform:
 
     METHODS = ["shell", "web"]
     DEFAULT_METHOD = "shell"
+    # Action used by every method that can be run in a batch
+    METHOD_ACTIONS = {
+        "get_analysis": "reader",
+        "get_parse": "parser",
+        "sandhi": "sandhi",
+        "search_inflected_form": "lemma",
+        "get_declensions": "declension",
+        "get_conjugations": "conjugation",
+        "search_lexicon": "search",
+        "get_lexicon_entry": "dictionary",
+    }
 
     def __init__(
         self,
@@ -602,8 +857,10 @@ class HeritagePlatform:
             Path to the Heritage_Platform repository.
             The directory should contain 'ML' sub-directory,
             which further contains the scripts
-        base_url : str, optional
+        base_url : str | list | MirrorPool, optional
             URL for the Heritage Platform Mirror.
+            If a list of URLs (or a :class:`heritage.mirrors.MirrorPool`) is
+            provided, web requests are spread over all the mirrors.
             If None, the official INRIA website will be used.
             The default is None.
         method : str, optional
@@ -616,23 +873,180 @@ class HeritagePlatform:
             Additional configuration keywords. Supported values are:
 
             * ``request_timeout`` (int): timeout for HTTP requests in seconds.
+            * ``shell_timeout`` (int): timeout for scripts in seconds.
+            * ``adaptive_timeout`` (bool | AdaptiveTimeout): derive the
+              timeouts of every action (and method) from its observed
+              latencies, e.g. three times the 99th percentile. Only the
+              attempts themselves are timed (not retries, backoff or waits
+              for a slot), and an attempt that times out raises the timeout
+              of its action. Until enough latencies are known,
+              ``request_timeout`` and ``shell_timeout`` are used. A timeout
+              passed to a call takes precedence.
             * ``request_attempts`` (int): number of HTTP retries before giving up.
+            * ``retry_policy`` (RetryPolicy): retry behaviour of web requests,
+              i.e. attempts, total deadline, backoff and jitter, retryable
+              status codes and ``Retry-After`` handling. If provided, it
+              takes precedence over ``request_attempts``.
+            * ``hedge_percentile`` (float): with several mirrors, send a
+              duplicate request to a second mirror once a request exceeds
+              this latency percentile of its mirror (e.g. 95).
+            * ``shell_workers`` (int): maximum number of scripts of the local
+              installation running at once. The default is the number of
+              CPUs.
+            * ``shell_memory_limit`` (int): maximum virtual memory of a
+              script in bytes. A script exceeding it fails.
+            * ``shell_cpu_limit`` (int): maximum CPU time of a script in
+              seconds.
+            * ``shell_environment`` (dict): additional environment variables
+              for the scripts. Only a minimal environment is inherited
+              (refer to :func:`heritage.shell.cgi_environment`).
+            * ``pool_size`` (int): maximum number of keep-alive connections
+              per host; should match the number of concurrent callers.
+            * ``rate_limit`` (float): maximum number of requests per second
+              to a mirror, shared by the whole process.
+            * ``max_host_concurrency`` (int): upper bound for the adaptive
+              number of concurrent requests to a mirror, shared by the whole
+              process.
+            * ``persistent_cache`` (str | SQLiteCache): on-disk response cache
+              shared across processes and restarts, given either as a path
+              to an SQLite database or as a configured
+              :class:`heritage.cache.SQLiteCache` instance.
+            * ``cache`` (MemoryCache | None): in-memory cache for responses
+              and dictionary entries. The default is the process-wide
+              :data:`heritage.cache.RESPONSE_CACHE`. Use None to disable.
+              A :class:`heritage.cache.CompressedMemoryCache` stores the
+              responses compressed and deduplicated.
+            * ``failure_ttl`` (float): seconds for which a failed query is
+              remembered and not retried. Use 0 to disable negative caching.
+            * ``failure_cache`` (MemoryCache): cache holding the failure
+              markers. The default is :data:`heritage.cache.FAILURE_CACHE`.
+            * ``revalidate`` (bool): store the ``ETag`` and ``Last-Modified``
+              validators of web responses, and refresh expired entries with
+              conditional requests, which the server answers without a body
+              when the page is unchanged. Entries expired for at most the
+              ``ttl`` of their cache are revalidated.
+              The default is True.
+            * ``stale_while_revalidate`` (float): serve a web response that
+              expired less than this many seconds ago immediately, and
+              refresh it in the background.
+              The default is None (disabled).
+              Expired entries are looked up with these windows without
+              changing the caches: results are stored in memory along with
+              how long to keep them once expired, and the ``stale_ttl`` of a
+              persistent cache is only raised if it was opened from a path.
+              A :class:`heritage.cache.SQLiteCache` passed in must keep
+              expired entries itself (refer to its ``stale_ttl``).
+            * ``routes`` (dict): method for specific actions, e.g.
+              ``{"dictionary": "web"}``. Refer to HeritagePlatform.set_method()
+            * ``shell_fallback`` (bool): fetch a result through the web when
+              the local script cannot be run or crashes, but not when it
+              times out or exceeds its resource limits. The default is True.
+            * ``probe`` (bool): time both methods on a canary query of every
+              action and route each action to the faster one.
+              Refer to HeritagePlatform.probe_backends()
+            * ``fast_reader`` (bool): extract the solutions of the Reader
+              Companion without building a tree, refer to the `fast` option
+              of HeritageOutput.extract_analysis(). The default is False.
+            * ``html_parser`` (str): tree builder used to parse the results,
+              one of HTML_PARSERS. The default is 'lxml' if installed, and
+              'html.parser' otherwise. Extracted results do not depend on
+              the parser.
+            * ``trace_memory`` (bool): measure the peak memory of every
+              extraction with :mod:`tracemalloc` (refer to
+              :class:`heritage.memory.PeakMemory`), which slows down the
+              whole process while tracing. The parsed pages are released
+              after every extraction either way.
+              Refer to HeritagePlatform.extraction_info()
         """
         self.logger = logging.getLogger(__name__)
-        self.base_url = self.INRIA_URL if base_url is None else base_url
+        self.fast_reader = kwargs.pop("fast_reader", False)
+        self.trace_memory = kwargs.pop("trace_memory", False)
+        self.extractions = ExtractionStats()
+        self.html_parser = kwargs.pop("html_parser", DEFAULT_HTML_PARSER)
+        if bs4.builder.builder_registry.lookup(self.html_parser) is None:
+            self.logger.warning(
+                "HTML parser '%s' is not available, using '%s'.",
+                self.html_parser,
+                DEFAULT_HTML_PARSER,
+            )
+            self.html_parser = DEFAULT_HTML_PARSER
+        if base_url is None:
+            base_url = self.INRIA_URL
+        hedge_percentile = kwargs.pop("hedge_percentile", None)
+        if isinstance(base_url, (list, tuple)):
+            base_url = MirrorPool(
+                [url if url.endswith("/") else f"{url}/" for url in base_url],
+                hedge_percentile=hedge_percentile,
+            )
+        if isinstance(base_url, MirrorPool):
+            self.mirrors = base_url
+            self.base_url = self.mirrors.urls[0]
+        else:
+            self.mirrors = None
+            self.base_url = base_url
+        self._executors = {}
         self.base_dir = base_dir
         self.scripts_dir = os.path.join(self.base_dir, "ML")
+        self.shell = ShellExecutor(
+            kwargs.pop("shell_workers", None),
+            limits=ResourceLimits(
+                memory=kwargs.pop("shell_memory_limit", None),
+                cpu_time=kwargs.pop("shell_cpu_limit", None),
+            ),
+        )
+        self.shell_environment = cgi_environment(
+            kwargs.pop("shell_environment", None)
+        )
+        self.scripts = {}
         self.request_timeout = kwargs.pop(
             "request_timeout", DEFAULT_REQUEST_TIMEOUT
         )
+        self.shell_timeout = kwargs.pop("shell_timeout", DEFAULT_SHELL_TIMEOUT)
+        self.adaptive_timeout = kwargs.pop("adaptive_timeout", None)
+        if self.adaptive_timeout is True:
+            self.adaptive_timeout = AdaptiveTimeout()
+        elif not self.adaptive_timeout:
+            self.adaptive_timeout = None
         self.request_attempts = kwargs.pop(
             "request_attempts", DEFAULT_REQUEST_ATTEMPTS
         )
+        self.retry_policy = kwargs.pop("retry_policy", None)
+        if self.retry_policy is None:
+            self.retry_policy = RetryPolicy(attempts=self.request_attempts)
+        self.request_attempts = self.retry_policy.attempts
+        self.pool_size = kwargs.pop("pool_size", DEFAULT_POOL_SIZE)
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.rate_limit = kwargs.pop("rate_limit", None)
+        self.max_host_concurrency = kwargs.pop("max_host_concurrency", None)
+        self._limiters = {}
+
+        persistent_cache = kwargs.pop("persistent_cache", None)
+        self._owns_persistent_cache = isinstance(
+            persistent_cache, (str, os.PathLike)
+        )
+        if self._owns_persistent_cache:
+            persistent_cache = SQLiteCache(persistent_cache)
+        self.persistent_cache = persistent_cache
+        self.cache = kwargs.pop("cache", RESPONSE_CACHE)
+        self.failure_ttl = kwargs.pop("failure_ttl", DEFAULT_FAILURE_TTL)
+        self.failure_cache = kwargs.pop("failure_cache", FAILURE_CACHE)
+        self.revalidate = kwargs.pop("revalidate", True)
+        self.stale_while_revalidate = kwargs.pop(
+            "stale_while_revalidate", None
+        )
+        self._keep_expired_entries(self.persistent_cache)
+        self._refreshing = set()
+        self._encodings = {}
+        self.in_flight = IN_FLIGHT
+        self._installation_signature = None
 
         self.method = None
+        self.routes = {}
+        self.shell_fallback = kwargs.pop("shell_fallback", True)
         self.set_method(method)
 
-        if not self.valid_installation():
+        if not self.valid_installation() and not self.scripts:
             self.logger.warning(
                 "Heritage Platform installation not found. "
                 "Falling back to `method=\"web\"`."
@@ -640,11 +1054,29 @@ class HeritagePlatform:
             self.base_dir = ""
             self.scripts_dir = ""
             self.set_method("web")
+        elif self.method == "shell":
+            missing = [
+                action
+                for action in self.ACTIONS
+                if not self._shell_available(action)
+            ]
+            if missing:
+                self.logger.warning(
+                    "Routing actions to the web: %s", ", ".join(missing)
+                )
+            for action in missing:
+                self.routes[action] = "web"
+
+        for action, action_method in kwargs.pop("routes", {}).items():
+            self.set_method(action_method, action=action)
 
         self.options = {}
         for option in self.OPTIONS:
             self.options[option] = self.OPTIONS[option]["default"]
 
+        if kwargs.pop("probe", False):
+            self.probe_backends()
+
     ###########################################################################
     # Utilities (Actions)
 
@@ -682,35 +1114,18 @@ class HeritagePlatform:
             Dictionary of valid morphological analyses with solution_id as keys
         """
 
-        opt_st = "t" if sentence else "f"
-        opt_us = "t" if unsandhied else "f"
-
-        options = {
-            "lex": self.get_lexicon(),
-            "cache": "t",  # Use Cache (t)rue, (f)alse
-            "st": opt_st,  # Sentence (t)rue, Word (f)alse
-            "us": opt_us,  # Unsandhied (t)rue, (f)alse
-            # if 'us' is 'f', "ca eva" is parsed as "ca_eva",
-            # "tathā eva" as "tathā_eva" etc.
-            "cp": "t",  # Full Parser Strength (t)rue, (f)alse
-            "t": self.get_option("t"),
-            "mode": "p",  # Parse Mode (p)arsing, (t)agging
-            # Tagging does not prune any solutions
-            "font": self.get_font(),
-            # Output Display Font (deva)nagari (roma)n
-            "topic": "",
-            "corpmode": "",
-            "corpdir": "",
-            "sentno": "",
-            "text": self.prepare_input(input_text),
-        }
+        options = self._analysis_options(input_text, sentence, unsandhied)
         result = self.get_result("reader", options)
         if result is None:
             return None
 
-        output = HeritageOutput(result)
-        # return output
-        return output.extract_analysis(meta=meta, structured=structured)
+        return self._extract(
+            result,
+            "analysis",
+            meta=meta,
+            structured=structured,
+            fast=self.fast_reader,
+        )
 
     # ----------------------------------------------------------------------- #
 
@@ -790,20 +1205,11 @@ class HeritagePlatform:
         # }
 
         solution = solutions[solution_id]
-        parser_options = solution.parser_options if isinstance(
-            solution, SolutionAnalysis
-        ) else solution["parser_options"]
-        options = dict(parser_options or {})
+        options = self._parse_options(solution)
         result = self.get_result("parser", options)
         if result is None:
             return None
-        output = HeritageOutput(result)
-        roles = output.extract_parse(structured=isinstance(solution, SolutionAnalysis))
-        if isinstance(solution, SolutionAnalysis):
-            solution.roles = roles
-            return solution
-        solution["roles"] = roles
-        return solution
+        return self._attach_roles(solution, result)
 
     # ----------------------------------------------------------------------- #
 
@@ -829,23 +1235,11 @@ class HeritagePlatform:
         sandhi : str
             String obtained by forming the Sandhi
         """
-        if mode not in ["internal", "external"]:
-            self.logger.warning(f"Invalid mode: '{mode}'")
-
-        options = {
-            "lex": self.get_lexicon(),
-            "l": self.prepare_input(word_1),
-            "r": self.prepare_input(word_2),
-            "t": self.get_option("t"),
-            "k": mode,
-            "font": self.get_font(),
-        }
+        options = self._sandhi_options(word_1, word_2, mode)
         result = self.get_result("sandhi", options)
         if result is None:
             return None
-        output = HeritageOutput(result)
-
-        return output.extract_sandhi()
+        return self._extract(result, "sandhi")
 
     # ----------------------------------------------------------------------- #
 
@@ -869,16 +1263,11 @@ class HeritagePlatform:
         matches : list
             List of matches.
         """
-        options = {
-            "t": self.get_option("t"),
-            "q": self.prepare_input(word),
-            "c": category,
-            "font": self.get_font(),
-        }
+        options = self._inflected_form_options(word, category)
         result = self.get_result("lemma", options)
         if result is None:
             return None
-        output = HeritageOutput(result)
+        output = HeritageOutput(result, parser=self.html_parser)
 
         # TODO: Output Parsing
         return output
@@ -919,20 +1308,12 @@ class HeritagePlatform:
             Structured table, legacy list-of-lists, or ``None`` when no table
             can be extracted.
         """
-        options = {
-            "lex": self.get_lexicon(),
-            "t": self.get_option("t"),
-            "q": self.prepare_input(word),
-            "g": self.identify_gender(gender),
-            "font": self.get_font(),
-        }
+        options = self._declension_options(word, gender)
         result = self.get_result("declension", options)
         if result is None:
             return None
-        output = HeritageOutput(result)
-
-        return output.extract_declensions(
-            headers=headers, structured=structured
+        return self._extract(
+            result, "declensions", headers=headers, structured=structured
         )
 
     # ----------------------------------------------------------------------- #
@@ -968,20 +1349,12 @@ class HeritagePlatform:
         list[ConjugationTable] | dict | None
             Structured tables, legacy mapping, or ``None`` on failure.
         """
-        options = {
-            "lex": self.get_lexicon(),
-            "t": self.get_option("t"),
-            "q": self.prepare_input(word),
-            "c": gana,
-            "font": self.get_font(),
-        }
+        options = self._conjugation_options(word, gana)
         result = self.get_result("conjugation", options)
         if result is None:
             return None
-        output = HeritageOutput(result)
-
-        return output.extract_conjugations(
-            headers=headers, structured=structured
+        return self._extract(
+            result, "conjugations", headers=headers, structured=structured
         )
 
     # ----------------------------------------------------------------------- #
@@ -1011,31 +1384,23 @@ class HeritagePlatform:
             ``structured`` is False, or ``None`` when the backend response
             cannot be parsed.
         """
-        options = {
-            "lex": self.get_lexicon(),
-            "t": self.get_option("t"),
-            "q": self.prepare_input(word),
-            "font": self.get_font(),
-        }
+        options = self._search_options(word)
         result = self.get_result("search", options)
         if result is None:
             return None
-        output = HeritageOutput(result)
-
         # TODO: Currently not using the lexicon keyword argument
         # Is there any use for that argument? For this function?
-        return output.extract_search_results(structured=structured)
+        return self._extract(result, "search_results", structured=structured)
 
     ###########################################################################
 
-    @functools.lru_cache(maxsize=None)
     def get_lexicon_entry(self, file_name: str, word_id: str):
         """
         Fetch a single dictionary entry by its file and anchor identifier.
 
         The implementation reuses the same HTML parser used for direct search
         results and returns a :class:`heritage.models.DictionaryEntry`
-        instance.
+        instance. Parsed entries are kept in the in-memory cache.
 
         Parameters
         ----------
@@ -1049,160 +1414,746 @@ class HeritagePlatform:
         DictionaryEntry | None
             Parsed entry when available, otherwise ``None``.
         """
-        if self.method == "shell":
-            path = self.get_path("dictionary")
-            file_path = os.path.join(path, file_name)
-            with open(file_path, encoding="utf-8") as f:
-                content = f.read()
-        elif self.method == "web":
+        method = self.get_method("dictionary")
+        if method not in self.METHODS:
+            self.logger.error(f"Invalid method: '{method}'.")
+            return None
+
+        scope = self.cache_scope(method)
+        entry_key = f"{file_name}#{word_id}"
+        if self.cache is not None:
+            entry = self.cache.get(scope, "dictionary_entry", entry_key)
+            if entry is not None:
+                return entry
+
+        content = None
+        if method == "shell":
+            content = self._read_dictionary_page(file_name)
+            if content is None and self.shell_fallback:
+                method = "web"
+        if method == "web":
             url = self.get_url("dictionary")
-            query_url = f"{url}{file_name}#{word_id}"
-            content = self.__get(
-                query_url, self.request_attempts, self.request_timeout
+            query_url = f"{url}{file_name}"
+            content = self._fetch_cached(
+                "dictionary",
+                file_name,
+                functools.partial(
+                    self._query_with_backoff,
+                    query_url,
+                    self.request_attempts,
+                    self.request_timeout,
+                ),
+                method="web",
             )
-        else:
-            self.logger.error(f"Invalid method: '{self.method}'.")
-            return
 
         if content is None:
             return None
 
-        output = HeritageOutput(content)
-        return output.extract_lexicon_entry(word_id)
+        entry = self._extract(content, "lexicon_entry", word_id)
+        if entry is not None and self.cache is not None:
+            self.cache.set(scope, "dictionary_entry", entry_key, entry)
+        return entry
+
+    def _read_dictionary_page(self, file_name: str):
+        """Read a dictionary page of the local installation"""
+        file_path = os.path.join(self.get_path("dictionary"), file_name)
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                return f.read()
+        except OSError as exc:
+            self.logger.error("Unable to read '%s': %s", file_path, exc)
+            return None
 
     ###########################################################################
-    # Fetch Result through Web or Shell
+    # Batch Execution
 
-    def get_result_from_web(
-        self,
-        url: str,
-        options: dict,
-        attempts: int = None,
-        timeout: int = None,
-    ):
+    def batch(
+        self, method: str, inputs: Iterable, workers: int = None, **kwargs
+    ) -> List[BatchResult]:
         """
-        Get results from the Heritage Platform web mirror
-        Exponential backoff is used in case there are network errors
+        Call an action method for many inputs using a pool of threads
 
         Parameters
         ----------
-        url : str
-            URL of the CGI script to call
-            HeritagePlatform.get_url() can be used to generate supported URLs
-        options : dict
-            Dictionary containing valid options for the script
-        attempts : int, optional
-            Number of attempts for the exponential backoff
-            The default is `self.request_attempts`.
-        timeout : int, optional
-            Timeout for the HTTP request in seconds.
-            The default is `self.request_timeout`.
+        method : str
+            Name of the action method, e.g. 'get_analysis' or 'sandhi'
+        inputs : Iterable
+            Inputs to the method. A tuple is passed as positional arguments,
+            any other value as the first positional argument.
+            Identical inputs are processed only once and share the result.
+        workers : int, optional
+            Number of worker threads.
+            The default is `self.pool_size` if the action of the method is
+            routed to the web, and `self.shell.workers` for the shell.
+        **kwargs :
+            Keyword arguments passed to every call of the method
 
         Returns
         -------
-        str
-            Result (HTML) obtained. Returns ``None`` when every attempt fails.
+        list[BatchResult]
+            One result per input, in input order. An exception raised for an
+            input is reported in its ``error`` and does not abort the batch.
         """
+        func = getattr(self, method)
+        inputs = list(inputs)
+        unique = list(dict.fromkeys(self._batch_key(item) for item in inputs))
+        if not unique:
+            return []
+
+        def run(item):
+            args = item if isinstance(item, tuple) else (item,)
+            try:
+                return BatchResult(input=item, result=func(*args, **kwargs))
+            except Exception as exc:
+                self.logger.error(
+                    "Batch item %r failed in '%s': %r", item, method, exc
+                )
+                return BatchResult(input=item, error=exc)
 
-        attempts = attempts or self.request_attempts
-        timeout = timeout or self.request_timeout
-        query_string = build_query_string(options)
-        query_url = f"{url}?{query_string}"
-        return self.__get(query_url, attempts, timeout)
+        if workers is None:
+            action = self.METHOD_ACTIONS.get(method)
+            if self.get_method(action) == "shell":
+                workers = self.shell.workers
+            else:
+                workers = self.pool_size
+        workers = max(1, min(workers, len(unique)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = dict(zip(unique, executor.map(run, unique)))
+        return self._batch_results(inputs, outcomes)
+
+    @classmethod
+    def _batch_results(cls, inputs: list, outcomes: dict):
+        """Expand the outcomes of unique inputs back to input order"""
+        results = []
+        for item in inputs:
+            outcome = outcomes[cls._batch_key(item)]
+            results.append(
+                BatchResult(
+                    input=item, result=outcome.result, error=outcome.error
+                )
+            )
+        return results
 
-    @functools.lru_cache(maxsize=None)
-    def __get(self, query_url: str, attempts: int, timeout: int):
+    @staticmethod
+    def _batch_key(item):
+        """Hashable form of a batch input, used for de-duplication"""
+        if isinstance(item, list):
+            return tuple(item)
+        return item
+
+    def get_analysis_many(
+        self, texts: Iterable[str], workers: int = None, **kwargs
+    ) -> List[BatchResult]:
+        """Batch version of HeritagePlatform.get_analysis()"""
+        return self.batch("get_analysis", texts, workers=workers, **kwargs)
+
+    def get_parse_many(
+        self, texts: Iterable[str], workers: int = None, **kwargs
+    ) -> List[BatchResult]:
+        """Batch version of HeritagePlatform.get_parse()"""
+        return self.batch("get_parse", texts, workers=workers, **kwargs)
+
+    def sandhi_many(
+        self, pairs: Iterable[tuple], workers: int = None, **kwargs
+    ) -> List[BatchResult]:
         """
-        Query web with exponential-backoff
+        Batch version of HeritagePlatform.sandhi()
 
-        Parameters
-        ----------
-        query_url : str
-            URL to query
-        attempts : int, optional
+        Inputs are (word_1, word_2) pairs.
+        """
+        return self.batch("sandhi", pairs, workers=workers, **kwargs)
+
+    def search_inflected_form_many(
+        self, items: Iterable[tuple], workers: int = None, **kwargs
+    ) -> List[BatchResult]:
+        """
+        Batch version of HeritagePlatform.search_inflected_form()
+
+        Inputs are (word, category) pairs.
+        """
+        return self.batch(
+            "search_inflected_form", items, workers=workers, **kwargs
+        )
+
+    def get_declensions_many(
+        self, items: Iterable[tuple], workers: int = None, **kwargs
+    ) -> List[BatchResult]:
+        """
+        Batch version of HeritagePlatform.get_declensions()
+
+        Inputs are (word, gender) pairs.
+        """
+        return self.batch("get_declensions", items, workers=workers, **kwargs)
+
+    def get_conjugations_many(
+        self, items: Iterable[tuple], workers: int = None, **kwargs
+    ) -> List[BatchResult]:
+        """
+        Batch version of HeritagePlatform.get_conjugations()
+
+        Inputs are (word, gana) pairs.
+        """
+        return self.batch(
+            "get_conjugations", items, workers=workers, **kwargs
+        )
+
+    def search_lexicon_many(
+        self, words: Iterable[str], workers: int = None, **kwargs
+    ) -> List[BatchResult]:
+        """Batch version of HeritagePlatform.search_lexicon()"""
+        return self.batch("search_lexicon", words, workers=workers, **kwargs)
+
+    ###########################################################################
+    # Options Builders
+
+    def _analysis_options(
+        self, input_text: str, sentence: bool, unsandhied: bool
+    ) -> dict:
+        """Options for The Sanskrit Reader Companion (`reader`)"""
+        opt_st = "t" if sentence else "f"
+        opt_us = "t" if unsandhied else "f"
+
+        return {
+            "lex": self.get_lexicon(),
+            "cache": "t",  # Use Cache (t)rue, (f)alse
+            "st": opt_st,  # Sentence (t)rue, Word (f)alse
+            "us": opt_us,  # Unsandhied (t)rue, (f)alse
+            # if 'us' is 'f', "ca eva" is parsed as "ca_eva",
+            # "tathā eva" as "tathā_eva" etc.
+            "cp": "t",  # Full Parser Strength (t)rue, (f)alse
+            "t": self.get_option("t"),
+            "mode": "p",  # Parse Mode (p)arsing, (t)agging
+            # Tagging does not prune any solutions
+            "font": self.get_font(),
+            # Output Display Font (deva)nagari (roma)n
+            "topic": "",
+            "corpmode": "",
+            "corpdir": "",
+            "sentno": "",
+            "text": self.prepare_input(input_text),
+        }
+
+    @staticmethod
+    def _parse_options(solution) -> dict:
+        """Options for The Sanskrit Reader Assistant (`parser`)"""
+        parser_options = solution.parser_options if isinstance(
+            solution, SolutionAnalysis
+        ) else solution["parser_options"]
+        return dict(parser_options or {})
+
+    def _sandhi_options(self, word_1: str, word_2: str, mode: str) -> dict:
+        """Options for The Sandhi Engine (`sandhi`)"""
+        if mode not in ["internal", "external"]:
+            self.logger.warning(f"Invalid mode: '{mode}'")
+
+        return {
+            "lex": self.get_lexicon(),
+            "l": self.prepare_input(word_1),
+            "r": self.prepare_input(word_2),
+            "t": self.get_option("t"),
+            "k": mode,
+            "font": self.get_font(),
+        }
+
+    def _inflected_form_options(self, word: str, category: str) -> dict:
+        """Options for The Lemmatizer (`lemma`)"""
+        return {
+            "t": self.get_option("t"),
+            "q": self.prepare_input(word),
+            "c": category,
+            "font": self.get_font(),
+        }
+
+    def _declension_options(self, word: str, gender: str) -> dict:
+        """Options for The Declension Engine (`declension`)"""
+        return {
+            "lex": self.get_lexicon(),
+            "t": self.get_option("t"),
+            "q": self.prepare_input(word),
+            "g": self.identify_gender(gender),
+            "font": self.get_font(),
+        }
+
+    def _conjugation_options(self, word: str, gana: str) -> dict:
+        """Options for The Conjugation Engine (`conjugation`)"""
+        return {
+            "lex": self.get_lexicon(),
+            "t": self.get_option("t"),
+            "q": self.prepare_input(word),
+            "c": gana,
+            "font": self.get_font(),
+        }
+
+    def _search_options(self, word: str) -> dict:
+        """Options for The Dictionary Index (`search`)"""
+        return {
+            "lex": self.get_lexicon(),
+            "t": self.get_option("t"),
+            "q": self.prepare_input(word),
+            "font": self.get_font(),
+        }
+
+    def _canary_options(self) -> dict:
+        """Options of a cheap representative query for every action"""
+        return {
+            "reader": self._analysis_options("raama.h", True, False),
+            "sandhi": self._sandhi_options("raama.h", "vanam", "external"),
+            "lemma": self._inflected_form_options("raama.h", "Noun"),
+            "declension": self._declension_options("raama", "m"),
+            "conjugation": self._conjugation_options("bhuu", "1"),
+            "search": self._search_options("raama"),
+        }
+
+    def _extract(self, result: str, extractor: str, *args, **kwargs):
+        """
+        Extract results from a page, releasing the parsed page right away
+
+        Refer to HeritageOutput.extract(). The usage of every extraction is
+        recorded, refer to HeritagePlatform.extraction_info().
+        """
+        extracted, usage = HeritageOutput.extract(
+            result,
+            extractor,
+            *args,
+            parser=self.html_parser,
+            with_usage=True,
+            trace_memory=self.trace_memory,
+            **kwargs,
+        )
+        self.extractions.record(usage)
+        return extracted
+
+    def _attach_roles(self, solution, result: str):
+        """Attach semantic roles from a `parser` result to the solution"""
+        structured = isinstance(solution, SolutionAnalysis)
+        roles = self._extract(result, "parse", structured=structured)
+        if structured:
+            solution.roles = roles
+            return solution
+        solution["roles"] = roles
+        return solution
+
+    ###########################################################################
+    # Fetch Result through Web or Shell
+
+    def get_result_from_web(
+        self,
+        url: str,
+        options: dict,
+        attempts: int = None,
+        timeout: int = None,
+        deadline: float = None,
+        validators: dict = None,
+        meta: dict = None,
+        observe=None,
+    ):
+        """
+        Get results from the Heritage Platform web mirror
+        Exponential backoff is used in case there are network errors
+
+        Parameters
+        ----------
+        url : str
+            URL of the CGI script to call
+            HeritagePlatform.get_url() can be used to generate supported URLs
+        options : dict
+            Dictionary containing valid options for the script
+        attempts : int, optional
             Number of attempts for the exponential backoff
+            The default is `self.request_attempts`.
         timeout : int, optional
             Timeout for the HTTP request in seconds.
+            The default is `self.request_timeout`.
+        deadline : float, optional
+            Maximum total time for the call in seconds, including retries.
+            The default is `self.retry_policy.deadline`.
+        validators : dict, optional
+            ``etag`` and ``last_modified`` of a cached result, sent as
+            ``If-None-Match`` and ``If-Modified-Since`` respectively.
+        meta : dict, optional
+            Filled with the validators of the response, or with
+            ``not_modified`` if the cached result is still valid.
+        observe : callable, optional
+            Called with the latency of every answered attempt, and with the
+            timeout (and ``timed_out=True``) of every attempt that timed out,
+            refer to heritage.concurrency.AdaptiveTimeout.observer()
 
         Returns
         -------
         str
-            Result (HTML) obtained
+            Result (HTML) obtained. Returns ``None`` when every attempt fails
+            or when the cached result is not modified.
         """
-        return self._query_with_backoff(query_url, attempts, timeout)
+
+        attempts = attempts or self.request_attempts
+        timeout = timeout or self.request_timeout
+        query_string = build_query_string(options)
+        query_url = f"{url}?{query_string}"
+        return self._query_with_backoff(
+            query_url,
+            attempts,
+            timeout,
+            deadline=deadline,
+            validators=validators,
+            meta=meta,
+            observe=observe,
+        )
 
     def _query_with_backoff(
-        self, query_url: str, attempts: int, timeout: int
+        self,
+        query_url: str,
+        attempts: int,
+        timeout: int,
+        deadline: float = None,
+        validators: dict = None,
+        meta: dict = None,
+        observe=None,
     ):
         """
         Fetch a URL with exponential backoff and robust decoding.
 
+        Retries follow `self.retry_policy`: only retryable failures are
+        retried, ``Retry-After`` is honoured, and the whole call (attempts
+        and backoff) ends once the `deadline` in seconds is reached.
+
+        Requests wait for the shared limiter of the host, which adapts the
+        request concurrency to the observed status codes and latencies.
+        With several mirrors, every attempt is routed to the best mirror.
+
+        With `validators`, the request is conditional; refer to
+        HeritagePlatform.get_result_from_web() for `validators`, `meta` and
+        `observe`.
+
         Returns decoded response text on success, otherwise ``None``.
         """
-        attempts = max(1, attempts)
+        policy = self._retry_policy(attempts)
+        if deadline is None:
+            deadline = policy.deadline
+        clock = Deadline(deadline)
+        headers = conditional_headers(validators)
         last_error = None
-        response = None
+        status = None
 
-        for attempt in range(attempts):
-            try:
-                response = requests.get(query_url, timeout=timeout)
-            except requests.RequestException as exc:
-                last_error = exc
+        for attempt in range(policy.attempts):
+            if clock.expired():
+                self.logger.warning(
+                    "Deadline of %ss exceeded for %s.", deadline, query_url
+                )
+                break
+            shortened = clock.timeout(timeout) != timeout
+            response, error = self._request(
+                query_url, timeout, headers, clock
+            )
+            if observe is not None:
+                # A timeout cut short by the deadline tells nothing
+                shortened = shortened or clock.expired()
+                self._observe_attempt(
+                    observe, response, error, None if shortened else timeout
+                )
+            retry_after = None
+            if error is not None:
+                last_error = error
                 self.logger.warning(
                     "Attempt %s/%s failed for %s: %s",
                     attempt + 1,
-                    attempts,
+                    policy.attempts,
                     query_url,
-                    exc,
+                    error,
                 )
             else:
-                if response.status_code == requests.codes.ok:
+                status = response.status_code
+                if status == requests.codes.ok:
+                    if meta is not None:
+                        meta.update(response_validators(response.headers))
                     return self._response_text(response)
+                if status == requests.codes.not_modified and headers:
+                    if meta is not None:
+                        meta["not_modified"] = True
+                    return None
 
                 self.logger.warning(
                     "Status code %s on attempt %s/%s for %s",
-                    response.status_code,
+                    status,
                     attempt + 1,
-                    attempts,
+                    policy.attempts,
                     query_url,
                 )
+                retry_after = policy.retry_after(response.headers)
 
-            if attempt < attempts - 1:
-                backoff = (2 ** attempt) + random.random()
-                time.sleep(backoff)
+            delay = policy.next_delay(
+                attempt, None if error is not None else status, retry_after
+            )
+            if delay is None:
+                break
+            if not clock.allows(delay):
+                self.logger.warning(
+                    "Deadline of %ss exceeded for %s.", deadline, query_url
+                )
+                break
+            time.sleep(delay)
 
         if last_error is not None:
             self.logger.error(
                 "Unable to fetch %s after %s attempts due to network errors.",
                 query_url,
-                attempts,
+                attempt + 1,
                 exc_info=last_error,
             )
-        elif response is not None:
+        elif status is not None:
             self.logger.error(
                 "Unable to fetch %s after %s attempts. Last status: %s",
                 query_url,
-                attempts,
-                response.status_code,
+                attempt + 1,
+                status,
             )
         return None
 
     @staticmethod
-    def _response_text(response: requests.Response) -> str:
-        """Return response body decoded as UTF-8, avoiding mojibake."""
-        encoding = response.encoding
-        if not encoding or encoding.lower() in _LATIN_FALLBACK_ENCODINGS:
-            encoding = response.apparent_encoding or "utf-8"
+    def _observe_attempt(observe, response, error, timeout):
+        """
+        Report the latency of an attempt (refer to get_result_from_web())
 
+        Only the time spent on the request itself is reported, i.e., not the
+        wait for the host limiter. A timed out attempt is reported if its
+        `timeout` is given.
+        """
+        if response is not None:
+            if response.status_code in _FINAL_STATUS_CODES:
+                observe(response.elapsed.total_seconds())
+        elif isinstance(error, requests.ReadTimeout) and timeout is not None:
+            observe(timeout, timed_out=True)
+
+    def _retry_policy(self, attempts: int = None) -> RetryPolicy:
+        """Retry policy of the instance, with `attempts` overridden"""
+        policy = self.retry_policy
+        if attempts and attempts != policy.attempts:
+            policy = dataclasses.replace(policy, attempts=attempts)
+        return policy
+
+    def _request(
+        self,
+        query_url: str,
+        timeout: int,
+        headers: dict = None,
+        clock: Deadline = None,
+    ):
+        """
+        Send a single request, routed over the mirrors if there are several
+
+        If the selected mirror is slower than its hedging threshold, the
+        request is duplicated to a second mirror and the first successful
+        response is used.
+
+        Refer to HeritagePlatform._send() for `clock`.
+
+        Returns
+        -------
+        tuple
+            ``(response, error)``, exactly one of which is ``None``
+        """
+        pool = self.mirrors
+        reference = None if pool is None else pool.relative(query_url)
+        if reference is None:
+            return self._send(query_url, timeout, headers, clock)
+
+        primary = pool.select()
+        delay = pool.hedge_delay(primary)
+        if delay is None:
+            return self._send_to_mirror(
+                primary, reference, timeout, headers, clock
+            )
+
+        executor = self._background_executor("hedge")
+        futures = [
+            executor.submit(
+                self._send_to_mirror,
+                primary,
+                reference,
+                timeout,
+                headers,
+                clock,
+            )
+        ]
+        done, _ = concurrent.futures.wait(futures, timeout=delay)
+        if not done:
+            secondary = pool.select(exclude=[primary])
+            if secondary is not None:
+                pool.hedged += 1
+                self.logger.debug(
+                    "Hedging %s to %s after %.3fs.",
+                    reference,
+                    secondary,
+                    delay,
+                )
+                futures.append(
+                    executor.submit(
+                        self._send_to_mirror,
+                        secondary,
+                        reference,
+                        timeout,
+                        headers,
+                        clock,
+                    )
+                )
+
+        outcome = None
+        for future in concurrent.futures.as_completed(futures):
+            outcome = future.result()
+            response = outcome[0]
+            if response is not None:
+                if response.status_code in _FINAL_STATUS_CODES:
+                    break
+        return outcome
+
+    def _send_to_mirror(
+        self,
+        mirror: Mirror,
+        reference: str,
+        timeout: int,
+        headers: dict = None,
+        clock: Deadline = None,
+    ):
+        """
+        Send a request to `mirror` and record its outcome
+
+        `reference` is relative to the mirror, refer to MirrorPool.relative()
+        """
+        started = time.monotonic()
+        response, error = self._send(
+            mirror.resolve(reference), timeout, headers, clock
+        )
+        success = (
+            error is None
+            and response.status_code not in OVERLOAD_STATUS_CODES
+        )
+        self.mirrors.record(mirror, success, time.monotonic() - started)
+        return response, error
+
+    def _send(
+        self,
+        url: str,
+        timeout: int,
+        headers: dict = None,
+        clock: Deadline = None,
+    ):
+        """
+        Send a single request through the limiter of the host
+
+        With a `clock`, waiting for the limiter and the request itself end
+        with its deadline; a request that cannot be sent in time fails with
+        ``requests.Timeout``.
+        """
+        limiter = self.host_limiter(url)
+        response = None
+        error = None
+        if clock is not None:
+            if not limiter.acquire(clock.remaining()):
+                return None, requests.Timeout(
+                    f"Deadline exceeded waiting to send {url}"
+                )
+            timeout = clock.timeout(timeout)
+            if timeout is not None and timeout <= 0:
+                limiter.cancel()
+                return None, requests.Timeout(
+                    f"Deadline exceeded before sending {url}"
+                )
+        else:
+            limiter.acquire()
+        started = time.monotonic()
         try:
-            return response.content.decode(encoding or "utf-8")
-        except UnicodeDecodeError:
-            return response.content.decode("utf-8", errors="replace")
+            response = self.session.get(
+                url, timeout=timeout, headers=headers
+            )
+        except requests.RequestException as exc:
+            error = exc
+        finally:
+            limiter.release(
+                None if response is None else response.status_code,
+                time.monotonic() - started,
+                kind=self._encoding_key(url)[1],
+            )
+        return response, error
+
+    def _response_text(self, response: requests.Response) -> str:
+        """Return response body decoded as UTF-8, avoiding mojibake."""
+        return self._decode_text(
+            response.content, response.encoding, response.url
+        )
+
+    def _decode_text(
+        self, content: bytes, encoding: Optional[str], url: str = None
+    ) -> str:
+        """
+        Decode a response body
+
+        Missing or Latin-1 encodings (the HTTP default when no charset is
+        sent) are replaced by the first of the following that decodes the
+        content,
+
+        * the charset declared by a ``<meta>`` tag of the page,
+        * UTF-8,
+        * the encoding last detected for the mirror and action of `url`,
+        * the encoding detected statistically, which is slow on large pages
+          and is therefore remembered for the mirror and action.
+
+        A Latin-1 charset declared by a ``<meta>`` tag is only tried after
+        UTF-8 and the remembered encoding, since Latin-1 decodes any content.
+        """
+        if encoding and encoding.lower() not in _LATIN_FALLBACK_ENCODINGS:
+            text = decode_strict(content, encoding)
+            if text is None:
+                return content.decode("utf-8", errors="replace")
+            return text
+
+        key = None if url is None else self._encoding_key(url)
+        sniffed = sniff_charset(content)
+        latin = None
+        if sniffed and sniffed.lower() in _LATIN_FALLBACK_ENCODINGS:
+            sniffed, latin = None, sniffed
+        for candidate in (
+            sniffed,
+            "utf-8",
+            self._encodings.get(key),
+            latin,
+        ):
+            if candidate:
+                text = decode_strict(content, candidate)
+                if text is not None:
+                    return text
+
+        self.logger.debug("Detecting the encoding of %s", url)
+        detected = chardet.detect(content)["encoding"]
+        text = decode_strict(content, detected) if detected else None
+        if text is None:
+            return content.decode("utf-8", errors="replace")
+        if key is not None:
+            self._encodings[key] = detected
+        return text
+
+    @staticmethod
+    def _encoding_key(url: str) -> tuple:
+        """
+        Mirror and action of a URL
+
+        e.g. to remember its encoding, or to compare latencies of the same
+        action.
+        """
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path
+        if path.endswith(".html"):
+            # Pages of a dictionary share its encoding
+            path = path.rsplit("/", 1)[0]
+        return parts.netloc, path
 
     # ----------------------------------------------------------------------- #
 
     def get_result_from_shell(
-        self, path: str, options: dict, timeout: int = 30
+        self,
+        path: str,
+        options: dict,
+        timeout: int = None,
+        observe=None,
+        raise_unavailable: bool = False,
     ):
         """
         Get results from the Heritage Platform's local installation via shell
@@ -1216,24 +2167,55 @@ class HeritagePlatform:
             Valid options for the script
         timeout : int, optional
             Timeout in seconds, after which the function will abort.
-            The default is 30.
+            The default is `self.shell_timeout`.
+        observe : callable, optional
+            Called with the run time of the script, or with the timeout
+            (and ``timed_out=True``) if it timed out,
+            refer to heritage.concurrency.AdaptiveTimeout.observer()
+        raise_unavailable : bool, optional
+            Raise heritage.shell.ShellUnavailable instead of returning None
+            if the script cannot be run or crashes, i.e., when the web may
+            still answer the query. Timeouts and scripts killed for exceeding
+            their resource limits are not reported this way.
+            The default is False.
 
         Returns
         -------
         result : str
             Result (HTML) obtained
         """
+        timeout = timeout or self.shell_timeout
         query_string = build_query_string(options)
-        env = os.environ.copy()
-        env["QUERY_STRING"] = query_string
-        environment = frozendict(env)
-        return self.__run(path, environment, timeout=timeout)
+        environment = self._shell_query_environment(query_string)
+        return self._run(
+            path,
+            environment,
+            timeout=timeout,
+            observe=observe,
+            raise_unavailable=raise_unavailable,
+        )
 
-    @functools.lru_cache(maxsize=None)
-    def __run(self, path, environment: dict, timeout: int = 30):
+    def _shell_query_environment(self, query_string: str) -> dict:
+        """Environment of a script call with the given QUERY_STRING"""
+        environment = self.shell_environment.copy()
+        environment["QUERY_STRING"] = query_string
+        return environment
+
+    def _run(
+        self,
+        path,
+        environment: dict,
+        timeout: int = DEFAULT_SHELL_TIMEOUT,
+        observe=None,
+        raise_unavailable: bool = False,
+    ):
         """
         Get results from shell through a subprocess call
 
+        At most `self.shell.workers` scripts run at any time, each in its own
+        process group, which is killed as a whole on timeout.
+        The resource usage of the runs is aggregated in `self.shell.info()`.
+
         Parameters
         ----------
         path : str
@@ -1242,7 +2224,11 @@ class HeritagePlatform:
             Environment variables to set
         timeout : int, optional
             Timeout in seconds, after which the function will abort.
-            The default is 30.
+            The default is DEFAULT_SHELL_TIMEOUT.
+        observe : callable, optional
+            Refer to HeritagePlatform.get_result_from_shell()
+        raise_unavailable : bool, optional
+            Refer to HeritagePlatform.get_result_from_shell()
 
         Returns
         -------
@@ -1250,20 +2236,29 @@ class HeritagePlatform:
             Result (HTML) obtained
         """
         try:
-            result_header = "Content-Type: text/html\n\n"
-            result = subprocess.check_output(
-                path, env=environment, timeout=timeout
-            ).decode("utf-8")
-            result = result[len(result_header) :]
+            result, usage = self.shell.run_with_usage(
+                path, environment, timeout=timeout
+            )
         except subprocess.TimeoutExpired:
             self.logger.error("Timeout while executing '%s'.", path)
+            if observe is not None:
+                observe(timeout, timed_out=True)
             return None
-        except subprocess.SubprocessError as exc:
-            self.logger.error("Subprocess error while executing '%s': %s", path, exc)
+        except subprocess.CalledProcessError as exc:
+            self.logger.error(
+                "Subprocess error while executing '%s': %s", path, exc
+            )
+            if raise_unavailable and not self.shell.killed_by_limit(exc.usage):
+                raise ShellUnavailable(path) from exc
             return None
         except OSError as exc:
             self.logger.error("OS error while executing '%s': %s", path, exc)
+            if raise_unavailable:
+                raise ShellUnavailable(path) from exc
             return None
+        if observe is not None:
+            # Time spent running the script, without waiting for a worker
+            observe(usage.wall_time)
         return result
 
     # ----------------------------------------------------------------------- #
@@ -1273,8 +2268,19 @@ class HeritagePlatform:
         High-level function to obtain result for various actions
 
         Avoids the hassle of generating the URL or PATH.
-        Utilizes the HeritagePlatform.method attribute to determine
-        whether to fetch through shell or web.
+        Utilizes the method of the action (refer to
+        HeritagePlatform.get_method()) to determine whether to fetch through
+        shell or web. If the local script cannot be run or crashes, the
+        result is fetched through the web, unless `self.shell_fallback` is
+        disabled. Timeouts, and scripts killed for exceeding their resource
+        limits, are not retried through the web.
+
+        Results are cached in memory and, if configured, in a persistent
+        cache, keyed by the action and the ``QUERY_STRING`` within the
+        current cache scope (refer to HeritagePlatform.cache_scope()).
+        The options are canonicalized first, so that equivalent queries
+        share a ``QUERY_STRING`` (refer to
+        :class:`heritage.utils.QueryCanonicalizer`).
 
         Parameters
         ----------
@@ -1283,32 +2289,504 @@ class HeritagePlatform:
             Refer to HeritagePlatform.ACTIONS
         options : dict
             Valid options for the specified action
+        *args, **kwargs :
+            Arguments of HeritagePlatform.get_result_from_shell() or
+            HeritagePlatform.get_result_from_web(), e.g. ``timeout``,
+            which overrides the adaptive timeout of the action.
 
         Returns
         -------
         str
             Result (HTML) obtained
         """
-        if self.method == "shell":
-            path = self.get_path(action)
-            return self.get_result_from_shell(path, options, *args, **kwargs)
-        if self.method == "web":
-            url = self.get_url(action)
-            return self.get_result_from_web(url, options, *args, **kwargs)
-        self.logger.error(f"Invalid method: '{self.method}'.")
+        method = self.get_method(action)
+        if method not in self.METHODS:
+            self.logger.error(f"Invalid method: '{method}'.")
+            return None
+
+        options = QUERY_CANONICALIZER.options(options)
+        query_string = build_query_string(options)
+        if method == "shell":
+            fetch = functools.partial(
+                self.get_result_from_shell,
+                self.get_path(action),
+                options,
+                *args,
+                raise_unavailable=self.shell_fallback,
+                **self._timeout_kwargs("shell", action, args, kwargs),
+            )
+            try:
+                return self._fetch_cached(
+                    action,
+                    query_string,
+                    self._timed("shell", action, fetch),
+                    method="shell",
+                )
+            except ShellUnavailable:
+                self.logger.warning(
+                    "Local '%s' failed, falling back to the web.", action
+                )
+            # Call arguments are specific to the shell
+            args, kwargs = (), {}
+
+        fetch = functools.partial(
+            self.get_result_from_web,
+            self.get_url(action),
+            options,
+            *args,
+            **self._timeout_kwargs("web", action, args, kwargs),
+        )
+        return self._fetch_cached(
+            action,
+            query_string,
+            self._timed("web", action, fetch),
+            method="web",
+        )
+
+    def _timeout_kwargs(
+        self, method: str, action: str, args: tuple, kwargs: dict
+    ) -> dict:
+        """Call keywords with the adaptive timeout of the action, if any"""
+        if self.adaptive_timeout is None or args or "timeout" in kwargs:
+            return kwargs
+        default = (
+            self.shell_timeout if method == "shell" else self.request_timeout
+        )
+        timeout = self.adaptive_timeout.timeout((method, action), default)
+        return dict(kwargs, timeout=timeout)
+
+    def _timed(self, method: str, action: str, fetch):
+        """
+        Wrap `fetch()` to record the latencies and timeouts of its attempts
+
+        `fetch` is passed the ``observe`` keyword of
+        HeritagePlatform.get_result_from_web() (and ..._from_shell())
+        """
+        if self.adaptive_timeout is None:
+            return fetch
+        return functools.partial(
+            fetch, observe=self.adaptive_timeout.observer((method, action))
+        )
+
+    def _fetch_cached(
+        self, action: str, query_string: str, fetch, method: str = None
+    ):
+        """
+        Obtain a result through the caches, calling `fetch()` on a miss
+
+        Results are scoped by the `method` used by `fetch()`, which defaults
+        to the method of the action.
+
+        The in-memory cache is consulted first, followed by the persistent
+        cache. Successful results are stored in both.
+        Failures are remembered for `self.failure_ttl` seconds, during which
+        the query is answered with ``None`` without calling the backend.
+
+        Concurrent misses for the same query are coalesced, i.e., only the
+        first caller calls `fetch()` and the others wait for its result.
+
+        For the web, `fetch()` is passed the ``validators`` of an expired
+        entry (if `self.revalidate`) and a ``meta`` dictionary to fill,
+        refer to HeritagePlatform.get_result_from_web(). An unmodified entry
+        is kept, and so is an entry whose refresh failed. Entries expired for
+        at most `self.stale_while_revalidate` seconds are returned at once
+        and refreshed in the background.
+        """
+        method = method or self.get_method(action)
+        scope = self.cache_scope(method)
+        found, result = self._cache_lookup(scope, action, query_string)
+        if found:
+            return result
+
+        stale = None
+        if method == "web":
+            stale = self._stale_lookup(scope, action, query_string)
+
+        def fetch_and_store():
+            if method != "web":
+                result = fetch()
+                self._cache_store(scope, action, query_string, result)
+                return result
+
+            meta = {}
+            result = fetch(validators=self._validators_of(stale), meta=meta)
+            return self._store_web_result(
+                scope, action, query_string, result, meta, stale
+            )
+
+        key = (scope, action, query_string)
+        if self._serve_stale(stale):
+            self._refresh_in_background(key, fetch_and_store)
+            return stale.value
+        return self.in_flight.do(key, fetch_and_store)
+
+    def _stale_window(self, cache) -> float:
+        """
+        Seconds for which the expired entries of a cache may be used
+
+        i.e., `self.stale_while_revalidate` seconds, and with
+        `self.revalidate`, the time-to-live of the cache.
+        """
+        ttl = getattr(cache, "ttl", None)
+        if ttl is None:
+            return 0
+        window = self.stale_while_revalidate or 0
+        if self.revalidate:
+            window = max(window, ttl)
+        return window
+
+    def _keep_expired_entries(self, cache):
+        """
+        Keep the expired entries of a persistent cache as long as needed
+
+        Only a cache opened by this instance is changed. Other caches are
+        shared, and are only checked.
+        """
+        if cache is None:
+            return
+        window = self._stale_window(cache)
+        if getattr(cache, "stale_ttl", 0) >= window:
+            return
+        if self._owns_persistent_cache:
+            self.logger.debug(
+                "Keeping expired entries of %s for %ss.", cache, window
+            )
+            cache.stale_ttl = window
+        else:
+            self.logger.warning(
+                "%s removes expired entries after %ss, before they can be "
+                "revalidated (%ss). Raise its `stale_ttl` to keep them.",
+                cache,
+                getattr(cache, "stale_ttl", 0),
+                window,
+            )
+
+    def _stale_lookup(self, scope: str, action: str, query_string: str):
+        """
+        Look up an expired entry of a query
+
+        Returns
+        -------
+        CacheEntry
+            Entry of the in-memory or the persistent cache (preferring the
+            one with validators), or ``None``.
+        """
+        found = None
+        for cache in (self.cache, self.persistent_cache):
+            if cache is None:
+                continue
+            entry = cache.lookup(
+                scope,
+                action,
+                query_string,
+                stale_ttl=self._stale_window(cache),
+            )
+            if entry is not None and (found is None or not found.meta):
+                found = entry
+        return found
+
+    def _validators_of(self, stale):
+        """Validators for revalidating an expired entry, if any"""
+        if stale is None or not self.revalidate:
+            return None
+        return stale.meta
+
+    def _serve_stale(self, stale) -> bool:
+        """Whether an expired entry is served while being refreshed"""
+        return (
+            stale is not None
+            and self.stale_while_revalidate is not None
+            and stale.expired_for <= self.stale_while_revalidate
+        )
+
+    def _store_web_result(
+        self,
+        scope: str,
+        action: str,
+        query_string: str,
+        result: str,
+        meta: dict,
+        stale=None,
+    ):
+        """
+        Store the result of a web fetch, given the expired entry it replaces
+
+        Returns
+        -------
+        str
+            The new result, or the expired result when it was not modified
+            or could not be refreshed.
+        """
+        if stale is None or result is not None:
+            self._cache_store(scope, action, query_string, result, meta)
+            return result
+
+        if meta.get("not_modified"):
+            self.logger.debug("Not modified: %s?%s", action, query_string)
+            self._cache_store(
+                scope, action, query_string, stale.value, stale.meta
+            )
+        else:
+            self.logger.warning(
+                "Keeping the expired result of %s?%s", action, query_string
+            )
+        return stale.value
+
+    def _refresh_in_background(self, key: tuple, refresh):
+        """Call `refresh()` in a background thread, unless already running"""
+        with self._session_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.in_flight.do(key, refresh)
+            except Exception:
+                self.logger.exception("Background refresh failed: %s", key)
+            finally:
+                with self._session_lock:
+                    self._refreshing.discard(key)
+
+        self._background_executor("refresh").submit(run)
+
+    def _cache_lookup(self, scope: str, action: str, query_string: str):
+        """
+        Look up a query in the caches
+
+        Returns
+        -------
+        tuple
+            ``(found, result)``, where `result` is ``None`` for a query that
+            failed recently.
+        """
+        if self.failure_ttl and self.failure_cache is not None:
+            if self.failure_cache.get(scope, action, query_string) is FAILED:
+                self.logger.debug(
+                    "Skipping recently failed query: %s?%s",
+                    action,
+                    query_string,
+                )
+                return True, None
+
+        if self.cache is not None:
+            result = self.cache.get(scope, action, query_string)
+            if result is not None:
+                return True, result
+
+        if self.persistent_cache is not None:
+            result = self.persistent_cache.get(scope, action, query_string)
+            if result is not None:
+                if self.cache is not None:
+                    self.cache.set(scope, action, query_string, result)
+                return True, result
+
+        return False, None
+
+    def _cache_store(
+        self,
+        scope: str,
+        action: str,
+        query_string: str,
+        result: str,
+        meta: dict = None,
+    ):
+        """
+        Store a result (or a failure marker if `result` is None)
+
+        `meta` (e.g. the validators of a web response) is stored with it.
+        """
+        if result is None:
+            if self.failure_ttl and self.failure_cache is not None:
+                self.failure_cache.set(
+                    scope, action, query_string, FAILED, ttl=self.failure_ttl
+                )
+            return
+
+        meta = meta or None
+        if self.cache is not None:
+            # Expired results are kept as long as this instance may use them
+            self.cache.set(
+                scope,
+                action,
+                query_string,
+                result,
+                meta=meta,
+                stale_ttl=max(
+                    self._stale_window(self.cache), self.cache.stale_ttl
+                ),
+            )
+        if self.persistent_cache is not None:
+            self.persistent_cache.set(
+                scope, action, query_string, result, meta=meta
+            )
+
+    def cache_info(self):
+        """Statistics of the in-memory cache (None if caching is disabled)"""
+        if self.cache is None:
+            return None
+        return self.cache.cache_info()
+
+    def extraction_info(self) -> dict:
+        """
+        Number of extractions, their total time and peak memory
+
+        The peak memory is only known with the ``trace_memory`` option.
+        The usage of a single extraction is returned by
+        HeritageOutput.extract() with ``with_usage=True``, while
+        ``extractions.last`` holds the latest extraction of any thread.
+        """
+        return self.extractions.info()
+
+    def cache_clear(self):
+        """Remove the cached results and failures of the methods in use"""
+        methods = {self.method, *self.routes.values()}
+        if self.method == "shell" and self.shell_fallback:
+            methods.add("web")
+        for method in methods:
+            scope = self.cache_scope(method)
+            if self.cache is not None:
+                self.cache.cache_clear(scope)
+            if self.failure_cache is not None:
+                self.failure_cache.cache_clear(scope)
+            if self.persistent_cache is not None:
+                self.persistent_cache.clear(scope)
+
+    def export_cache(self, path: str) -> int:
+        """
+        Write the cached responses to a snapshot file
+
+        Responses of the in-memory and of the persistent cache are written,
+        for every scope. Parsed dictionary entries are not written, since
+        they are derived from the cached pages.
+        Refer to heritage.cache.write_snapshot()
+
+        Returns
+        -------
+        int
+            Number of written responses
+        """
+        entries = {}
+        if self.persistent_cache is not None:
+            for entry in self.persistent_cache.items():
+                entries[entry[:3]] = entry
+        if self.cache is not None:
+            for entry in self.cache.items():
+                entries.setdefault(entry[:3], entry)
+        return write_snapshot(path, entries.values())
+
+    def import_cache(self, path: str) -> int:
+        """
+        Load the responses of a snapshot file into the caches
+
+        Returns
+        -------
+        int
+            Number of loaded responses
+        """
+        count = 0
+        for scope, action, query, value, created in read_snapshot(path):
+            if self.cache is not None:
+                self.cache.set(scope, action, query, value)
+            if self.persistent_cache is not None:
+                self.persistent_cache.set(
+                    scope, action, query, value, created=created
+                )
+            count += 1
+        return count
+
+    def warm_cache(self, calls: Iterable[tuple], workers: int = None):
+        """
+        Populate the caches by calling action methods
+
+        Parameters
+        ----------
+        calls : Iterable[tuple]
+            ``(method, *args)`` tuples, e.g. ``("sandhi", "rAma", "iti")``
+        workers : int, optional
+            Number of worker threads. Refer to HeritagePlatform.batch()
+
+        Returns
+        -------
+        dict
+            Number of successful and failed calls of every method, as
+            ``{method: (succeeded, failed)}``
+        """
+        inputs = {}
+        for method, *args in calls:
+            inputs.setdefault(method, []).append(
+                args[0] if len(args) == 1 else tuple(args)
+            )
+
+        report = {}
+        for method, method_inputs in inputs.items():
+            results = self.batch(method, method_inputs, workers=workers)
+            succeeded = sum(
+                1 for item in results if item.ok and item.result is not None
+            )
+            report[method] = (succeeded, len(results) - succeeded)
+        return report
+
+    def cache_scope(self, method: str = None) -> str:
+        """
+        Scope of the cached results for a method (default: current method)
+
+        Web results are scoped by the mirror URL, while shell results are
+        scoped by the installation path along with the modification times of
+        its scripts, so that rebuilding the platform invalidates old results.
+        """
+        if (method or self.method) == "web":
+            if self.mirrors is not None:
+                return "web:" + "|".join(self.mirrors.urls)
+            return f"web:{self.base_url}"
+        if self._installation_signature is None:
+            mtimes = []
+            for action in sorted(self.ACTIONS):
+                try:
+                    mtime = os.stat(self.get_path(action)).st_mtime_ns
+                except OSError:
+                    mtime = None
+                mtimes.append(f"{action}={mtime}")
+            self._installation_signature = hashlib.sha1(
+                ";".join(mtimes).encode("utf-8")
+            ).hexdigest()[:16]
+        base_dir = os.path.abspath(self.base_dir)
+        return f"shell:{base_dir}:{self._installation_signature}"
 
     ###########################################################################
 
-    def get_method(self):
-        """Get the current method"""
-        return self.method
+    def get_method(self, action: str = None):
+        """Get the current method, or the method routed for an action"""
+        return self.routes.get(action, self.method)
 
-    def set_method(self, method: str):
+    def set_method(self, method: str, action: str = None):
         """
         Set method for fetching the output
 
         Valid methods are listed in HeritagePlatform.METHODS
+
+        If an action is specified, only that action is routed to the method.
+        Use None as the method to remove the route of an action.
         """
+        if action is not None:
+            if action not in self.ACTIONS:
+                self.logger.warning(f"Invalid action: '{action}'")
+                return False
+            if method is None:
+                self.routes.pop(action, None)
+                return True
+            method = method.lower()
+            if method not in self.METHODS:
+                self.logger.warning(f"Invalid method: '{method}'")
+                return False
+            if method == "shell" and not self._shell_available(action):
+                self.logger.warning(
+                    f"Local installation does not support '{action}'"
+                )
+                return False
+            self.routes[action] = method
+            return True
+
         if method.lower() in self.METHODS:
             self.method = method.lower()
             return True
@@ -1317,6 +2795,79 @@ class HeritagePlatform:
             self.method = self.DEFAULT_METHOD
         return False
 
+    def _shell_available(self, action: str) -> bool:
+        """Whether the local installation supports an action"""
+        if self.ACTIONS[action]["shell"].endswith("/"):
+            return bool(self.scripts_dir) and os.path.isdir(
+                self.get_path(action)
+            )
+        return action in self.scripts
+
+    def probe_backends(self, actions: Iterable[str] = None) -> dict:
+        """
+        Route every action to the faster method
+
+        Both methods are timed on an uncached canary query of every action
+        (refer to HeritagePlatform._canary_options()), and the action is
+        routed to the faster one. A method that fails is never chosen.
+        Actions without a local script are left to the web.
+
+        Parameters
+        ----------
+        actions : Iterable[str], optional
+            Actions to probe.
+            The default is every action with a canary query.
+
+        Returns
+        -------
+        dict
+            Timings (``None`` for a failure) and the chosen method of every
+            probed action, e.g. ``{"sandhi": {"shell": 0.02, "web": 0.31,
+            "method": "shell"}}``
+        """
+        canaries = self._canary_options()
+        if actions is None:
+            actions = list(canaries)
+
+        report = {}
+        for action in actions:
+            options = canaries[action]
+            timings = {}
+            if self._shell_available(action):
+                started = time.monotonic()
+                result = self.get_result_from_shell(
+                    self.get_path(action), options
+                )
+                if result is not None:
+                    timings["shell"] = time.monotonic() - started
+            started = time.monotonic()
+            result = self.get_result_from_web(self.get_url(action), options)
+            if result is not None:
+                timings["web"] = time.monotonic() - started
+            report[action] = self._route_fastest(action, timings)
+        return report
+
+    def _route_fastest(self, action: str, timings: dict) -> dict:
+        """Route an action to the fastest method and report the timings"""
+        report = {
+            "shell": timings.get("shell"),
+            "web": timings.get("web"),
+            "method": None,
+        }
+        if not timings:
+            self.logger.warning("No method could answer '%s'.", action)
+            return report
+        method = min(timings, key=timings.get)
+        self.routes[action] = method
+        report["method"] = method
+        self.logger.info(
+            "Routing '%s' to %s (%s)",
+            action,
+            method,
+            ", ".join(f"{k}: {v:.3f}s" for k, v in timings.items()),
+        )
+        return report
+
     # ----------------------------------------------------------------------- #
 
     def get_option(self, opt_name: str):
@@ -1385,16 +2936,152 @@ class HeritagePlatform:
 
     def get_path(self, action: str):
         """Path Builder"""
+        if action in self.scripts:
+            return self.scripts[action]
         return os.path.join(self.scripts_dir, self.ACTIONS[action]["shell"])
 
     ###########################################################################
 
     def valid_installation(self):
-        """Check if the Heritage Platform installation exists"""
-        # TODO: A better check may be checking for the required executables
-        # * If the file exists
-        # * If the file is executable
-        return os.path.isdir(self.scripts_dir)
+        """
+        Check if the Heritage Platform installation exists
+
+        The installation is valid if every script exists and is executable.
+        Paths of the scripts are resolved once, and stored in `self.scripts`.
+        """
+        if not os.path.isdir(self.scripts_dir):
+            return False
+
+        self.scripts = {}
+        missing = []
+        for action, names in self.ACTIONS.items():
+            if names["shell"].endswith("/"):
+                continue
+            path = os.path.abspath(self.get_path(action))
+            if is_executable(path):
+                self.scripts[action] = path
+            else:
+                missing.append(names["shell"])
+        if missing:
+            self.logger.warning(
+                "Missing or non-executable scripts in '%s': %s",
+                self.scripts_dir,
+                ", ".join(missing),
+            )
+        return not missing
+
+    ###########################################################################
+    # HTTP Session
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Keep-alive HTTP session used for all web requests
+
+        The session is created on first use. Its connection pool holds up to
+        `self.pool_size` connections per host, and can be shared by
+        concurrent threads.
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_size,
+                        pool_maxsize=self.pool_size,
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def host_limiter(self, url: str) -> HostLimiter:
+        """
+        Process-wide rate and concurrency limiter for the host of a URL
+
+        Every web request to a host, from any HeritagePlatform instance,
+        goes through the same limiter.
+        """
+        host = urllib.parse.urlsplit(url).netloc
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = host_limiter(
+                host,
+                rate=self.rate_limit,
+                max_concurrency=self.max_host_concurrency,
+            )
+        return limiter
+
+    def _background_executor(self, purpose: str) -> ThreadPoolExecutor:
+        """
+        Threads used for hedged requests or background refreshes
+
+        Every purpose ('hedge' or 'refresh', and 'blocking' for the blocking
+        calls of AsyncHeritagePlatform) has its own threads, so that a
+        refresh hedging its request never waits for work queued behind it.
+        """
+        executor = self._executors.get(purpose)
+        if executor is None:
+            with self._session_lock:
+                executor = self._executors.get(purpose)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=2 * self.pool_size,
+                        thread_name_prefix=f"heritage-{purpose}",
+                    )
+                    self._executors[purpose] = executor
+        return executor
+
+    def connection_stats(self) -> dict:
+        """
+        Connection reuse statistics of the HTTP session
+
+        Returns
+        -------
+        dict
+            Number of ``requests`` made, new ``connections`` opened and the
+            ``reuse_rate``, i.e. the fraction of requests served over an
+            already established (keep-alive) connection.
+        """
+        total_requests = 0
+        total_connections = 0
+        if self._session is not None:
+            adapters = {id(a): a for a in self._session.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    try:
+                        pool = pools[key]
+                    except KeyError:
+                        continue
+                    total_requests += pool.num_requests
+                    total_connections += pool.num_connections
+        reuse_rate = (
+            1 - total_connections / total_requests if total_requests else 0.0
+        )
+        return {
+            "requests": total_requests,
+            "connections": total_connections,
+            "reuse_rate": max(0.0, reuse_rate),
+        }
+
+    def close(self):
+        """Release the HTTP connections and the owned persistent cache"""
+        with self._session_lock:
+            session, self._session = self._session, None
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=False)
+        if session is not None:
+            session.close()
+        if self._owns_persistent_cache and self.persistent_cache is not None:
+            self.persistent_cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     ###########################################################################
 
@@ -1414,9 +3101,11 @@ class HeritagePlatform:
     def prepare_input(input_text: str):
         """
         Prepare Input
+            * Canonicalize (NFC, no zero-width characters)
             * Convert Devanagari to Velthuis
             * Join words by '+' instead of by whitespaces
         """
+        input_text = QUERY_CANONICALIZER.text(input_text)
         return "+".join(devanagari_to_velthuis(input_text).split())
 
     @staticmethod
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory Usage
+
+Measure the memory allocated while extracting results from a page.
+
+Peak memory is measured with :mod:`tracemalloc`, which slows down every
+allocation of the process while it is tracing. Tracing is therefore only
+started while a measurement is running, and stopped once the last concurrent
+measurement ends.
+"""
+
+###############################################################################
+
+import time
+import logging
+import threading
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+###############################################################################
+
+
+@dataclass
+class ExtractionRun:
+    """
+    Resource usage of a single extraction
+
+    Attributes
+    ----------
+    extractor : str
+        Name of the extractor, e.g. 'analysis'
+    size : int
+        Length of the page in characters
+    wall_time : float
+        Elapsed time in seconds, including parsing the page
+    peak_memory : int, optional
+        Peak memory allocated by Python during the extraction in bytes,
+        if traced
+    """
+
+    extractor: str
+    size: int
+    wall_time: float
+    peak_memory: Optional[int] = None
+
+
+class PeakMemory:
+    """
+    Peak memory allocated by Python within a block
+
+    Usage::
+
+        with PeakMemory() as usage:
+            ...
+        usage.peak  # bytes
+
+    The peak is relative to the memory allocated when the block started.
+    If tracing was started by someone else, the peak cannot be reset before
+    Python 3.9 and may include allocations from before the block.
+    Since :mod:`tracemalloc` traces the whole process, the peak of blocks
+    running concurrently (in other threads) includes their allocations,
+    i.e., it is an upper bound of the memory used by a single block.
+    """
+
+    _lock = threading.Lock()
+    _active = 0
+    _started = False
+
+    def __init__(self):
+        self.start = 0
+        self.peak = None
+
+    def __enter__(self):
+        cls = PeakMemory
+        with cls._lock:
+            if cls._active == 0:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    cls._started = True
+                elif hasattr(tracemalloc, "reset_peak"):
+                    # Peaks before the block are not relevant (Python 3.9+)
+                    tracemalloc.reset_peak()
+            cls._active += 1
+            self.start = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        cls = PeakMemory
+        with cls._lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peak = max(0, peak - self.start)
+            cls._active -= 1
+            if cls._active == 0 and cls._started:
+                tracemalloc.stop()
+                cls._started = False
+        return False
+
+
+def measure(
+    extractor: str, size: int, func, trace: bool = False
+) -> Tuple[object, ExtractionRun]:
+    """
+    Call `func()` and measure its usage
+
+    Parameters
+    ----------
+    extractor : str
+        Name of the extractor
+    size : int
+        Length of the page
+    func : callable
+        Extraction to run
+    trace : bool, optional
+        Measure the peak memory of the call.
+        The default is False.
+
+    Returns
+    -------
+    tuple
+        ``(result, usage)``, i.e., the value returned by `func()` and its
+        :class:`ExtractionRun`
+    """
+    started = time.monotonic()
+    if trace:
+        with PeakMemory() as memory:
+            result = func()
+    else:
+        memory = None
+        result = func()
+    usage = ExtractionRun(
+        extractor=extractor,
+        size=size,
+        wall_time=time.monotonic() - started,
+        peak_memory=None if memory is None else memory.peak,
+    )
+    return result, usage
+
+
+class ExtractionStats:
+    """
+    Usage of the extractions of a platform
+
+    `last` holds the usage of the latest extraction of any thread, for
+    convenience. The usage of a specific extraction is returned by
+    measure() (refer to HeritageOutput.extract()).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.total_time = 0.0
+        self.max_memory = None
+        self.last = None
+
+    def record(self, usage: ExtractionRun):
+        with self._lock:
+            self.runs += 1
+            self.total_time += usage.wall_time
+            if usage.peak_memory is not None:
+                self.max_memory = max(self.max_memory or 0, usage.peak_memory)
+            self.last = usage
+        LOGGER.debug(
+            "Extracted %s from %d characters in %.3fs (peak memory: %s bytes)",
+            usage.extractor,
+            usage.size,
+            usage.wall_time,
+            usage.peak_memory,
+        )
+
+    def info(self) -> dict:
+        """Number of extractions, total time and peak memory"""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "total_time": self.total_time,
+                "max_memory": self.max_memory,
+            }
+
+
+###############################################################################
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mirror Pool
+
+Spread web requests over several mirrors of The Sanskrit Heritage Platform.
+
+* Requests are routed to the healthy mirror with the lowest recent latency,
+  weighted by the number of requests already in flight to it.
+* A mirror that fails `failure_threshold` times in a row is ejected (circuit
+  open) for `reset_timeout` seconds, after which it is tried again.
+* Optionally, a request that takes longer than the `hedge_percentile`
+  latency of its mirror is duplicated (hedged) to a second mirror.
+"""
+
+###############################################################################
+
+import time
+import posixpath
+import threading
+import urllib.parse
+from typing import Iterable, Optional
+
+from .concurrency import LatencyWindow
+
+###############################################################################
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 30.0
+HEDGE_MIN_SAMPLES = 10
+
+###############################################################################
+
+
+class Mirror:
+    """Health and latency statistics of a single mirror"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latencies = LatencyWindow()
+        self.ewma = None
+        self.in_flight = 0
+        self.failures = 0
+        self.opened_at = None
+        self.requests = 0
+        self.errors = 0
+
+    def resolve(self, reference: str) -> str:
+        """URL of a reference relative to the mirror, refer to MirrorPool"""
+        return urllib.parse.urljoin(self.url, reference)
+
+    def available(self, now: float, reset_timeout: float) -> bool:
+        """Whether the circuit is closed or may be tried again (half-open)"""
+        return self.opened_at is None or now - self.opened_at >= reset_timeout
+
+    def score(self) -> float:
+        """Lower is better; mirrors without samples are tried first"""
+        if self.ewma is None:
+            return 0.0
+        return self.ewma * (1 + self.in_flight)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(url="{self.url}")'
+
+
+class MirrorPool:
+    """Pool of web mirrors with latency-aware routing and circuit breakers"""
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        hedge_percentile: float = None,
+        alpha: float = 0.3,
+    ):
+        """
+        Initialize Mirror Pool
+
+        Parameters
+        ----------
+        urls : Iterable[str]
+            Base URLs of the mirrors.
+            The first URL is treated as the primary mirror.
+        failure_threshold : int, optional
+            Consecutive failures after which a mirror is ejected.
+            The default is DEFAULT_FAILURE_THRESHOLD.
+        reset_timeout : float, optional
+            Seconds after which an ejected mirror is tried again.
+            The default is DEFAULT_RESET_TIMEOUT.
+        hedge_percentile : float, optional
+            Latency percentile (e.g. 95) of the selected mirror after which
+            a hedged request is sent to a second mirror.
+            If None, requests are not hedged.
+            The default is None.
+        alpha : float, optional
+            Smoothing factor of the exponentially weighted mean latency.
+            The default is 0.3.
+        """
+        self.mirrors = [Mirror(url) for url in dict.fromkeys(urls)]
+        if not self.mirrors:
+            raise ValueError("At least one mirror URL is required.")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.hedge_percentile = hedge_percentile
+        self.alpha = alpha
+        self.hedged = 0
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        return [mirror.url for mirror in self.mirrors]
+
+    # ----------------------------------------------------------------------- #
+
+    def relative(self, url: str) -> Optional[str]:
+        """
+        Reference of a URL relative to the mirror it was built from
+
+        The mirror is the first one with the same origin (scheme and host)
+        as `url`, so that URLs outside the base URL of a mirror, e.g. the
+        dictionary pages at ``../../MW/``, are routed as well.
+        Mirror.resolve() builds the same URL on any other mirror.
+
+        Returns
+        -------
+        str
+            Relative reference, e.g. 'sktsandhier.cgi?l=a' or
+            '../../MW/1.html', or ``None`` if `url` is not on any mirror.
+        """
+        parts = urllib.parse.urlsplit(url)
+        for mirror in self.mirrors:
+            base = urllib.parse.urlsplit(mirror.url)
+            if (parts.scheme, parts.netloc) != (base.scheme, base.netloc):
+                continue
+            base_dir = base.path[: base.path.rfind("/") + 1] or "/"
+            path = posixpath.relpath(parts.path or "/", base_dir)
+            if parts.path.endswith("/"):
+                path = f"{path}/"
+            elif path == ".":
+                # The base directory itself, without its trailing slash
+                path = posixpath.join("..", posixpath.basename(parts.path))
+            return urllib.parse.urlunsplit(
+                ("", "", path, parts.query, parts.fragment)
+            )
+        return None
+
+    def select(self, exclude: Iterable[Mirror] = ()) -> Mirror:
+        """
+        Select the mirror for the next request and mark it as in use
+
+        Returns
+        -------
+        Mirror
+            Best available mirror, the mirror ejected for the longest time if
+            none is available, or ``None`` if every mirror is excluded.
+        """
+        exclude = set(id(mirror) for mirror in exclude)
+        now = time.monotonic()
+        with self._lock:
+            candidates = [m for m in self.mirrors if id(m) not in exclude]
+            if not candidates:
+                return None
+            available = [
+                m for m in candidates if m.available(now, self.reset_timeout)
+            ]
+            if available:
+                mirror = min(available, key=Mirror.score)
+            else:
+                mirror = min(candidates, key=lambda m: m.opened_at)
+            mirror.in_flight += 1
+            mirror.requests += 1
+            return mirror
+
+    def record(self, mirror: Mirror, success: bool, latency: float = None):
+        """Record the outcome of a request sent to `mirror`"""
+        with self._lock:
+            mirror.in_flight -= 1
+            if success:
+                mirror.failures = 0
+                mirror.opened_at = None
+                if latency is not None:
+                    mirror.latencies.add(latency)
+                    mirror.ewma = (
+                        latency
+                        if mirror.ewma is None
+                        else self.alpha * latency
+                        + (1 - self.alpha) * mirror.ewma
+                    )
+                return
+
+            mirror.errors += 1
+            mirror.failures += 1
+            if mirror.failures >= self.failure_threshold:
+                mirror.opened_at = time.monotonic()
+
+    def hedge_delay(self, mirror: Mirror):
+        """
+        Seconds to wait for `mirror` before sending a hedged request
+
+        Returns ``None`` if hedging is disabled, there is no other mirror, or
+        not enough latencies of `mirror` have been observed yet.
+        """
+        if self.hedge_percentile is None or len(self.mirrors) < 2:
+            return None
+        if len(mirror.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return mirror.latencies.percentile(self.hedge_percentile)
+
+    def info(self) -> list:
+        """Statistics of every mirror"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": mirror.url,
+                    "available": mirror.available(now, self.reset_timeout),
+                    "latency": mirror.ewma,
+                    "in_flight": mirror.in_flight,
+                    "requests": mirror.requests,
+                    "errors": mirror.errors,
+                }
+                for mirror in self.mirrors
+            ]
+
+    def __len__(self):
+        return len(self.mirrors)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.urls})"
+
+
+###############################################################################
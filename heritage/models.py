@@ -8,7 +8,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 
 class Method(str, Enum):
@@ -129,3 +129,19 @@ class SearchResult:
     link: Optional[str]
     summary: str
 
+
+###############################################################################
+# Batch execution
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a single input submitted through a batch method."""
+
+    input: Any
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reader Companion Fast Path
+
+Extract the solutions of a Reader Companion page straight from its HTML,
+without building a document tree.
+
+The pages are machine-generated and regular: solutions are separated by
+``<hr>`` tags, every solution starts with a ``Solution N`` span, and every
+word is followed by a table of ``[root]{analysis | ..}`` rows coloured by
+``*_back`` classes. The page is tokenized using compiled regular expressions
+and :class:`UnexpectedStructure` is raised on anything else (comments,
+scripts, unbalanced tags), in which case the page is to be parsed by
+BeautifulSoup instead (refer to HeritageOutput.extract_analysis()).
+"""
+
+###############################################################################
+
+import re
+from collections import namedtuple
+from html import unescape
+from typing import List
+
+###############################################################################
+
+HR_REGEX = re.compile(r"<hr\b[^>]*>", re.IGNORECASE)
+TOKEN_REGEX = re.compile(
+    r"<(/?)([a-zA-Z][a-zA-Z0-9]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>"
+    r"|([^<]+)"
+    r"|(<)"
+)
+ATTRIBUTE_REGEX = re.compile(
+    r"([^\s=/>]+)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+)))?"
+)
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+RAW_TEXT_ELEMENTS = {"script", "style", "textarea", "title"}
+RAW_TEXT_REGEX = re.compile(
+    r"<(script|style|textarea|title)\b[^>]*>(.*?)(?:</\1\s*>|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+###############################################################################
+
+# Solution block of a Reader Companion page
+#   title: text of the first span (e.g. 'Solution 1 : ')
+#   link: link (to the parser) in the first span
+#   items: words (str) and analysis tables (AnalysisTable) in document order
+SolutionBlock = namedtuple("SolutionBlock", ["title", "link", "items"])
+
+# Analysis table of a word
+#   classes: CSS classes of the table (e.g. ['deep_sky_back'])
+#   rows: (text, link) of every row, link being None for rows without one
+AnalysisTable = namedtuple("AnalysisTable", ["classes", "rows"])
+
+###############################################################################
+
+
+class UnexpectedStructure(ValueError):
+    """The page does not have the structure expected by the fast path"""
+
+
+class _Element:
+    """Open element while tokenizing"""
+
+    __slots__ = ["name", "text_start", "link", "table", "last"]
+
+    def __init__(self, name: str, text_start: int):
+        self.name = name
+        self.text_start = text_start
+        self.link = None
+        self.table = None
+        # Last child node, as ('tag' | 'text', text)
+        self.last = None
+
+
+def _attributes(raw: str) -> dict:
+    return {
+        match.group(1).lower(): unescape(
+            next((v for v in match.group(2, 3, 4) if v is not None), "")
+        )
+        for match in ATTRIBUTE_REGEX.finditer(raw)
+    }
+
+
+def _scan_block(block: str):
+    """
+    Tokenize a solution block
+
+    Returns
+    -------
+    SolutionBlock
+        Block, or ``None`` if it does not hold a solution.
+    """
+    texts = []
+    root = _Element(None, 0)
+    # The <hr> delimiting the block precedes it
+    root.last = ("tag", "")
+    stack = [root]
+    tables = []
+    rows = []
+    first_span = None
+    title = link = None
+
+    for match in TOKEN_REGEX.finditer(block):
+        closing, name, raw, text, stray = match.groups()
+        parent = stack[-1]
+        if text is not None:
+            text = unescape(text)
+            texts.append(text)
+            parent.last = ("text", text)
+            continue
+        if stray is not None:
+            raise UnexpectedStructure("Markup that is not a tag")
+
+        name = name.lower()
+        if closing:
+            if parent is root or parent.name != name:
+                raise UnexpectedStructure(f"Unbalanced </{name}>")
+            stack.pop()
+            content = "".join(texts[parent.text_start:])
+            stack[-1].last = ("tag", content)
+            if parent is first_span:
+                title = content
+                link = parent.link
+            elif name == "tr":
+                rows.append((parent.table, content, parent.link))
+            continue
+
+        if name in RAW_TEXT_ELEMENTS:
+            raise UnexpectedStructure(f"Unexpected <{name}>")
+        attributes = _attributes(raw)
+        if name == "a":
+            if "href" not in attributes:
+                raise UnexpectedStructure("Link without href")
+            for element in stack:
+                if element.link is None and element.name in ("span", "tr"):
+                    element.link = attributes.get("href")
+        if name in VOID_ELEMENTS or raw.rstrip().endswith("/"):
+            parent.last = ("tag", "")
+            continue
+
+        element = _Element(name, len(texts))
+        element.table = parent.table
+        if name == "span" and first_span is None:
+            first_span = element
+        if name == "table":
+            # [previous sibling, classes, has nested table, rows]
+            element.table = [
+                parent.last,
+                attributes.get("class", "").split(),
+                False,
+                [],
+            ]
+            if parent.table is not None:
+                for outer in stack:
+                    if outer.name == "table":
+                        outer.table[2] = True
+            tables.append(element.table)
+        stack.append(element)
+
+    if len(stack) > 1:
+        raise UnexpectedStructure(f"Unclosed <{stack[-1].name}>")
+    if title is None or "Solution" not in title:
+        return None
+
+    for table, text, row_link in rows:
+        table[3].append((text, row_link))
+
+    items = []
+    for previous, classes, nested, table_rows in tables:
+        if nested:
+            if previous is None:
+                items.append("None")
+            elif previous[0] == "tag":
+                items.append(previous[1])
+            else:
+                items.append(previous[1].strip())
+        else:
+            items.append(AnalysisTable(classes, table_rows))
+    return SolutionBlock(title, link, items)
+
+
+def _check_raw_text(html: str):
+    """
+    Reject raw-text elements holding markup anywhere in the page
+
+    Their content is not parsed as HTML, so an ``<hr>`` within it (e.g. in a
+    script in the head) would shift the split into blocks. Raw-text elements
+    without any ``<`` (e.g. the title or a style sheet) are accepted.
+    """
+    for match in RAW_TEXT_REGEX.finditer(html):
+        if "<" in match.group(2):
+            name = match.group(1).lower()
+            raise UnexpectedStructure(f"Markup in <{name}> is not supported")
+
+
+def scan_solutions(html: str) -> List[SolutionBlock]:
+    """
+    Solution blocks of a Reader Companion page, without a document tree
+
+    Blocks after the second ``<hr>`` are scanned up to the first block
+    without a solution. The result is the same as that of
+    HeritageOutput._solution_blocks().
+
+    Raises
+    ------
+    UnexpectedStructure
+        If the page has no ``<hr>`` or does not have the expected structure.
+    """
+    if "<!--" in html:
+        raise UnexpectedStructure("Comments are not supported")
+    _check_raw_text(html)
+    blocks = HR_REGEX.split(html)
+    if len(blocks) < 2:
+        raise UnexpectedStructure("No <hr> found")
+
+    solutions = []
+    for block in blocks[2:]:
+        if "Solution" not in block:
+            break
+        solution = _scan_block(block)
+        if solution is None:
+            break
+        solutions.append(solution)
+    return solutions
+
+
+###############################################################################
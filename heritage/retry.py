@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retry Policy
+
+Bound the time spent on a single web query: number of attempts, total
+deadline, backoff with jitter, retryable status codes and ``Retry-After``.
+"""
+
+###############################################################################
+
+import time
+import random
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import FrozenSet, Mapping, Optional
+
+###############################################################################
+
+DEFAULT_RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+JITTER_STRATEGIES = ["additive", "full", "equal", "none"]
+
+###############################################################################
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Policy for retrying failed web requests
+
+    Attributes
+    ----------
+    attempts : int
+        Maximum number of attempts (including the first one).
+    deadline : float, optional
+        Maximum total time in seconds for a call, including every attempt and
+        backoff. Attempt timeouts are shortened to fit within the deadline.
+        If None, only `attempts` bounds the call.
+    backoff_base : float
+        Base of the exponential backoff; attempt `n` backs off for about
+        ``backoff_base * 2 ** n`` seconds.
+    backoff_max : float
+        Upper bound for a single backoff in seconds.
+    jitter : str
+        Randomization of the backoff,
+
+        * additive: add up to one second (``2 ** n + random()``)
+        * full: uniform between zero and the backoff
+        * equal: half the backoff plus up to another half
+        * none: no randomization
+    retry_statuses : frozenset
+        HTTP status codes worth retrying. Other failures are final.
+    retry_on_errors : bool
+        Retry network errors (connection failures, timeouts).
+    respect_retry_after : bool
+        Wait as long as the ``Retry-After`` header of a response asks,
+        instead of the computed backoff.
+    max_retry_after : float
+        Upper bound for the delay requested by ``Retry-After``; longer
+        requests end the call.
+    """
+
+    attempts: int = 3
+    deadline: Optional[float] = None
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+    jitter: str = "additive"
+    retry_statuses: FrozenSet[int] = field(
+        default_factory=lambda: DEFAULT_RETRY_STATUSES
+    )
+    retry_on_errors: bool = True
+    respect_retry_after: bool = True
+    max_retry_after: float = 60.0
+
+    def __post_init__(self):
+        if self.jitter not in JITTER_STRATEGIES:
+            raise ValueError(
+                f"Invalid jitter: '{self.jitter}' "
+                f"(expected one of {JITTER_STRATEGIES})"
+            )
+        self.attempts = max(1, self.attempts)
+        self.retry_statuses = frozenset(self.retry_statuses)
+
+    # ----------------------------------------------------------------------- #
+
+    def backoff(self, attempt: int) -> float:
+        """Backoff in seconds after the (0-indexed) failed `attempt`"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if self.jitter == "additive":
+            return min(self.backoff_max, delay + random.random())
+        if self.jitter == "full":
+            return random.uniform(0, delay)
+        if self.jitter == "equal":
+            return delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+    def should_retry(self, status: int = None) -> bool:
+        """Whether a failure (status code, or None for errors) is retryable"""
+        if status is None:
+            return self.retry_on_errors
+        return status in self.retry_statuses
+
+    def retry_after(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Delay requested by the ``Retry-After`` header, if any
+
+        Both forms, delay in seconds and HTTP-date, are supported.
+        """
+        if not self.respect_retry_after or headers is None:
+            return None
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if retry_at is None:
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def next_delay(
+        self, attempt: int, status: int = None, retry_after: float = None
+    ) -> Optional[float]:
+        """
+        Delay before the next attempt, or None if the call should end
+
+        Parameters
+        ----------
+        attempt : int
+            The (0-indexed) attempt that just failed
+        status : int, optional
+            Status code of the failed attempt, or None for a network error
+        retry_after : float, optional
+            Delay requested by the server through ``Retry-After``
+        """
+        if attempt + 1 >= self.attempts or not self.should_retry(status):
+            return None
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            return retry_after
+        return self.backoff(attempt)
+
+
+class Deadline:
+    """Remaining time of a call with an optional total deadline"""
+
+    def __init__(self, seconds: float = None):
+        self.expires = None if seconds is None else time.monotonic() + seconds
+
+    def remaining(self) -> Optional[float]:
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def timeout(self, timeout: float) -> float:
+        """
+        Attempt timeout shortened to fit within the deadline
+
+        The result is 0 once the deadline has expired; it must not be used
+        as a timeout then.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def allows(self, delay: float) -> bool:
+        """Whether there is time left for another attempt after `delay`"""
+        remaining = self.remaining()
+        return remaining is None or delay < remaining
+
+
+###############################################################################
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shell Executor
+
+Run the CGI scripts of a local Heritage Platform installation.
+
+The scripts are single-threaded OCaml programs, so throughput scales by
+running several of them at once. An executor allows up to `workers`
+concurrent processes, both from threads (sync API) and from coroutines
+(``asyncio.create_subprocess_exec``).
+
+Every script runs in its own process group, optionally with memory and CPU
+limits, and the whole group is killed on timeout. The wall time and the peak
+resident memory of every run are reported to the caller and aggregated.
+"""
+
+###############################################################################
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import logging
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+LOGGER = logging.getLogger(__name__)
+
+###############################################################################
+
+DEFAULT_SHELL_WORKERS = os.cpu_count() or 4
+# Fraction of the memory limit reached by a run failing for lack of memory
+MEMORY_LIMIT_MARGIN = 0.8
+CGI_HEADER = "Content-Type: text/html\n\n"
+
+# Variables of the ambient environment passed on to the scripts
+CGI_ENVIRONMENT_VARIABLES = [
+    "PATH",
+    "HOME",
+    "TMPDIR",
+    "LANG",
+    "LANGUAGE",
+    "LC_ALL",
+    "LC_CTYPE",
+    "OCAMLRUNPARAM",
+]
+
+###############################################################################
+
+
+def cgi_environment(extra: dict = None) -> dict:
+    """
+    Minimal environment for running the CGI scripts
+
+    Only CGI_ENVIRONMENT_VARIABLES are taken from the ambient environment,
+    so that the scripts (and their results) do not depend on unrelated
+    variables. ``QUERY_STRING`` is to be added per call.
+
+    Parameters
+    ----------
+    extra : dict, optional
+        Additional variables, overriding the inherited ones.
+    """
+    environment = {
+        name: os.environ[name]
+        for name in CGI_ENVIRONMENT_VARIABLES
+        if name in os.environ
+    }
+    environment["GATEWAY_INTERFACE"] = "CGI/1.1"
+    environment["REQUEST_METHOD"] = "GET"
+    if extra:
+        environment.update(extra)
+    return environment
+
+
+def is_executable(path: str) -> bool:
+    """Whether `path` is a file that may be executed"""
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+###############################################################################
+
+
+@dataclass
+class ResourceLimits:
+    """
+    Resource limits (rlimits) of a script
+
+    Attributes
+    ----------
+    memory : int, optional
+        Maximum virtual memory in bytes (``RLIMIT_AS``).
+    cpu_time : int, optional
+        Maximum CPU time in seconds (``RLIMIT_CPU``).
+    """
+
+    memory: Optional[int] = None
+    cpu_time: Optional[int] = None
+
+    def __bool__(self):
+        return self.memory is not None or self.cpu_time is not None
+
+    def apply(self, pid: int):
+        """
+        Set the limits of a running process
+
+        The limits are set with ``prlimit`` right after the process is
+        spawned, since setting them in the child (``preexec_fn``) is not safe
+        while other threads are running. Without ``prlimit`` (i.e., outside
+        Linux), the limits are not applied.
+        """
+        if not hasattr(resource, "prlimit"):
+            LOGGER.warning("Resource limits are not supported here.")
+            return
+        try:
+            if self.memory is not None:
+                resource.prlimit(
+                    pid, resource.RLIMIT_AS, (self.memory, self.memory)
+                )
+            if self.cpu_time is not None:
+                resource.prlimit(
+                    pid, resource.RLIMIT_CPU, (self.cpu_time, self.cpu_time)
+                )
+        except ProcessLookupError:
+            # The script has already exited
+            pass
+
+
+@dataclass
+class ShellRun:
+    """
+    Resource usage of a single script run
+
+    Attributes
+    ----------
+    path : str
+        Path of the script
+    returncode : int
+        Exit status, negative if the script was killed by a signal
+    wall_time : float
+        Elapsed time in seconds
+    peak_rss : int, optional
+        Peak resident memory in bytes, if known
+    timed_out : bool
+        Whether the script was killed on timeout
+    """
+
+    path: str
+    returncode: Optional[int]
+    wall_time: float
+    peak_rss: Optional[int] = None
+    timed_out: bool = False
+
+
+def _peak_rss(rusage) -> int:
+    """Peak resident memory in bytes from an rusage structure"""
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss
+    return rusage.ru_maxrss * 1024
+
+
+def _exit_code(status: int) -> int:
+    """Exit code of a wait status, negative if killed by a signal"""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _kill_group(pid: int):
+    """Kill the process group led by `pid`"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(pid, signal.SIGKILL)
+        else:  # pragma: no cover
+            os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def strip_cgi_header(output: bytes) -> str:
+    """Decode the output of a CGI script and strip its header"""
+    text = output.decode("utf-8")
+    return text[len(CGI_HEADER):]
+
+
+class ShellUnavailable(Exception):
+    """The script could not be run, or crashed"""
+
+
+class ShellExecutor:
+    """
+    Bounded executor for the CGI scripts
+
+    Both methods behave like ``subprocess.check_output``, i.e., they raise
+    ``subprocess.TimeoutExpired`` once `timeout` expires (after killing the
+    process group), ``subprocess.CalledProcessError`` for a non-zero exit
+    status (e.g. when killed for exceeding a limit) and ``OSError`` if the
+    script cannot be executed.
+
+    The usage of a run is returned by ShellExecutor.run_with_usage() (and
+    attached as `usage` to the exceptions it raises), and aggregated
+    statistics are available through ShellExecutor.info(). `last` holds the
+    usage of the latest run of any thread.
+    """
+
+    def __init__(self, workers: int = None, limits: ResourceLimits = None):
+        """
+        Parameters
+        ----------
+        workers : int, optional
+            Maximum number of scripts running at any time.
+            The default is DEFAULT_SHELL_WORKERS (the number of CPUs).
+        limits : ResourceLimits, optional
+            Memory and CPU limits of every script.
+            The default is no limits.
+        """
+        self.workers = max(1, workers or DEFAULT_SHELL_WORKERS)
+        self.limits = limits or ResourceLimits()
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._async_slots = None
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.timeouts = 0
+        self.total_time = 0.0
+        self.max_rss = None
+        self.last = None
+
+    def _limit(self, pid: int):
+        """Apply the resource limits to a spawned script"""
+        if self.limits and resource is not None:
+            self.limits.apply(pid)
+
+    def killed_by_limit(self, usage: ShellRun) -> bool:
+        """
+        Whether a failed run was killed for exceeding a limit
+
+        i.e., killed by ``SIGXCPU`` or ``SIGKILL`` under a CPU time limit, or
+        failed with a peak resident memory of at least MEMORY_LIMIT_MARGIN
+        of the memory limit, since a script running out of memory otherwise
+        fails like a crashing one. Without its peak memory (asyncio runs),
+        a failure is not attributed to the memory limit.
+        """
+        if not usage.returncode:
+            return False
+        if self.limits.cpu_time is not None and usage.returncode in (
+            -signal.SIGXCPU,
+            -signal.SIGKILL,
+        ):
+            return True
+        return (
+            self.limits.memory is not None
+            and usage.peak_rss is not None
+            and usage.peak_rss >= MEMORY_LIMIT_MARGIN * self.limits.memory
+        )
+
+    def run(self, path: str, environment: dict, timeout: float = 30) -> str:
+        """Run a script, waiting for a free slot, and return its HTML"""
+        return self.run_with_usage(path, environment, timeout)[0]
+
+    def run_with_usage(
+        self, path: str, environment: dict, timeout: float = 30
+    ) -> Tuple[str, ShellRun]:
+        """
+        Run a script and return its HTML along with the usage of the run
+
+        Returns
+        -------
+        tuple
+            ``(html, usage)``, usage being a :class:`ShellRun`
+        """
+        with self._slots:
+            output, usage = self._run(path, environment, timeout)
+        self._record(usage)
+        return self._result(usage, output, timeout), usage
+
+    def _run(self, path: str, environment: dict, timeout: float):
+        started = time.monotonic()
+        process = subprocess.Popen(
+            path,
+            stdout=subprocess.PIPE,
+            env=environment,
+            start_new_session=True,
+        )
+        self._limit(process.pid)
+        outcome = {}
+
+        def communicate():
+            # Read the whole output, then reap the process with its rusage
+            with process.stdout:
+                outcome["output"] = process.stdout.read()
+            _, status, rusage = os.wait4(process.pid, 0)
+            outcome["status"] = status
+            outcome["rusage"] = rusage
+
+        waiter = threading.Thread(target=communicate, daemon=True)
+        waiter.start()
+        waiter.join(timeout)
+        timed_out = waiter.is_alive()
+        if timed_out:
+            _kill_group(process.pid)
+            waiter.join()
+
+        process.returncode = _exit_code(outcome["status"])
+        usage = ShellRun(
+            path=path,
+            returncode=process.returncode,
+            wall_time=time.monotonic() - started,
+            peak_rss=_peak_rss(outcome["rusage"]),
+            timed_out=timed_out,
+        )
+        return outcome["output"], usage
+
+    async def run_async(
+        self, path: str, environment: dict, timeout: float = 30
+    ) -> str:
+        """Awaitable version of ShellExecutor.run()"""
+        output, _ = await self.run_with_usage_async(path, environment, timeout)
+        return output
+
+    async def run_with_usage_async(
+        self, path: str, environment: dict, timeout: float = 30
+    ) -> Tuple[str, ShellRun]:
+        """
+        Awaitable version of ShellExecutor.run_with_usage()
+
+        The peak resident memory is not available for asyncio subprocesses.
+        """
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.workers)
+        async with self._async_slots:
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(
+                path,
+                stdout=asyncio.subprocess.PIPE,
+                env=environment,
+                start_new_session=True,
+            )
+            self._limit(process.pid)
+            timed_out = False
+            try:
+                output, _ = await asyncio.wait_for(
+                    process.communicate(), timeout
+                )
+            except asyncio.TimeoutError:
+                timed_out = True
+                output = b""
+                _kill_group(process.pid)
+                await process.wait()
+            except asyncio.CancelledError:
+                _kill_group(process.pid)
+                await process.wait()
+                raise
+
+        usage = ShellRun(
+            path=path,
+            returncode=process.returncode,
+            wall_time=time.monotonic() - started,
+            timed_out=timed_out,
+        )
+        self._record(usage)
+        return self._result(usage, output, timeout), usage
+
+    # ----------------------------------------------------------------------- #
+
+    def _record(self, usage: ShellRun):
+        with self._lock:
+            self.runs += 1
+            self.timeouts += usage.timed_out
+            self.total_time += usage.wall_time
+            if usage.peak_rss is not None:
+                self.max_rss = max(self.max_rss or 0, usage.peak_rss)
+            self.last = usage
+        LOGGER.debug(
+            "'%s' exited with %s in %.3fs (peak RSS: %s bytes)",
+            usage.path,
+            usage.returncode,
+            usage.wall_time,
+            usage.peak_rss,
+        )
+
+    @staticmethod
+    def _result(usage: ShellRun, output: bytes, timeout: float) -> str:
+        """Decoded output, or the exception of check_output for failures"""
+        error = None
+        if usage.timed_out:
+            error = subprocess.TimeoutExpired(usage.path, timeout, output)
+        elif usage.returncode:
+            error = subprocess.CalledProcessError(
+                usage.returncode, usage.path, output
+            )
+        if error is not None:
+            error.usage = usage
+            raise error
+        return strip_cgi_header(output)
+
+    def info(self) -> dict:
+        """Number of runs and timeouts, total wall time and peak memory"""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "timeouts": self.timeouts,
+                "total_time": self.total_time,
+                "max_rss": self.max_rss,
+            }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(workers={self.workers})"
+
+
+###############################################################################
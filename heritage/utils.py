@@ -4,8 +4,22 @@
 
 ###############################################################################
 
+import re
+import threading
+import unicodedata
+from typing import Optional
 from urllib.parse import urlencode
 
+# Invisible characters that do not change the meaning of an input
+ZERO_WIDTH_REGEX = re.compile("[\u00ad\u200b\u200c\u200d\u2060\ufeff]")
+
+# Declared charset of an HTML page, i.e. <meta charset="..."> or
+# <meta http-equiv="Content-Type" content="text/html; charset=...">
+META_CHARSET_REGEX = re.compile(
+    rb"<meta[^>]*?charset\s*=\s*[\"']?\s*([a-zA-Z0-9_.:-]+)", re.IGNORECASE
+)
+META_CHARSET_SCAN_BYTES = 4096
+
 
 def build_query_string(options: dict) -> str:
     """
@@ -19,6 +33,125 @@ def build_query_string(options: dict) -> str:
     return urlencode(filtered, doseq=True, safe="+")
 
 
+def canonical_text(text: str) -> str:
+    """
+    Canonical form of an input text
+
+    Unicode NFC, without zero-width characters (e.g. ZWJ, ZWNJ), and with
+    runs of whitespace collapsed into a single space.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = ZERO_WIDTH_REGEX.sub("", text)
+    return " ".join(text.split())
+
+
+class QueryCanonicalizer:
+    """
+    Rewrite queries into a canonical form
+
+    Equivalent queries, e.g. differing only in Unicode normalization or in
+    the order of their options, share a query string, and therefore their
+    cache entries and backend calls.
+    The number of queries and of input texts rewritten into their canonical
+    form is available through QueryCanonicalizer.info(). A rewritten input
+    does not necessarily meet an equivalent query, and a query may have
+    several rewritten inputs (e.g. both words of a sandhi).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.rewritten = 0
+
+    def text(self, text: str) -> str:
+        """Canonical form of an input text, refer to canonical_text()"""
+        canonical = canonical_text(text)
+        if canonical != text:
+            with self._lock:
+                self.rewritten += 1
+        return canonical
+
+    def options(self, options: dict) -> dict:
+        """
+        Canonical form of the options of a query
+
+        Options set to ``None`` are dropped, the others are sorted by name
+        and their text values are canonicalized.
+        """
+        canonical = {
+            name: canonical_text(value) if isinstance(value, str) else value
+            for name, value in sorted(options.items())
+            if value is not None
+        }
+        changed = sum(
+            canonical[name] != value
+            for name, value in options.items()
+            if value is not None
+        )
+        with self._lock:
+            self.queries += 1
+            self.rewritten += changed
+        return canonical
+
+    def info(self) -> dict:
+        """Number of queries and of rewritten input texts"""
+        with self._lock:
+            return {"queries": self.queries, "rewritten": self.rewritten}
+
+
+# Process-wide canonicalization of queries
+QUERY_CANONICALIZER = QueryCanonicalizer()
+
+
+def sniff_charset(content: bytes) -> Optional[str]:
+    """
+    Charset declared by a ``<meta>`` tag near the start of an HTML page
+
+    Only the first META_CHARSET_SCAN_BYTES bytes are scanned.
+    """
+    match = META_CHARSET_REGEX.search(content, 0, META_CHARSET_SCAN_BYTES)
+    if match is None:
+        return None
+    return match.group(1).decode("ascii").lower()
+
+
+def decode_strict(content: bytes, encoding: str) -> Optional[str]:
+    """Decode `content`, or return None if it is not valid `encoding`"""
+    try:
+        return content.decode(encoding)
+    except (UnicodeDecodeError, LookupError):
+        return None
+
+
+def conditional_headers(validators: dict = None) -> dict:
+    """
+    Headers of a conditional request for a cached response
+
+    Parameters
+    ----------
+    validators : dict, optional
+        ``etag`` and ``last_modified`` of the cached response, as returned
+        by response_validators().
+    """
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+def response_validators(headers) -> dict:
+    """``ETag`` and ``Last-Modified`` of a response, if provided"""
+    validators = {}
+    if headers.get("ETag"):
+        validators["etag"] = headers["ETag"]
+    if headers.get("Last-Modified"):
+        validators["last_modified"] = headers["Last-Modified"]
+    return validators
+
+
 ###############################################################################
 
 
@@ -16,6 +16,11 @@ requirements = [
     "beautifulsoup4>=4.10.0",
 ]
 
+extra_requirements = {
+    "async": ["aiohttp>=3.8"],
+    "lxml": ["lxml>=4.6"],
+}
+
 test_requirements = ['pytest>=3', ]
 
 setup(
@@ -43,6 +48,7 @@ setup(
         ],
     },
     install_requires=requirements,
+    extras_require=extra_requirements,
     license="GNU General Public License v3",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
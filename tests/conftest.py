@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""Shared fixtures for the `heritage` test-suite."""
+
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            responder = server.responder
+        status, headers, body = responder(self)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.responder = lambda handler: (
+        200,
+        {"Content-Type": "text/html; charset=utf-8"},
+        "<html><head><title>OK</title></head><body></body></html>",
+    )
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/cgi-bin/"
+    thread = threading.Thread(
+        target=server.serve_forever,
+        kwargs={"poll_interval": 0.05},
+        daemon=True,
+    )
+    thread.start()
+    return server
+
+
+def _shutdown(server):
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http_server():
+    """
+    Local HTTP/1.1 server standing in for a Heritage Platform mirror
+
+    Set ``server.responder`` to a callable receiving the request handler and
+    returning a ``(status, headers, body)`` tuple. Requested paths are
+    recorded in ``server.requests`` and ``server.url`` is the base URL.
+    """
+    server = _serve()
+    yield server
+    _shutdown(server)
+
+
+@pytest.fixture
+def second_http_server():
+    """Another local server, e.g. to act as a second mirror"""
+    server = _serve()
+    yield server
+    _shutdown(server)
+
+
+_SCRIPT = """#!{python}
+import os
+import sys
+import time
+
+time.sleep({delay})
+sys.stdout.write("Content-Type: text/html\\n\\n")
+sys.stdout.write(
+    "<html><head><title>Sanskrit Sandhi Engine</title></head>"
+    "<body><span>raama.h | vanam = raamovanam</span>"
+    "<span>" + os.environ.get("QUERY_STRING", "") + "</span></body></html>"
+)
+"""
+
+
+@pytest.fixture
+def heritage_installation(tmp_path):
+    """
+    Fake local installation of the Heritage Platform
+
+    Every script of ``ML`` sleeps for 0.2 seconds and answers with a sandhi
+    page that also echoes the ``QUERY_STRING``. Returns the `base_dir`.
+    """
+    from heritage.heritage import HeritagePlatform
+
+    scripts_dir = tmp_path / "ML"
+    scripts_dir.mkdir()
+    for action in HeritagePlatform.ACTIONS.values():
+        if action["shell"].endswith("/"):
+            continue
+        path = scripts_dir / action["shell"]
+        path.write_text(_SCRIPT.format(python=sys.executable, delay=0.2))
+        os.chmod(path, 0o755)
+    return str(tmp_path)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+"""Tests for the asyncio interface in `heritage.aio`."""
+
+import asyncio
+import threading
+
+import pytest
+
+from heritage.cache import MemoryCache, SQLiteCache
+from heritage.heritage import HeritagePlatform
+from heritage.retry import RetryPolicy
+
+pytest.importorskip("aiohttp")
+
+from heritage.aio import AsyncHeritagePlatform  # noqa: E402
+
+SANDHI_HTML = """
+<html>
+  <head><title>Sanskrit Sandhi Engine</title></head>
+  <body><span>raama.h | vanam = raamovanam</span></body>
+</html>
+"""
+
+LEXICON_HTML = """
+<html>
+  <head><title>Monier-Williams Sanskrit-English Dictionary</title></head>
+  <body><span><a name="rama">राम</a> some definition text</span></body>
+</html>
+"""
+
+
+def test_async_platform_matches_sync_extraction(http_server):
+    in_flight = [0, 0]
+    lock = threading.Lock()
+
+    def responder(handler):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        try:
+            return 200, {"Content-Type": "text/html"}, SANDHI_HTML
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    http_server.responder = responder
+
+    async def run():
+        async with AsyncHeritagePlatform(
+            base_url=http_server.url, max_concurrency=4, cache=None
+        ) as platform:
+            return await asyncio.gather(
+                *(platform.sandhi(f"w{idx}", "vanam") for idx in range(20))
+            )
+
+    results = asyncio.run(run())
+    assert results == ["raamovanam"] * 20
+    assert len(http_server.requests) == 20
+    assert in_flight[1] <= 4
+
+    platform = HeritagePlatform(
+        method="web", base_url=http_server.url, cache=None
+    )
+    assert platform.sandhi("w0", "vanam") == results[0]
+
+
+def test_async_platform_shares_the_response_cache(http_server):
+    http_server.responder = lambda handler: (200, {}, SANDHI_HTML)
+    cache = MemoryCache()
+
+    async def run():
+        async with AsyncHeritagePlatform(
+            base_url=http_server.url, cache=cache
+        ) as platform:
+            first = await platform.sandhi("raama.h", "vanam")
+            second = await platform.sandhi("raama.h", "vanam")
+            return first, second
+
+    assert asyncio.run(run()) == ("raamovanam", "raamovanam")
+    assert len(http_server.requests) == 1
+
+
+def test_async_platform_does_not_block_the_loop(tmp_path, http_server):
+    http_server.responder = lambda handler: (200, {}, SANDHI_HTML)
+    threads = []
+
+    class RecordingCache(SQLiteCache):
+        def get(self, *args):
+            threads.append(threading.get_ident())
+            return super().get(*args)
+
+        def set(self, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return super().set(*args, **kwargs)
+
+    async def run():
+        async with AsyncHeritagePlatform(
+            base_url=http_server.url,
+            cache=None,
+            persistent_cache=RecordingCache(tmp_path / "cache.db"),
+        ) as platform:
+            extract = platform._extract
+
+            def recording_extract(*args, **kwargs):
+                threads.append(threading.get_ident())
+                return extract(*args, **kwargs)
+
+            platform._extract = recording_extract
+            first = await platform.sandhi("raama.h", "vanam")
+            second = await platform.sandhi("raama.h", "vanam")
+            return first, second
+
+    assert asyncio.run(run()) == ("raamovanam", "raamovanam")
+    assert len(http_server.requests) == 1
+    # get, set and extract, then get and extract
+    assert len(threads) == 5
+    assert threading.get_ident() not in threads
+
+
+def test_async_lexicon_entry_uses_the_cache_off_the_loop(http_server):
+    http_server.responder = lambda handler: (200, {}, LEXICON_HTML)
+    threads = []
+
+    class RecordingCache(MemoryCache):
+        def get(self, scope, action, key):
+            if action == "dictionary_entry":
+                threads.append(threading.get_ident())
+            return super().get(scope, action, key)
+
+        def set(self, scope, action, key, *args, **kwargs):
+            if action == "dictionary_entry":
+                threads.append(threading.get_ident())
+            return super().set(scope, action, key, *args, **kwargs)
+
+    async def run():
+        async with AsyncHeritagePlatform(
+            base_url=http_server.url, cache=RecordingCache()
+        ) as platform:
+            first = await platform.get_lexicon_entry("1.html", "rama")
+            second = await platform.get_lexicon_entry("1.html", "rama")
+            return first, second
+
+    first, second = asyncio.run(run())
+    assert first.lemma == second.lemma == "राम"
+    assert len(http_server.requests) == 1
+    # get and set, then get
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+
+
+def test_async_batch_dedupes_inputs(http_server):
+    http_server.responder = lambda handler: (200, {}, SANDHI_HTML)
+
+    async def run():
+        async with AsyncHeritagePlatform(
+            base_url=http_server.url, cache=None
+        ) as platform:
+            return await platform.sandhi_many(
+                [("a", "b"), ("c", "d"), ("a", "b")]
+            )
+
+    results = asyncio.run(run())
+    assert [r.result for r in results] == ["raamovanam"] * 3
+    assert len(http_server.requests) == 2
+
+
+def test_async_identical_queries_are_coalesced(http_server):
+    http_server.responder = lambda handler: (200, {}, SANDHI_HTML)
+
+    async def run():
+        async with AsyncHeritagePlatform(
+            base_url=http_server.url, cache=None
+        ) as platform:
+            return await asyncio.gather(
+                *(platform.sandhi("a", "b") for _ in range(5))
+            )
+
+    assert asyncio.run(run()) == ["raamovanam"] * 5
+    assert len(http_server.requests) == 1
+
+
+def test_async_platform_respects_an_expired_deadline(http_server):
+    async def run():
+        async with AsyncHeritagePlatform(
+            base_url=http_server.url,
+            cache=None,
+            failure_ttl=0,
+            retry_policy=RetryPolicy(deadline=0),
+        ) as platform:
+            return await platform.sandhi("raama", "iti")
+
+    assert asyncio.run(run()) is None
+    assert http_server.requests == []
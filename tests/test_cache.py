@@ -0,0 +1,426 @@
+#!/usr/bin/env python
+
+"""Tests for the response caches in `heritage.cache`."""
+
+import gc
+import json
+import time
+import weakref
+
+from heritage import cache as cache_module
+from heritage.cache import (
+    FAILED,
+    CompressedMemoryCache,
+    MemoryCache,
+    SQLiteCache,
+)
+from heritage.heritage import HeritagePlatform
+
+
+def test_sqlite_cache_roundtrip_is_scoped(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.db")
+    cache.set("web:a", "reader", "text=x", "<html>a</html>")
+    assert cache.get("web:a", "reader", "text=x") == "<html>a</html>"
+    assert cache.get("web:b", "reader", "text=x") is None
+    assert cache.get("web:a", "sandhi", "text=x") is None
+    assert cache.info() == {"entries": 1, "bytes": 14, "hits": 1}
+
+    # A second instance on the same file sees the same data.
+    other = SQLiteCache(tmp_path / "cache.db")
+    assert other.get("web:a", "reader", "text=x") == "<html>a</html>"
+    cache.close()
+    other.close()
+
+
+def test_sqlite_cache_ttl_and_size_eviction(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+
+    cache = SQLiteCache(tmp_path / "cache.db", ttl=10, max_entries=2)
+    cache.set("s", "reader", "q1", "one")
+    now[0] += 1
+    cache.set("s", "reader", "q2", "two")
+    now[0] += 1
+    cache.set("s", "reader", "q3", "three")
+    assert cache.get("s", "reader", "q3") == "three"
+    assert cache.evict() == 1
+    assert cache.get("s", "reader", "q1") is None
+
+    now[0] += 9
+    assert cache.get("s", "reader", "q3") == "three"
+    assert cache.get("s", "reader", "q2") is None
+    cache.close()
+
+
+def test_get_result_uses_persistent_cache(tmp_path, monkeypatch):
+    platform = HeritagePlatform(
+        method="web", persistent_cache=str(tmp_path / "cache.db"), cache=None
+    )
+    calls = []
+
+    def fake_fetch(url, options, *args, **kwargs):
+        calls.append(url)
+        return "<html>result</html>"
+
+    monkeypatch.setattr(platform, "get_result_from_web", fake_fetch)
+    options = {"q": "raama", "t": "VH"}
+    assert platform.get_result("sandhi", options) == "<html>result</html>"
+    assert platform.get_result("sandhi", options) == "<html>result</html>"
+    assert len(calls) == 1
+
+    # A fresh platform (e.g. after a restart) reuses the stored responses.
+    restarted = HeritagePlatform(
+        method="web", persistent_cache=str(tmp_path / "cache.db"), cache=None
+    )
+    monkeypatch.setattr(restarted, "get_result_from_web", fake_fetch)
+    assert restarted.get_result("sandhi", options) == "<html>result</html>"
+    assert len(calls) == 1
+
+
+def test_memory_cache_lru_eviction_by_entries_and_bytes():
+    cache = MemoryCache(max_entries=2, max_bytes=None)
+    cache.set("s", "reader", "q1", "one")
+    cache.set("s", "reader", "q2", "two")
+    assert cache.get("s", "reader", "q1") == "one"
+    cache.set("s", "reader", "q3", "three")
+    assert cache.get("s", "reader", "q2") is None
+    assert cache.get("s", "reader", "q1") == "one"
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (2, 1, 2)
+
+    value = "x" * 1000
+    budget = 2 * cache_module.sizeof(value)
+    cache = MemoryCache(max_entries=None, max_bytes=budget)
+    for idx in range(5):
+        cache.set("s", "reader", f"q{idx}", value)
+    assert len(cache) == 2
+    assert cache.cache_info().nbytes <= budget
+
+
+def test_memory_cache_ttl_and_scoped_clear(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+
+    cache = MemoryCache(ttl=5)
+    cache.set("web:a", "reader", "q", "a")
+    cache.set("web:b", "reader", "q", "b", ttl=60)
+    now[0] = 10
+    assert cache.get("web:a", "reader", "q") is None
+    assert cache.get("web:b", "reader", "q") == "b"
+
+    cache.cache_clear("web:b")
+    assert len(cache) == 0
+
+
+def test_memory_cache_is_shared_and_does_not_hold_platforms(monkeypatch):
+    cache = MemoryCache()
+    calls = []
+
+    def fake_fetch(url, options, *args, **kwargs):
+        calls.append(url)
+        return "<html>result</html>"
+
+    first = HeritagePlatform(method="web", cache=cache)
+    monkeypatch.setattr(first, "get_result_from_web", fake_fetch)
+    assert first.get_result("sandhi", {"l": "a"}) == "<html>result</html>"
+
+    second = HeritagePlatform(method="web", cache=cache)
+    monkeypatch.setattr(second, "get_result_from_web", fake_fetch)
+    assert second.get_result("sandhi", {"l": "a"}) == "<html>result</html>"
+    assert len(calls) == 1
+
+    other_mirror = HeritagePlatform(
+        method="web", base_url="http://localhost/cgi-bin/", cache=cache
+    )
+    monkeypatch.setattr(other_mirror, "get_result_from_web", fake_fetch)
+    other_mirror.get_result("sandhi", {"l": "a"})
+    assert len(calls) == 2
+
+    reference = weakref.ref(first)
+    monkeypatch.undo()
+    del first
+    gc.collect()
+    assert reference() is None
+
+
+def test_failures_are_cached_briefly(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    failures = MemoryCache()
+    platform = HeritagePlatform(
+        method="web", cache=None, failure_cache=failures, failure_ttl=5
+    )
+    results = [None, "<html>ok</html>"]
+    calls = []
+
+    def fake_fetch(url, options, *args, **kwargs):
+        calls.append(url)
+        return results[len(calls) - 1]
+
+    monkeypatch.setattr(platform, "get_result_from_web", fake_fetch)
+    assert platform.get_result("sandhi", {"l": "a"}) is None
+    assert platform.get_result("sandhi", {"l": "a"}) is None
+    assert len(calls) == 1
+    assert failures.get(platform.cache_scope(), "sandhi", "l=a") is FAILED
+
+    now[0] = 6
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>ok</html>"
+    assert len(calls) == 2
+
+
+def test_compressed_cache_deduplicates_content():
+    page = "<html><head><title>Sanskrit Sandhi Engine</title></head>{}</html>"
+    plain = MemoryCache(max_entries=None, max_bytes=None)
+    cache = CompressedMemoryCache(max_bytes=None)
+    for i in range(100):
+        value = page.format(f"<span>{i % 10}</span>" * 50)
+        plain.set("web", "sandhi", f"l={i}", value)
+        cache.set("web", "sandhi", f"l={i}", value)
+        assert cache.get("web", "sandhi", f"l={i}") == value
+
+    info = cache.compression_info()
+    assert info["entries"] == 100 and info["contents"] == 10
+    assert info["ratio"] > 5
+    assert cache.cache_info().nbytes * 3 < plain.cache_info().nbytes
+
+    cache.set("web", "dictionary_entry", "x", ["not", "text"])
+    assert cache.get("web", "dictionary_entry", "x") == ["not", "text"]
+
+    for i in range(0, 100, 10):
+        cache.delete("web", "sandhi", f"l={i}")
+    assert cache.compression_info()["contents"] == 9
+    cache.cache_clear()
+    assert cache.compression_info()["contents"] == 0
+    assert cache.cache_info().nbytes == 0
+
+
+def test_compressed_cache_budget_evicts_contents():
+    cache = CompressedMemoryCache(max_bytes=4096)
+    for i in range(50):
+        cache.set("web", "reader", f"q={i}", f"<html>{i}</html>" * 200)
+    info = cache.cache_info()
+    assert 0 < info.currsize < 50
+    assert info.nbytes <= 4096
+    assert cache.compression_info()["contents"] == info.currsize
+
+
+def test_sqlite_cache_prune_by_age_and_action(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = SQLiteCache(tmp_path / "cache.db")
+    cache.set("web", "sandhi", "q1", "old sandhi")
+    cache.set("web", "reader", "q1", "old reader")
+    now[0] += 100
+    cache.set("web", "sandhi", "q2", "new sandhi")
+    cache.set("web", "reader", "q2", "new reader")
+
+    assert cache.prune(older_than=50, action="sandhi") == 1
+    assert cache.action_info()["sandhi"]["entries"] == 1
+    assert cache.prune(older_than=50) == 1
+    assert cache.prune(action="reader") == 1
+    assert [row[2] for row in cache.items()] == ["q2"]
+
+
+def test_sqlite_cache_counts_lookups_per_action(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.db")
+    assert cache.get("web", "sandhi", "q1") is None
+    cache.set("web", "sandhi", "q1", "sandhi")
+    assert cache.get("web", "sandhi", "q1") == "sandhi"
+    assert cache.get("web", "sandhi", "q1") == "sandhi"
+    assert cache.get("web", "reader", "q1") is None
+
+    actions = cache.action_info()
+    assert actions["sandhi"] == {
+        "entries": 1,
+        "bytes": len("sandhi"),
+        "hits": 2,
+        "misses": 1,
+    }
+    assert actions["reader"] == {
+        "entries": 0,
+        "bytes": 0,
+        "hits": 0,
+        "misses": 1,
+    }
+    cache.clear()
+    assert cache.action_info() == {}
+
+
+def test_sqlite_cache_reads_do_not_write(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.db", flush_interval=3)
+    cache.set("web", "sandhi", "q1", "sandhi")
+    connection = cache._connection()
+    changes = connection.total_changes
+    assert cache.get("web", "sandhi", "q1") == "sandhi"
+    assert cache.get("web", "sandhi", "q2") is None
+    assert connection.total_changes == changes
+
+    # Written in a batch every `flush_interval` lookups
+    assert cache.get("web", "sandhi", "q1") == "sandhi"
+    assert connection.total_changes > changes
+    assert cache.action_info()["sandhi"]["hits"] == 2
+    assert cache.info()["hits"] == 2
+
+
+def test_cache_snapshot_roundtrip(tmp_path, http_server):
+    snapshot = str(tmp_path / "snapshot.jsonl.gz")
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=MemoryCache(),
+        persistent_cache=str(tmp_path / "a.db"),
+    )
+    platform.get_result("sandhi", {"l": "a"})
+    platform.cache.set("web", "dictionary_entry", "x", ["parsed"])
+    platform.cache.set("other", "sandhi", "l=b", "from memory")
+    assert platform.export_cache(snapshot) == 2
+
+    restored = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=MemoryCache(),
+        persistent_cache=str(tmp_path / "b.db"),
+    )
+    assert restored.import_cache(snapshot) == 2
+    assert len(restored.persistent_cache) == 2
+    assert restored.get_result("sandhi", {"l": "a"}) == platform.get_result(
+        "sandhi", {"l": "a"}
+    )
+    assert len(http_server.requests) == 1
+
+
+def test_cache_cli(tmp_path, http_server, capsys):
+    from heritage.cli import main
+
+    cache_path = str(tmp_path / "cache.db")
+    inputs = tmp_path / "inputs.tsv"
+    inputs.write_text("# warm-up\nsandhi\trAma\titi\nsearch_lexicon\trAma\n")
+    common = ["--base-url", http_server.url, "--cache-path", cache_path]
+
+    # Responses of the local server are not valid pages, so the extraction
+    # fails (and is reported) while the responses are still cached
+    assert main(common + ["cache", "warm", str(inputs)]) == 1
+    assert main(common + ["cache", "info", "--json"]) == 0
+    output = capsys.readouterr().out
+    info = json.loads(output[output.index("{"):])
+    assert set(info["actions"]) == {"sandhi", "search"}
+
+    snapshot = str(tmp_path / "snapshot.jsonl.gz")
+    assert main(common + ["cache", "export", snapshot]) == 0
+    assert main(common + ["cache", "prune", "--action", "search"]) == 0
+    assert "Removed 1 entries." in capsys.readouterr().out
+    assert main(common + ["cache", "import", snapshot]) == 0
+    assert len(SQLiteCache(cache_path)) == 2
+    assert main(["cache", "info"]) == 2
+
+
+def test_expired_responses_are_revalidated(tmp_path, http_server):
+    bodies = []
+
+    def responder(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        bodies.append(handler.path)
+        return 200, {"ETag": '"v1"'}, "<html>v1</html>"
+
+    http_server.responder = responder
+    persistent = SQLiteCache(tmp_path / "cache.db", ttl=0.2, stale_ttl=60)
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=None,
+        persistent_cache=persistent,
+    )
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v1</html>"
+    time.sleep(0.3)
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v1</html>"
+    assert len(http_server.requests) == 2
+    assert len(bodies) == 1
+
+    # The unmodified entry is fresh again
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v1</html>"
+    assert len(http_server.requests) == 2
+    persistent.close()
+
+
+def test_stale_while_revalidate_refreshes_in_background(http_server):
+    versions = ["v1", "v2"]
+
+    def responder(handler):
+        version = versions.pop(0)
+        if version == "v2":
+            time.sleep(0.5)
+        return 200, {}, f"<html>{version}</html>"
+
+    http_server.responder = responder
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=MemoryCache(ttl=0.2, stale_ttl=60),
+        stale_while_revalidate=30,
+    )
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v1</html>"
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v1</html>"
+    assert time.monotonic() - started < 0.3
+
+    scope = platform.cache_scope()
+    for _ in range(50):
+        if platform.cache.get(scope, "sandhi", "l=a") is not None:
+            break
+        time.sleep(0.05)
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v2</html>"
+    assert len(http_server.requests) == 2
+    platform.close()
+
+
+def test_platform_keeps_expired_entries_for_revalidation(
+    tmp_path, http_server
+):
+    bodies = []
+
+    def responder(handler):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        bodies.append(handler.path)
+        return 200, {"ETag": '"v1"'}, "<html>v1</html>"
+
+    http_server.responder = responder
+    cache = CompressedMemoryCache(ttl=0.2)
+    platform = HeritagePlatform(
+        method="web", base_url=http_server.url, cache=cache
+    )
+    # Shared caches are not changed
+    assert cache.stale_ttl == 0
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v1</html>"
+    time.sleep(0.3)
+    assert platform.get_result("sandhi", {"l": "a"}) == "<html>v1</html>"
+    assert len(http_server.requests) == 2
+    assert len(bodies) == 1
+
+    cache = MemoryCache(ttl=0.2)
+    HeritagePlatform(method="web", cache=cache, stale_while_revalidate=60)
+    assert cache.stale_ttl == 0
+    other = HeritagePlatform(
+        method="web", base_url=http_server.url, cache=cache, revalidate=False
+    )
+    cache.set("web", "sandhi", "l=b", "<html>old</html>", stale_ttl=60)
+    time.sleep(0.3)
+    assert other._stale_lookup("web", "sandhi", "l=b") is None
+    assert cache.lookup("web", "sandhi", "l=b", stale_ttl=60) is not None
+
+    persistent = str(tmp_path / "cache.db")
+    platform = HeritagePlatform(
+        method="web",
+        cache=None,
+        persistent_cache=persistent,
+        stale_while_revalidate=60,
+    )
+    platform.persistent_cache.ttl = 1
+    platform._keep_expired_entries(platform.persistent_cache)
+    assert platform.persistent_cache.stale_ttl == 60
+    platform.close()
+    assert CompressedMemoryCache(ttl=1, stale_ttl=5).stale_ttl == 5
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+
+"""Tests for the concurrency helpers in `heritage.concurrency`."""
+
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from heritage.concurrency import (
+    AdaptiveTimeout,
+    AsyncSingleFlight,
+    HostLimiter,
+    SingleFlight,
+    host_limiter,
+)
+from heritage.heritage import HeritagePlatform
+from heritage.retry import RetryPolicy
+
+
+def test_single_flight_shares_result_and_errors():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, "key", slow) for _ in range(4)]
+        while flight.info()["shared"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        assert [f.result() for f in futures] == ["value"] * 4
+    assert len(calls) == 1
+    assert flight.info() == {"calls": 1, "shared": 3}
+
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", failing)
+
+
+def test_async_single_flight_survives_cancelled_callers():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "value"
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == "value"
+        assert leader.cancelled()
+
+        with pytest.raises(RuntimeError):
+            await flight.do("key", failing)
+        return await flight.do("key", slow)
+
+    assert asyncio.run(main()) == "value"
+    assert len(calls) == 2
+    assert flight.info() == {"calls": 3, "shared": 1}
+
+
+def test_get_result_coalesces_concurrent_identical_queries(monkeypatch):
+    platform = HeritagePlatform(method="web", cache=None, failure_ttl=0)
+    platform.in_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fake_fetch(url, options, *args, **kwargs):
+        calls.append(url)
+        release.wait(5)
+        return "<html>result</html>"
+
+    monkeypatch.setattr(platform, "get_result_from_web", fake_fetch)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [
+            executor.submit(platform.get_result, "sandhi", {"l": "a"})
+            for _ in range(8)
+        ]
+        while platform.in_flight.info()["shared"] < 7:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+    assert results == ["<html>result</html>"] * 8
+    assert len(calls) == 1
+
+
+def test_host_limiter_aimd_adapts_to_overload():
+    limiter = HostLimiter(initial_concurrency=4, max_concurrency=8, cooldown=0)
+    for _ in range(4):
+        limiter.acquire()
+    assert limiter._try_acquire() is None
+
+    limiter.release(503, 0.1)
+    assert limiter.limit == 2
+    limiter.release(None, 0.1)
+    assert limiter.limit == 1
+    for _ in range(2):
+        limiter.release(200, 0.1)
+    assert limiter.in_flight == 0
+    assert 1 < limiter.limit < 3
+
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release(200, 0.1)
+    assert limiter.limit == 8
+
+
+def test_host_limiter_latency_baseline_is_per_kind():
+    limiter = HostLimiter(initial_concurrency=8, max_concurrency=8, cooldown=0)
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(200, 0.01, kind="sktsandhier.cgi")
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(200, 1.0, kind="sktreader.cgi")
+    assert limiter.limit == 8
+
+    limiter.acquire()
+    limiter.release(200, 1.0, kind="sktsandhier.cgi")
+    assert limiter.limit == 4
+
+
+def test_host_limiter_token_bucket_caps_rate():
+    limiter = HostLimiter(rate=20, burst=1)
+    started = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release(200, 0.01)
+    assert time.monotonic() - started >= 0.14
+
+
+def test_host_limiter_acquire_times_out():
+    limiter = HostLimiter(initial_concurrency=1, max_concurrency=1)
+    assert limiter.acquire(0.05)
+    started = time.monotonic()
+    assert not limiter.acquire(0.05)
+    assert 0.04 < time.monotonic() - started < 0.5
+    limiter.cancel()
+    assert limiter.acquire(0) and limiter.limit == 1
+
+
+def test_web_requests_go_through_the_host_limiter(http_server):
+    http_server.responder = lambda handler: (503, {}, "overloaded")
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=None,
+        failure_ttl=0,
+        request_attempts=1,
+        max_host_concurrency=6,
+    )
+    limiter = platform.host_limiter(http_server.url)
+    assert limiter is host_limiter(http_server.url.split("/")[2])
+    assert limiter.max_concurrency == 6
+    assert platform.get_result("sandhi", {"l": "a"}) is None
+    assert limiter.limit == 2
+    assert limiter.in_flight == 0
+
+
+def test_adaptive_timeout_tracks_percentiles():
+    timeouts = AdaptiveTimeout(multiplier=2, floor=0.5, ceiling=5)
+    assert timeouts.timeout("sandhi", 10) == 10
+    for _ in range(20):
+        timeouts.record("sandhi", 0.01)
+        timeouts.record("reader", 4.0)
+    assert timeouts.timeout("sandhi", 10) == 0.5
+    assert timeouts.timeout("reader", 10) == 5
+    assert timeouts.info()["sandhi"]["samples"] == 20
+
+
+def test_adaptive_timeout_learns_from_timeouts():
+    timeouts = AdaptiveTimeout(
+        multiplier=2, floor=0.5, ceiling=5, min_samples=3, window=5
+    )
+    for _ in range(20):
+        timeouts.record("reader", 0.01)
+    timeouts.record_timeout("reader", 0.5)
+    assert timeouts.timeout("reader", 10) == 1.0
+    timeouts.observer("reader")(1.0, timed_out=True)
+    assert timeouts.timeout("reader", 10) == 2.0
+    timeouts.record_timeout("reader", 0.5)
+    assert timeouts.timeout("reader", 10) == 2.0
+    for _ in range(4):
+        timeouts.record("reader", 0.01)
+    assert timeouts.timeout("reader", 10) == 2.0
+    # the window no longer holds the timeouts
+    timeouts.record("reader", 0.01)
+    assert timeouts.timeout("reader", 10) == 0.5
+
+
+def test_platform_uses_adaptive_timeouts(http_server):
+    delay = [0]
+
+    def responder(handler):
+        time.sleep(delay[0])
+        return 200, {}, "<html><title>OK</title></html>"
+
+    http_server.responder = responder
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=None,
+        failure_ttl=0,
+        request_attempts=1,
+        adaptive_timeout=AdaptiveTimeout(floor=0.1, min_samples=3),
+    )
+    for word in "abc":
+        assert platform.get_result("sandhi", {"l": word}) is not None
+    assert platform.adaptive_timeout.timeout(("web", "sandhi"), 10) < 0.3
+
+    delay[0] = 0.5
+    started = time.monotonic()
+    assert platform.get_result("sandhi", {"l": "d"}) is None
+    assert time.monotonic() - started < 0.4
+    assert platform.get_result("sandhi", {"l": "e"}, timeout=2) is not None
+
+
+def test_platform_adaptive_timeouts_recover(http_server):
+    delay = [0]
+    statuses = []
+
+    def responder(handler):
+        time.sleep(delay[0])
+        return (statuses.pop() if statuses else 200), {}, "<html>OK</html>"
+
+    http_server.responder = responder
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=None,
+        failure_ttl=0,
+        retry_policy=RetryPolicy(backoff_base=0.5, jitter="none"),
+        adaptive_timeout=AdaptiveTimeout(floor=0.1, min_samples=3),
+    )
+    # only the answered attempt is timed, not the backoff
+    statuses.append(503)
+    for word in "abc":
+        assert platform.get_result("sandhi", {"l": word}) is not None
+    assert platform.adaptive_timeout.timeout(("web", "sandhi"), 10) < 0.3
+
+    delay[0] = 0.3
+    results = [
+        platform.get_result("sandhi", {"l": word}, attempts=1)
+        for word in "defg"
+    ]
+    assert results[0] is None and results[-1] is not None
+    assert platform.adaptive_timeout.timeout(("web", "sandhi"), 10) >= 0.3
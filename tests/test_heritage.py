@@ -2,9 +2,19 @@
 
 """Tests for the `heritage` package."""
 
-from heritage.heritage import HeritageOutput
+import tracemalloc
+
+from heritage import heritage as heritage_module
+from heritage.heritage import HeritageOutput, HeritagePlatform
 from heritage.models import ConjugationTable, DeclensionTable, DictionaryEntry, SearchResult
-from heritage.utils import build_query_string, devanagari_to_velthuis
+from heritage.cache import MemoryCache
+from heritage.utils import (
+    QueryCanonicalizer,
+    build_query_string,
+    canonical_text,
+    devanagari_to_velthuis,
+    sniff_charset,
+)
 
 
 def test_build_query_string_filters_none_and_preserves_plus():
@@ -187,3 +197,174 @@ def test_extract_conjugations_structured_and_raw():
     legacy = output.extract_conjugations(structured=False)
     assert isinstance(legacy, dict)
     assert "लट्" in legacy
+
+
+def test_web_requests_reuse_pooled_connections(http_server):
+    with HeritagePlatform(
+        method="web", base_url=http_server.url, cache=None, pool_size=2
+    ) as platform:
+        for word in ["a", "b", "c", "d"]:
+            result = platform.get_result("sandhi", {"l": word})
+            assert "<title>OK</title>" in result
+        stats = platform.connection_stats()
+        assert stats["requests"] == 4
+        assert stats["connections"] == 1
+        assert stats["reuse_rate"] == 0.75
+    assert platform._session is None
+    assert len(http_server.requests) == 4
+
+
+def test_batch_keeps_order_dedupes_and_reports_errors(monkeypatch):
+    platform = HeritagePlatform(method="web", cache=None)
+    calls = []
+
+    def fake_sandhi(word_1, word_2, mode="internal"):
+        calls.append((word_1, word_2, mode))
+        if word_1 == "bad":
+            raise ValueError("bad input")
+        return f"{word_1}{word_2}"
+
+    monkeypatch.setattr(platform, "sandhi", fake_sandhi)
+    pairs = [("a", "b"), ("bad", "x"), ("a", "b"), ("c", "d")]
+    results = platform.sandhi_many(pairs, workers=3, mode="external")
+
+    assert [r.input for r in results] == pairs
+    assert [r.result for r in results] == ["ab", None, "ab", "cd"]
+    assert [r.ok for r in results] == [True, False, True, True]
+    assert isinstance(results[1].error, ValueError)
+    assert sorted(calls) == [
+        ("a", "b", "external"),
+        ("bad", "x", "external"),
+        ("c", "d", "external"),
+    ]
+
+
+def test_sniff_charset_from_meta_tags():
+    assert sniff_charset(b'<html><head><meta charset="UTF-8">') == "utf-8"
+    assert sniff_charset(
+        b'<meta http-equiv="Content-Type" '
+        b'content="text/html; charset=windows-1252">'
+    ) == "windows-1252"
+    assert sniff_charset(b"<html><head><title>x</title>") is None
+
+
+def test_encoding_detection_is_skipped_or_remembered(http_server, monkeypatch):
+    detections = []
+
+    def detect(content):
+        detections.append(content)
+        return {"encoding": "cp1252"}
+
+    monkeypatch.setattr(heritage_module.chardet, "detect", detect)
+    bodies = {
+        "utf8": "<html>rāma</html>".encode("utf-8"),
+        "meta": '<meta charset="cp1252"><html>café</html>'.encode("cp1252"),
+        "legacy": "<html>café</html>".encode("cp1252"),
+        # Mislabelled pages are decoded as UTF-8 before trusting Latin-1
+        "mislabelled": '<meta charset="iso-8859-1">rāma'.encode("utf-8"),
+        "latin": '<meta charset="iso-8859-1">café'.encode("latin-1"),
+    }
+    # No charset, i.e., ISO-8859-1 for requests
+    http_server.responder = lambda handler: (
+        200,
+        {"Content-Type": "text/html"},
+        bodies[handler.path.rsplit("=", 1)[1]],
+    )
+    platform = HeritagePlatform(
+        method="web", base_url=http_server.url, cache=None
+    )
+    url = platform.get_url("sandhi")
+    result = platform.get_result_from_web(url, {"t": "utf8"})
+    assert result == "<html>rāma</html>"
+    assert "café" in platform.get_result_from_web(url, {"t": "meta"})
+    assert "rāma" in platform.get_result_from_web(url, {"t": "mislabelled"})
+    assert "café" in platform.get_result_from_web(url, {"t": "latin"})
+    assert not detections
+
+    for _ in range(2):
+        result = platform.get_result_from_web(url, {"t": "legacy"})
+        assert result == "<html>café</html>"
+    assert len(detections) == 1
+    platform.close()
+
+
+def test_canonical_text_and_options():
+    nfd = "न\u093c"  # NA + NUKTA, precomposed in NFC
+    assert canonical_text(f"  {nfd}\u200d  राम\u200b\n") == "\u0929 राम"
+
+    canonicalizer = QueryCanonicalizer()
+    assert canonicalizer.text("राम") == "राम"
+    options = canonicalizer.options({"t": "VH", "l": "a", "x": None})
+    assert list(options) == ["l", "t"]
+    assert canonicalizer.options({"q": "a\u200c"}) == {"q": "a"}
+    assert canonicalizer.text("a\u200b  b") == "a b"
+    assert canonicalizer.info() == {"queries": 2, "rewritten": 2}
+
+
+def test_equivalent_queries_share_a_backend_call(monkeypatch):
+    calls = []
+
+    def fake_fetch(url, options, *args, **kwargs):
+        calls.append(options)
+        return "<html>result</html>"
+
+    platform = HeritagePlatform(method="web", cache=MemoryCache())
+    monkeypatch.setattr(platform, "get_result_from_web", fake_fetch)
+    platform.get_declensions("रा\u200dम", "m")
+    platform.get_declensions("  राम ", "m")
+    platform.get_result("sandhi", {"l": "a", "r": "b "})
+    platform.get_result("sandhi", {"r": "b", "l": "a"})
+    assert len(calls) == 2
+
+
+def test_heritage_output_is_parsed_lazily():
+    html = (
+        "<html><head><meta name='author' content='Huet'>"
+        "<title>Sanskrit Sandhi Engine</title></head>"
+        "<body><span>raama.h | vanam = raamovanam</span></body></html>"
+    )
+    output = HeritageOutput(html)
+    assert output.extract_analysis() is None
+    assert output.extract_declensions() is None
+    assert "soup" not in vars(output)
+
+    assert output.extract_sandhi() == "raamovanam"
+    assert output.meta == {"author": "Huet"}
+    assert output.footer is None
+    assert [tag.name for tag in output.blocks] == ["span"]
+
+    output.process("<html><head><title>Other</title></head></html>")
+    assert "soup" not in vars(output)
+    assert output.page_title == "Other"
+    assert output.blocks == []
+
+
+def test_one_shot_extraction_releases_the_page(monkeypatch):
+    html = (
+        "<html><head><title>Sanskrit Sandhi Engine</title></head>"
+        "<body><span>raama.h | vanam = raamovanam</span></body></html>"
+    )
+    assert HeritageOutput.extract(html, "sandhi") == "raamovanam"
+    result, usage = HeritageOutput.extract(
+        html, "sandhi", with_usage=True, trace_memory=True
+    )
+    assert result == "raamovanam"
+    assert (usage.extractor, usage.size) == ("sandhi", len(html))
+    assert usage.peak_memory > 0
+
+    output = HeritageOutput(html)
+    assert "raamovanam" not in repr(output)
+    soup = output.soup
+    output.release()
+    assert soup.decomposed
+    assert output.html is None and "soup" not in vars(output)
+    assert repr(output) == "HeritageOutput(released)"
+
+    platform = HeritagePlatform(method="web", cache=None, trace_memory=True)
+    monkeypatch.setattr(platform, "get_result", lambda *args, **kw: html)
+    assert platform.sandhi("raama.h", "vanam") == "raamovanam"
+    info = platform.extraction_info()
+    assert info["runs"] == 1 and info["max_memory"] > 0
+    assert platform.extractions.last.extractor == "sandhi"
+    assert platform.extractions.last.size == len(html)
+    assert not tracemalloc.is_tracing()
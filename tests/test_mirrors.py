@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+"""Tests for the mirror pool in `heritage.mirrors`."""
+
+import time
+
+from heritage import mirrors as mirrors_module
+from heritage.heritage import HeritagePlatform
+from heritage.mirrors import MirrorPool
+from heritage.retry import RetryPolicy
+
+
+def test_mirror_pool_routing_and_circuit_breaker(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(mirrors_module.time, "monotonic", lambda: now[0])
+    pool = MirrorPool(["http://a/", "http://b/"], reset_timeout=10)
+    fast, slow = pool.mirrors[1], pool.mirrors[0]
+
+    for mirror, latency in [(fast, 0.1), (slow, 0.5)]:
+        others = [m for m in pool.mirrors if m is not mirror]
+        assert pool.select(exclude=others) is mirror
+        pool.record(mirror, True, latency)
+    assert pool.select() is fast
+    pool.record(fast, True, 0.1)
+
+    for _ in range(pool.failure_threshold):
+        pool.select()
+        pool.record(fast, False)
+    assert pool.select() is slow
+    pool.record(slow, True, 0.5)
+
+    now[0] += 10
+    assert pool.select() is fast
+
+
+def test_platform_fails_over_between_mirrors(http_server, second_http_server):
+    http_server.responder = lambda handler: (503, {}, "unavailable")
+    platform = HeritagePlatform(
+        method="web",
+        base_url=[http_server.url, second_http_server.url],
+        cache=None,
+        failure_ttl=0,
+        retry_policy=RetryPolicy(backoff_base=0.01, jitter="none"),
+    )
+    # Both mirrors are unsampled, so the first request goes to the first one
+    # and the retry to the healthy second mirror.
+    platform.mirrors.failure_threshold = 1
+    result = platform.get_result("sandhi", {"l": "a"})
+    assert "<title>OK</title>" in result
+    for word in ["b", "c", "d"]:
+        assert platform.get_result("sandhi", {"l": word}) is not None
+    assert len(http_server.requests) == 1
+    assert len(second_http_server.requests) == 4
+    assert platform.cache_scope().startswith(f"web:{http_server.url}|")
+
+
+def test_mirror_pool_rewrites_urls_relative_to_mirrors():
+    pool = MirrorPool(
+        ["https://a.org/cgi-bin/SKT/", "http://b.org:8080/skt/cgi-bin/SKT/"]
+    )
+    first, second = pool.mirrors
+    for url, reference in [
+        (
+            "https://a.org/cgi-bin/SKT/sktsandhier.cgi?l=a",
+            "sktsandhier.cgi?l=a",
+        ),
+        ("https://a.org/MW/94.html", "../../MW/94.html"),
+        ("http://b.org:8080/skt/MW/94.html", "../../MW/94.html"),
+    ]:
+        assert pool.relative(url) == reference
+    assert second.resolve("../../MW/94.html") == (
+        "http://b.org:8080/skt/MW/94.html"
+    )
+    assert first.resolve("./") == "https://a.org/cgi-bin/SKT/"
+    assert pool.relative("https://c.org/cgi-bin/SKT/sktsandhier.cgi") is None
+
+
+def test_dictionary_pages_fail_over_between_mirrors(
+    http_server, second_http_server
+):
+    http_server.responder = lambda handler: (503, {}, "unavailable")
+    platform = HeritagePlatform(
+        method="web",
+        base_url=[http_server.url, second_http_server.url],
+        cache=None,
+        failure_ttl=0,
+        retry_policy=RetryPolicy(backoff_base=0.01, jitter="none"),
+    )
+    platform.mirrors.failure_threshold = 1
+    url = platform.get_url("dictionary")
+    for page in ["1.html", "2.html"]:
+        assert platform._query_with_backoff(f"{url}{page}", 3, 5) is not None
+    assert http_server.requests == ["/MW/1.html"]
+    assert second_http_server.requests == ["/MW/1.html", "/MW/2.html"]
+
+
+def test_slow_requests_are_hedged_to_another_mirror(
+    http_server, second_http_server
+):
+    def slow(handler):
+        time.sleep(0.5)
+        return 200, {}, "<html><title>slow</title></html>"
+
+    http_server.responder = slow
+    second_http_server.responder = lambda handler: (
+        200,
+        {},
+        "<html><title>fast</title></html>",
+    )
+    platform = HeritagePlatform(
+        method="web",
+        base_url=[http_server.url, second_http_server.url],
+        cache=None,
+        hedge_percentile=50,
+    )
+    primary, secondary = platform.mirrors.mirrors
+    for mirror, latency in [(primary, 0.01)] * 10 + [(secondary, 1.0)]:
+        mirror.in_flight += 1
+        platform.mirrors.record(mirror, True, latency)
+
+    started = time.monotonic()
+    result = platform.get_result("sandhi", {"l": "a"})
+    assert "fast" in result
+    assert time.monotonic() - started < 0.45
+    assert platform.mirrors.hedged == 1
+    platform.close()
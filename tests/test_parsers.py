@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+"""Parity of the extraction results across HTML parsers."""
+
+import os
+
+import pytest
+
+from heritage.heritage import (
+    DEFAULT_HTML_PARSER,
+    HeritageOutput,
+    HeritagePlatform,
+)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def extract_all(name, parser):
+    """Results of every extractor (and option) relevant to a fixture page"""
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        html = f.read()
+
+    def extract(method, *args, **kwargs):
+        output = HeritageOutput(html, parser=parser)
+        return getattr(output, method)(*args, **kwargs)
+
+    return {
+        "reader_two_solutions.html": lambda: [
+            extract("extract_analysis", meta=meta, structured=structured)
+            for meta in (False, True)
+            for structured in (False, True)
+        ],
+        "parser.html": lambda: [
+            extract("extract_parse", structured=structured)
+            for structured in (False, True)
+        ],
+        "sandhi.html": lambda: extract("extract_sandhi"),
+        "declension.html": lambda: [
+            extract(
+                "extract_declensions", headers=headers, structured=structured
+            )
+            for headers in (False, True)
+            for structured in (False, True)
+        ],
+        "conjugation.html": lambda: [
+            extract(
+                "extract_conjugations", headers=headers, structured=structured
+            )
+            for headers in (False, True)
+            for structured in (False, True)
+        ],
+        "dictionary.html": lambda: [
+            extract("extract_lexicon_entry", "raama"),
+            extract("extract_lexicon_entry", "raama_2"),
+        ],
+        "search.html": lambda: [
+            extract("extract_search_results", structured=structured)
+            for structured in (False, True)
+        ],
+    }[name]()
+
+
+FIXTURE_PAGES = [
+    "reader_two_solutions.html",
+    "parser.html",
+    "sandhi.html",
+    "declension.html",
+    "conjugation.html",
+    "dictionary.html",
+    "search.html",
+]
+
+
+@pytest.mark.parametrize("name", FIXTURE_PAGES)
+def test_fixtures_are_extracted(name):
+    results = extract_all(name, "html.parser")
+    assert results
+    assert None not in (results if isinstance(results, list) else [results])
+
+
+@pytest.mark.parametrize(
+    "parser, module", [("lxml", "lxml"), ("html5lib", "html5lib")]
+)
+@pytest.mark.parametrize("name", FIXTURE_PAGES)
+def test_parsers_agree(name, parser, module):
+    pytest.importorskip(module)
+    assert extract_all(name, parser) == extract_all(name, "html.parser")
+
+
+def test_platform_parser_falls_back_when_unavailable():
+    platform = HeritagePlatform(method="web", html_parser="no-such-parser")
+    assert platform.html_parser == DEFAULT_HTML_PARSER
+    platform = HeritagePlatform(method="web", html_parser="html.parser")
+    assert platform.html_parser == "html.parser"
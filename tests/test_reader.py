@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+"""Tests for the extraction of Reader Companion solutions."""
+
+import os
+
+import pytest
+
+from heritage.heritage import HeritageOutput, HeritagePlatform
+from heritage.models import AnalysisCandidate, SolutionAnalysis, WordAnalysis
+from heritage.reader import UnexpectedStructure, scan_solutions
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_extract_analysis_structured():
+    output = HeritageOutput(read_fixture("reader_two_solutions.html"))
+    solutions = output.extract_analysis(structured=True)
+
+    assert list(solutions) == [1, 2]
+    first = solutions[1]
+    assert isinstance(first, SolutionAnalysis)
+    assert first.parser_options is None
+    texts = [word.text for word in first.words]
+    assert texts == ["rāmaḥ", "vanam", "gacchati"]
+    assert first.words[1] == WordAnalysis(
+        text="vanam",
+        category=["substantive/adjective forms"],
+        classes=["deep_sky_back"],
+        candidates=[
+            AnalysisCandidate(
+                root="vana",
+                analyses=[["n", "sg", "acc"], ["n", "sg", "nom"]],
+                lexicon_reference=("227.html", "vana"),
+            )
+        ],
+    )
+    assert first.words[2].category == ["finite verbal forms"]
+
+    # Unparsable rows are skipped, links are optional
+    vocative = solutions[2].words[0]
+    assert vocative.category == ["vocative"]
+    assert vocative.candidates == [
+        AnalysisCandidate(
+            root="rāma",
+            analyses=[["m", "sg", "voc"]],
+            lexicon_reference=(None, None),
+        )
+    ]
+    # The footer after the last solution is ignored
+    assert len(solutions[2].words) == 2
+
+
+def test_extract_analysis_legacy_with_meta():
+    output = HeritageOutput(read_fixture("reader_two_solutions.html"))
+    solutions = output.extract_analysis(meta=True)
+
+    assert solutions[2]["parser_options"]["n"] == "2"
+    assert solutions[2]["parser_options"]["text"] == "raama.h+vanam+gacchati"
+    assert solutions[1]["words"][0] == [
+        {
+            "text": "rāmaḥ",
+            "classes": ["deep_sky_back"],
+            "category": ["substantive/adjective forms"],
+            "lexicon": ("215.html", "raama"),
+            "root": "rāma",
+            "analyses": [["m", "sg", "nom"]],
+        }
+    ]
+    assert len(solutions[1]["words"][1]) == 1
+
+
+def test_extract_analysis_rejects_other_pages():
+    head = "<html><head><title>Sanskrit Reader Companion</title></head>"
+    output = HeritageOutput(head + "<body></body></html>")
+    assert output.extract_analysis() is None
+    head = "<html><head><title>Sanskrit Sandhi Engine</title></head>"
+    output = HeritageOutput(head + "<body><hr></body></html>")
+    assert output.extract_analysis() is None
+
+
+def test_extract_analysis_splits_at_hr_elements():
+    # Solutions are delimited by the <hr> elements of the parsed page, i.e.,
+    # whatever the case and attributes of the tag, and not by an "<hr>"
+    # within a comment (which the raw-text split before 1.1 did)
+    html = read_fixture("reader_two_solutions.html")
+    expected = HeritageOutput(html).extract_analysis(structured=True)
+    variant = html.replace("<hr>", '<HR class="wide">', 2)
+    variant = variant.replace("<hr>", "<!-- <hr> --><hr>", 1)
+    assert HeritageOutput(variant).extract_analysis(structured=True) == (
+        expected
+    )
+
+    solutions = HeritageOutput(read_fixture("reader_comment.html"))
+    words = solutions.extract_analysis(structured=True)[1].words
+    assert [word.text for word in words] == ["gacchati"]
+
+
+READER_FIXTURES = [
+    "reader_two_solutions.html",
+    "reader_compounds.html",
+    "reader_comment.html",
+    "reader_head_script.html",
+    "reader_no_solutions.html",
+]
+
+
+@pytest.mark.parametrize("name", READER_FIXTURES)
+@pytest.mark.parametrize("meta", [False, True])
+@pytest.mark.parametrize("structured", [False, True])
+def test_fast_extraction_matches_tree(name, meta, structured):
+    html = read_fixture(name)
+    expected = HeritageOutput(html).extract_analysis(
+        meta=meta, structured=structured
+    )
+    output = HeritageOutput(html)
+    fast = output.extract_analysis(meta=meta, structured=structured, fast=True)
+    assert fast == expected
+
+
+def test_fast_extraction_does_not_build_a_tree():
+    output = HeritageOutput(read_fixture("reader_compounds.html"))
+    solutions = output.extract_analysis(structured=True, fast=True)
+    assert "soup" not in vars(output)
+
+    words = solutions[1].words
+    assert [word.text for word in words] == ["", "rājaḥ & co", "ca", ""]
+    assert words[1].classes == ["deep_sky_back", "light_blue_back"]
+    assert len(words[1].candidates) == 3
+    assert words[3].candidates == []
+    assert scan_solutions(read_fixture("reader_no_solutions.html")) == []
+
+
+def test_fast_extraction_falls_back_on_surprises():
+    html = read_fixture("reader_comment.html")
+    with pytest.raises(UnexpectedStructure):
+        scan_solutions(html)
+    with pytest.raises(UnexpectedStructure):
+        scan_solutions(
+            html.replace(
+                "<!-- <hr> legacy separator -->", "<script>init()</script>"
+            )
+        )
+    # Raw text in the head could hold an <hr> and shift the blocks
+    with pytest.raises(UnexpectedStructure):
+        scan_solutions(read_fixture("reader_head_script.html"))
+
+    output = HeritageOutput(html)
+    solutions = output.extract_analysis(structured=True, fast=True)
+    assert "soup" in vars(output)
+    assert solutions[1].words[0].text == "gacchati"
+
+
+def test_platform_uses_fast_reader(monkeypatch):
+    platform = HeritagePlatform(method="web", cache=None, fast_reader=True)
+    html = read_fixture("reader_two_solutions.html")
+    monkeypatch.setattr(platform, "get_result", lambda *args, **kw: html)
+    solutions = platform.get_analysis("raama.h vanam gacchati")
+    assert solutions == HeritageOutput(html).extract_analysis(structured=True)
+
+
+def test_get_parse_attaches_roles(monkeypatch):
+    platform = HeritagePlatform(method="web", cache=None)
+    pages = {
+        "reader": read_fixture("reader_two_solutions.html"),
+        "parser": read_fixture("parser.html"),
+    }
+    queries = []
+
+    def fake_get_result(action, options, *args, **kwargs):
+        queries.append((action, options))
+        return pages[action]
+
+    monkeypatch.setattr(platform, "get_result", fake_get_result)
+    solution = platform.get_parse("raama.h vanam gacchati")
+    assert solution.id == 1
+    assert [(role.text, role.roles) for role in solution.roles] == [
+        ("rāmaḥ", ["kartā"]),
+        ("vanam", ["karma", "deśaḥ"]),
+    ]
+    assert queries[1] == ("parser", solution.parser_options)
+    assert queries[1][1]["n"] == "1"
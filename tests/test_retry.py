@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+"""Tests for the retry policy in `heritage.retry`."""
+
+import time
+
+import pytest
+
+from heritage.heritage import HeritagePlatform
+from heritage.retry import Deadline, RetryPolicy
+
+
+def test_retry_policy_delays():
+    policy = RetryPolicy(attempts=3, backoff_base=0.5, jitter="none")
+    assert policy.next_delay(0, 503) == 0.5
+    assert policy.next_delay(1, None) == 1.0
+    assert policy.next_delay(2, 503) is None
+    assert policy.next_delay(0, 404) is None
+    assert policy.next_delay(0, 429, retry_after=2) == 2
+    assert policy.next_delay(0, 429, retry_after=120) is None
+
+    full = RetryPolicy(backoff_base=1, backoff_max=3, jitter="full")
+    assert all(0 <= full.backoff(n) <= 3 for n in range(10))
+    with pytest.raises(ValueError):
+        RetryPolicy(jitter="random")
+
+
+def test_retry_after_header():
+    policy = RetryPolicy()
+    assert policy.retry_after({"Retry-After": "7"}) == 7.0
+    assert policy.retry_after({"Retry-After": "soon"}) is None
+    assert policy.retry_after({}) is None
+    http_date = time.strftime(
+        "%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30)
+    )
+    assert 25 < policy.retry_after({"Retry-After": http_date}) <= 30
+    assert RetryPolicy(respect_retry_after=False).retry_after(
+        {"Retry-After": "7"}
+    ) is None
+
+
+def test_deadline():
+    deadline = Deadline(0.2)
+    assert deadline.timeout(10) <= 0.2
+    assert deadline.allows(0.1)
+    assert not deadline.allows(1)
+    unbounded = Deadline()
+    assert unbounded.timeout(10) == 10 and unbounded.allows(1e9)
+
+
+def test_platform_honours_retry_after(http_server):
+    responses = iter([(503, {"Retry-After": "0"}, "busy")])
+    http_server.responder = lambda handler: next(
+        responses, (200, {}, "<html><title>OK</title></html>")
+    )
+    platform = HeritagePlatform(
+        method="web", base_url=http_server.url, cache=None
+    )
+    started = time.monotonic()
+    assert "OK" in platform.get_result("sandhi", {"l": "a"})
+    assert time.monotonic() - started < 0.5
+    assert len(http_server.requests) == 2
+
+
+def test_platform_deadline_and_final_statuses(http_server):
+    http_server.responder = lambda handler: (503, {}, "busy")
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=None,
+        failure_ttl=0,
+        retry_policy=RetryPolicy(attempts=10, deadline=0.5, jitter="none"),
+    )
+    started = time.monotonic()
+    assert platform.get_result("sandhi", {"l": "a"}) is None
+    assert time.monotonic() - started < 0.5
+    # backoff of 1s does not fit within the deadline
+    assert len(http_server.requests) == 1
+
+    http_server.responder = lambda handler: (404, {}, "missing")
+    assert platform.get_result("sandhi", {"l": "b"}, deadline=None) is None
+    assert len(http_server.requests) == 2
+
+
+def test_platform_deadline_bounds_the_host_limiter(http_server):
+    platform = HeritagePlatform(
+        method="web",
+        base_url=http_server.url,
+        cache=None,
+        failure_ttl=0,
+        rate_limit=0.1,
+        retry_policy=RetryPolicy(deadline=0),
+    )
+    assert platform.sandhi("raama", "iti") is None
+    assert http_server.requests == []
+
+    platform.retry_policy = RetryPolicy(deadline=0.3, jitter="none")
+    assert platform.get_result("sandhi", {"l": "a"}) is not None
+    started = time.monotonic()
+    # the next token of the host limiter is 10s away
+    assert platform.get_result("sandhi", {"l": "b"}) is None
+    assert time.monotonic() - started < 1
+    assert len(http_server.requests) == 1
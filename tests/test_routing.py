@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+"""Tests for the per-action routing of `HeritagePlatform`."""
+
+import os
+import sys
+import signal
+import time
+import concurrent.futures
+from unittest import mock
+
+from heritage.heritage import HeritagePlatform
+
+
+def _platform(installation, server, **kwargs):
+    return HeritagePlatform(
+        installation, base_url=server.url, cache=None, failure_ttl=0, **kwargs
+    )
+
+
+def test_actions_are_routed_to_their_method(
+    heritage_installation, http_server
+):
+    platform = _platform(
+        heritage_installation, http_server, routes={"sandhi": "web"}
+    )
+    assert platform.get_method() == "shell"
+    assert platform.get_method("sandhi") == "web"
+    # No local dictionary pages
+    assert platform.get_method("dictionary") == "web"
+
+    assert "<title>OK</title>" in platform.get_result("sandhi", {"l": "a"})
+    assert "l=a" in platform.get_result("lemma", {"l": "a"})
+    assert http_server.requests == ["/cgi-bin/sktsandhier.cgi?l=a"]
+
+    assert platform.set_method(None, action="sandhi")
+    assert platform.get_method("sandhi") == "shell"
+    assert not platform.set_method("web", action="unknown")
+
+
+def test_failing_script_falls_back_to_web(heritage_installation, http_server):
+    platform = _platform(heritage_installation, http_server)
+    path = platform.get_path("sandhi")
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\nraise SystemExit(1)\n")
+    os.chmod(path, 0o755)
+
+    assert "<title>OK</title>" in platform.get_result("sandhi", {"l": "a"})
+    assert len(http_server.requests) == 1
+
+    platform.shell_fallback = False
+    assert platform.get_result("sandhi", {"l": "b"}) is None
+    assert len(http_server.requests) == 1
+
+
+def test_script_timeouts_do_not_fall_back(heritage_installation, http_server):
+    platform = _platform(heritage_installation, http_server)
+    path = platform.get_path("sandhi")
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\nimport time\ntime.sleep(5)\n")
+    os.chmod(path, 0o755)
+
+    assert platform.get_result("sandhi", {"l": "a"}, timeout=0.5) is None
+    assert http_server.requests == []
+
+    # Missing scripts do
+    os.remove(path)
+    assert "<title>OK</title>" in platform.get_result("sandhi", {"l": "a"})
+    assert len(http_server.requests) == 1
+
+
+def test_scripts_killed_by_limits_do_not_fall_back(
+    heritage_installation, http_server
+):
+    platform = _platform(
+        heritage_installation,
+        http_server,
+        shell_cpu_limit=1,
+    )
+    path = platform.get_path("sandhi")
+    with open(path, "w") as f:
+        f.write(f"#!{sys.executable}\nwhile True:\n    pass\n")
+    os.chmod(path, 0o755)
+
+    assert platform.get_result("sandhi", {"l": "a"}, timeout=10) is None
+    assert platform.shell.last.returncode in (-signal.SIGXCPU, -signal.SIGKILL)
+    assert http_server.requests == []
+
+
+def test_batch_workers_follow_the_routes(heritage_installation, http_server):
+    platform = _platform(
+        heritage_installation,
+        http_server,
+        routes={"sandhi": "web"},
+        pool_size=3,
+        shell_workers=1,
+    )
+    workers = []
+    original = concurrent.futures.ThreadPoolExecutor.__init__
+
+    def spy(self, max_workers=None, *args, **kwargs):
+        workers.append(max_workers)
+        original(self, max_workers, *args, **kwargs)
+
+    with mock.patch.object(
+        concurrent.futures.ThreadPoolExecutor, "__init__", spy
+    ):
+        platform.sandhi_many([("a", "b"), ("c", "d"), ("e", "f")])
+        platform.search_lexicon_many(["a", "b"])
+    assert workers == [3, 1]
+
+
+def test_probe_routes_to_the_faster_method(heritage_installation, http_server):
+    def responder(handler):
+        if "sktsandhier" in handler.path:
+            time.sleep(0.5)
+        return 200, {}, "<html><title>OK</title></html>"
+
+    http_server.responder = responder
+    platform = _platform(heritage_installation, http_server)
+    report = platform.probe_backends(["sandhi", "search"])
+    assert report["sandhi"]["method"] == "shell"
+    assert report["search"]["method"] == "web"
+    assert report["search"]["shell"] > report["search"]["web"]
+    assert platform.get_method("sandhi") == "shell"
+    assert platform.get_method("search") == "web"
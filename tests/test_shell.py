@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+
+"""Tests for the shell executor in `heritage.shell`."""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import subprocess
+
+import pytest
+
+from heritage.heritage import HeritagePlatform
+from heritage.aio import AsyncHeritagePlatform
+from heritage.shell import ResourceLimits, ShellExecutor, ShellRun
+
+
+def test_shell_scripts_run_in_parallel(heritage_installation):
+    platform = HeritagePlatform(
+        heritage_installation, method="shell", cache=None, shell_workers=4
+    )
+    assert platform.method == "shell"
+    words = [("rAma", "vanam"), ("deva", "iti"), ("na", "asti"), ("a", "b")]
+
+    started = time.monotonic()
+    results = platform.sandhi_many(words)
+    elapsed = time.monotonic() - started
+    assert [item.result for item in results] == ["raamovanam"] * 4
+    assert elapsed < 0.8
+
+    serial = HeritagePlatform(
+        heritage_installation, method="shell", cache=None, shell_workers=1
+    )
+    started = time.monotonic()
+    serial.sandhi_many(words)
+    assert time.monotonic() - started >= 0.8
+
+
+def test_shell_timeouts(heritage_installation):
+    platform = HeritagePlatform(heritage_installation, method="shell")
+    path = platform.get_path("sandhi")
+    assert platform.get_result_from_shell(path, {}, timeout=0.05) is None
+
+    async def main():
+        async with AsyncHeritagePlatform(
+            base_dir=heritage_installation, method="shell"
+        ) as aplatform:
+            return await aplatform.get_result_from_shell(
+                path, {}, timeout=0.05
+            )
+
+    assert asyncio.run(main()) is None
+
+
+def test_async_shell_matches_sync(heritage_installation):
+    sync = HeritagePlatform(heritage_installation, cache=None)
+    expected = sync.get_result("sandhi", {"l": "rAma"})
+    assert "l=rAma" in expected
+
+    async def main():
+        async with AsyncHeritagePlatform(
+            base_dir=heritage_installation,
+            method="shell",
+            cache=None,
+            shell_workers=4,
+        ) as platform:
+            first = await platform.get_result("sandhi", {"l": "rAma"})
+            started = time.monotonic()
+            await asyncio.gather(
+                *(
+                    platform.get_result("sandhi", {"l": word})
+                    for word in "abcd"
+                )
+            )
+            return first, time.monotonic() - started
+
+    result, elapsed = asyncio.run(main())
+    assert result == expected
+    assert elapsed < 0.6
+
+
+def test_shell_environment_is_minimal(heritage_installation, monkeypatch):
+    monkeypatch.setenv("UNRELATED_VARIABLE", "1")
+    platform = HeritagePlatform(
+        heritage_installation, shell_environment={"EXTRA": "x"}
+    )
+    calls = []
+    monkeypatch.setattr(
+        platform.shell,
+        "run_with_usage",
+        lambda path, environment, timeout: (
+            calls.append(environment) or "",
+            ShellRun(path, 0, 0.0),
+        ),
+    )
+    platform.get_result_from_shell(platform.get_path("sandhi"), {"l": "a"})
+    environment = calls[0]
+    assert environment["QUERY_STRING"] == "l=a"
+    assert environment["EXTRA"] == "x"
+    assert "UNRELATED_VARIABLE" not in environment
+    assert "QUERY_STRING" not in platform.shell_environment
+
+
+def test_installation_requires_executable_scripts(heritage_installation):
+    platform = HeritagePlatform(heritage_installation)
+    assert platform.method == "shell"
+    assert os.path.isabs(platform.get_path("reader"))
+
+    os.chmod(platform.get_path("reader"), 0o644)
+    platform = HeritagePlatform(heritage_installation)
+    assert platform.method == "shell"
+    assert platform.get_method("reader") == "web"
+    assert platform.get_method("sandhi") == "shell"
+    assert not platform.set_method("shell", action="reader")
+
+
+def _script(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text(f"#!{sys.executable}\n{body}")
+    os.chmod(path, 0o755)
+    return str(path)
+
+
+def test_timeout_kills_the_process_group(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    path = _script(
+        tmp_path,
+        "spawner",
+        "import subprocess, time\n"
+        "child = subprocess.Popen(['sleep', '30'])\n"
+        f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+        "time.sleep(30)\n",
+    )
+    executor = ShellExecutor(workers=1)
+    with pytest.raises(subprocess.TimeoutExpired):
+        executor.run(path, {"PATH": os.environ["PATH"]}, timeout=0.5)
+    assert executor.last.timed_out
+    assert executor.info()["timeouts"] == 1
+
+    child = int(pid_file.read_text())
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        try:
+            with open(f"/proc/{child}/stat") as f:
+                # a killed orphan may linger as a zombie (state Z)
+                if f.read().rsplit(")", 1)[1].split()[0] == "Z":
+                    break
+        except FileNotFoundError:
+            break
+        time.sleep(0.01)
+    else:
+        pytest.fail("Grandchild survived the timeout")
+
+
+def test_resource_limits_and_usage(tmp_path):
+    path = _script(
+        tmp_path,
+        "hungry",
+        "import sys\n"
+        "data = bytearray(int(sys.argv[1]) if len(sys.argv) > 1 else 2**27)\n"
+        "print('Content-Type: text/html\\n\\nfed', end='')\n",
+    )
+    executor = ShellExecutor(limits=ResourceLimits(memory=2**26))
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        executor.run(path, {}, timeout=10)
+    assert error.value.usage.returncode != 0
+
+    executor = ShellExecutor()
+    output, usage = executor.run_with_usage(path, {}, timeout=10)
+    assert output == "fed"
+    assert usage.returncode == 0
+    assert usage.peak_rss >= 2**27
+    assert executor.info()["max_rss"] == usage.peak_rss
+
+
+def test_usage_is_reported_per_run(tmp_path):
+    path = _script(
+        tmp_path,
+        "signalled",
+        "import os, signal, sys, time\n"
+        "if os.environ.get('KILL'):\n"
+        "    os.kill(os.getpid(), signal.SIGKILL)\n"
+        "time.sleep(float(os.environ['DELAY']))\n"
+        "print('Content-Type: text/html\\n\\n' + os.environ['DELAY'])\n",
+    )
+    executor = ShellExecutor(workers=2)
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        executor.run(path, {"KILL": "1", "DELAY": "0"}, timeout=10)
+    assert error.value.returncode == -9
+
+    async def main():
+        return await asyncio.gather(
+            executor.run_with_usage_async(path, {"DELAY": "0.3"}, 10),
+            executor.run_with_usage_async(path, {"DELAY": "0"}, 10),
+        )
+
+    (slow, slow_usage), (fast, fast_usage) = asyncio.run(main())
+    assert (slow.strip(), fast.strip()) == ("0.3", "0")
+    assert slow_usage.wall_time >= 0.3 > fast_usage.wall_time
+    assert executor.info()["runs"] == 3
+
+
+def test_only_limit_kills_are_attributed_to_limits():
+    executor = ShellExecutor(
+        limits=ResourceLimits(memory=100 * 2**20, cpu_time=1)
+    )
+    assert executor.killed_by_limit(ShellRun("s", -signal.SIGXCPU, 1.0))
+    assert executor.killed_by_limit(ShellRun("s", -signal.SIGKILL, 1.0))
+    assert executor.killed_by_limit(ShellRun("s", 2, 0.1, 95 * 2**20))
+    # Ordinary failures and crashes
+    assert not executor.killed_by_limit(ShellRun("s", 1, 0.1, 10 * 2**20))
+    assert not executor.killed_by_limit(ShellRun("s", -signal.SIGSEGV, 0.1))
+    assert not executor.killed_by_limit(ShellRun("s", 1, 0.1))
+    assert not executor.killed_by_limit(ShellRun("s", 0, 0.1, 95 * 2**20))
+    assert not ShellExecutor().killed_by_limit(
+        ShellRun("s", -signal.SIGKILL, 1.0)
+    )